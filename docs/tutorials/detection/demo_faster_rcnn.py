@@ -39,12 +39,15 @@ x, orig_img = data.transforms.presets.rcnn.load_test(im_fname)
 # Inference and display
 # ---------------------
 #
-# The Faster RCNN model
+# The Faster RCNN model returns predicted class IDs, confidence scores and
+# bounding boxes of all images in the batch. Their shapes are
+# `(batch_size, num_bboxes, 1)`, `(batch_size, num_bboxes, 1)`, and
+# `(batch_size, num_bboxes, 4)`, respectively, like SSD.
 #
 # We can use :py:func:`gluoncv.utils.viz.plot_bbox` to visualize the
 # results. We slice the results for the first image and feed them into `plot_bbox`:
 
 box_ids, scores, bboxes = net(x)
-ax = utils.viz.plot_bbox(orig_img, bboxes, scores, box_ids, class_names=net.classes)
+ax = utils.viz.plot_bbox(orig_img, bboxes[0], scores[0], box_ids[0], class_names=net.classes)
 
 plt.show()
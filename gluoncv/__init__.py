@@ -4,8 +4,7 @@ from __future__ import absolute_import
 
 __version__ = '0.2.0'
 
-from . import data
-from . import model_zoo
-from . import nn
-from . import utils
-from . import loss
+from ._lazy import lazy_module
+
+# sub-packages are imported on first access
+lazy_module(__name__, submodules=['data', 'model_zoo', 'nn', 'utils', 'loss'])
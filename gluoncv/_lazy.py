@@ -0,0 +1,92 @@
+"""Lazy loading of package members, so that importing a package only imports
+what is actually used."""
+from __future__ import absolute_import
+
+import sys
+import types
+import importlib
+
+__all__ = ['lazy_module']
+
+
+class _LazyModule(types.ModuleType):
+    """Module which imports sub-modules and attributes on first access.
+
+    Parameters
+    ----------
+    module : module
+        The original module, whose members are copied.
+    submodules : iterable of str
+        Names of sub-modules to be imported on access.
+    attributes : dict of str to list of str
+        Relative module names mapped to the attributes they provide.
+    fallback : iterable of str
+        Relative module names searched in order for any other attribute.
+
+    """
+    def __init__(self, module, submodules, attributes, fallback):
+        super(_LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self._lazy_submodules = frozenset(submodules)
+        self._lazy_attributes = {name: mod for mod, names in attributes.items() for name in names}
+        self._lazy_fallback = tuple(fallback)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in self._lazy_attributes:
+            module = importlib.import_module(self._lazy_attributes[name], self.__name__)
+            value = getattr(module, name)
+        elif name in self._lazy_submodules:
+            value = importlib.import_module('.' + name, self.__name__)
+        else:
+            for module in self._lazy_fallback:
+                module = importlib.import_module(module, self.__name__)
+                if hasattr(module, name):
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError(
+                    "module '{}' has no attribute '{}'".format(self.__name__, name))
+        setattr(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        # importing a sub-module sets it as attribute of the package, which must not
+        # shadow a lazy attribute of the same name, e.g. `utils.download`
+        if isinstance(value, types.ModuleType) and name in self.__dict__.get(
+                '_lazy_attributes', ()) and value.__name__ == self.__name__ + '.' + name:
+            return
+        super(_LazyModule, self).__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | self._lazy_submodules | set(self._lazy_attributes))
+
+
+def lazy_module(name, submodules=(), attributes=None, fallback=()):
+    """Replace the module `name` in ``sys.modules`` by a lazily loading one.
+
+    This is called at the end of a package ``__init__``.
+
+    Parameters
+    ----------
+    name : str
+        Full name of the module, usually ``__name__``.
+    submodules : iterable of str
+        Names of sub-modules to be imported on access, e.g. ``['data', 'utils']``.
+    attributes : dict of str to list of str, default is None
+        Relative module names mapped to the attributes they provide,
+        e.g. ``{'.bbox': ['bbox_iou']}``.
+    fallback : iterable of str
+        Relative module names searched in order for any other attribute. They are
+        imported one by one until the attribute is found.
+
+    Returns
+    -------
+    module
+        The lazy module.
+
+    """
+    lazy = _LazyModule(sys.modules[name], submodules, attributes or {}, fallback)
+    sys.modules[name] = lazy
+    return lazy
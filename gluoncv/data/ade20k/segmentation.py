@@ -3,7 +3,7 @@ import os
 from PIL import Image
 import numpy as np
 import mxnet as mx
-from ..segbase import SegmentationDataset
+from ..segbase import SegmentationDataset, _cached_file_list
 
 class ADE20KSegmentation(SegmentationDataset):
     """ADE20K Semantic Segmentation Dataset.
@@ -75,14 +75,21 @@ class ADE20KSegmentation(SegmentationDataset):
 
 
 def _get_ade20k_pairs(folder, mode='train'):
-    img_paths = []
-    mask_paths = []
     if mode == 'train':
         img_folder = os.path.join(folder, 'images/training')
         mask_folder = os.path.join(folder, 'annotations/training')
     else:
         img_folder = os.path.join(folder, 'images/validation')
         mask_folder = os.path.join(folder, 'annotations/validation')
+    manifest = os.path.join(folder, '.{}_pairs.json'.format(
+        'train' if mode == 'train' else 'val'))
+    return _cached_file_list(manifest, [img_folder, mask_folder],
+                             lambda: _scan_ade20k_pairs(img_folder, mask_folder))
+
+
+def _scan_ade20k_pairs(img_folder, mask_folder):
+    img_paths = []
+    mask_paths = []
     for filename in os.listdir(img_folder):
         basename, _ = os.path.splitext(filename)
         if filename.endswith(".jpg"):
@@ -1,5 +1,6 @@
 """Base dataset methods."""
 import os
+import numpy as np
 from mxnet.gluon.data import dataset
 
 class ClassProperty(object):
@@ -11,6 +12,54 @@ class ClassProperty(object):
         return self.fget(owner_cls)
 
 
+class PackedLabels(object):
+    """Compact, immutable storage of variable length per-image labels.
+
+    Holding labels as python lists of lists costs dozens of python objects per
+    box, which are expensive to pickle for worker processes and are gradually
+    copied into every forked worker because reference counting writes to them.
+    All labels are concatenated into one read-only numpy array with an offset
+    table instead, which forked workers share and which pickles as two buffers.
+
+    Parameters
+    ----------
+    labels : list of array-like
+        Per-image labels, each of shape (M, K) with M >= 0 and identical K.
+    dtype : str or numpy.dtype, optional
+        Data type of the packed labels, inferred from the labels if not specified.
+
+    """
+    def __init__(self, labels, dtype=None):
+        labels = [np.asarray(l, dtype=dtype) for l in labels]
+        width = max([l.shape[-1] for l in labels if l.size] + [0])
+        if dtype is None:
+            dtype = np.result_type(*labels) if labels else np.float32
+        lengths = np.array([l.shape[0] if l.size else 0 for l in labels], dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self._data = np.empty((int(self._offsets[-1]), width), dtype=dtype)
+        for i, l in enumerate(labels):
+            if l.size:
+                self._data[self._offsets[i]:self._offsets[i + 1]] = l
+        self._data.flags.writeable = False
+        self._offsets.flags.writeable = False
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        """Return a writable copy of the label of image `idx`."""
+        if not -len(self) <= idx < len(self):
+            raise IndexError("Label index {} out of range for {} images".format(
+                idx, len(self)))
+        idx %= len(self)
+        return self._data[self._offsets[idx]:self._offsets[idx + 1]].copy()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._data.flags.writeable = False
+        self._offsets.flags.writeable = False
+
+
 class VisionDataset(dataset.Dataset):
     """Base Dataset with directory checker.
 
@@ -3,6 +3,7 @@ They can be used in Gluon data loader to help combine individual samples
 into batches for fast processing."""
 import numpy as np
 import mxnet as mx
+from .profiler import profiled
 
 __all__ = ['Stack', 'Pad', 'Append', 'Tuple']
 
@@ -12,7 +13,7 @@ def _pad_arrs_to_max_length(arrs, pad_axis, pad_val, use_shared_mem=False):
     Parameters
     ----------
     arrs : list
-    pad_axis : int
+    pad_axis : int or tuple of int
     pad_val : number
     use_shared_mem : bool, default False
     Returns
@@ -22,10 +23,13 @@ def _pad_arrs_to_max_length(arrs, pad_axis, pad_val, use_shared_mem=False):
     """
     if not isinstance(arrs[0], (mx.nd.NDArray, np.ndarray)):
         arrs = [np.asarray(ele) for ele in arrs]
-    original_length = [ele.shape[pad_axis] for ele in arrs]
-    max_size = max(original_length)
+    pad_axes = (pad_axis,) if isinstance(pad_axis, int) else tuple(pad_axis)
+    original_length = [[ele.shape[axis] for axis in pad_axes] for ele in arrs]
     ret_shape = list(arrs[0].shape)
-    ret_shape[pad_axis] = max_size
+    for i, axis in enumerate(pad_axes):
+        ret_shape[axis] = max([length[i] for length in original_length])
+    if isinstance(pad_axis, int):
+        original_length = [length[0] for length in original_length]
     ret_shape = (len(arrs), ) + tuple(ret_shape)
     if use_shared_mem:
         ret = mx.nd.full(shape=ret_shape, val=pad_val, ctx=mx.Context('cpu_shared', 0),
@@ -36,11 +40,12 @@ def _pad_arrs_to_max_length(arrs, pad_axis, pad_val, use_shared_mem=False):
         ret = mx.nd.full(shape=ret_shape, val=pad_val, dtype=arrs[0].dtype)
         original_length = mx.nd.array(original_length, dtype=np.int32)
     for i, arr in enumerate(arrs):
-        if arr.shape[pad_axis] == max_size:
+        if arr.shape == ret_shape[1:]:
             ret[i] = arr
         else:
             slices = [slice(None) for _ in range(arr.ndim)]
-            slices[pad_axis] = slice(0, arr.shape[pad_axis])
+            for axis in pad_axes:
+                slices[axis] = slice(0, arr.shape[axis])
             slices = [slice(i, i + 1)] + slices
             ret[tuple(slices)] = arr
     return ret, original_length
@@ -116,6 +121,7 @@ class Stack(object):
       [1. 2. 3. 4.]]]
     <NDArray 2x2x4 @cpu(0)>
     """
+    @profiled('batchify.Stack')
     def __call__(self, data):
         """Batchify the input data
         Parameters
@@ -141,15 +147,18 @@ class Pad(object):
     at the `pad_axis` if ret_length is turned on.
     Parameters
     ----------
-    axis : int, default 0
+    axis : int or tuple of int, default 0
         The axis to pad the arrays. The arrays will be padded to the largest dimension at
         pad_axis. For example, assume the input arrays have shape
         (10, 8, 5), (6, 8, 5), (3, 8, 5) and the pad_axis is 0. Each input will be padded into
         (10, 8, 5) and then stacked to form the final output.
+        If multiple axes are given, the arrays are padded along each of them, e.g.
+        (1, 2) pads images of shape (3, H, W) to the largest height and width.
     pad_val : float or int, default 0
         The padding value.
     ret_length : bool, default False
         Whether to return the valid length in the output.
+        The shape of lengths is (N, len(axis)) if multiple axes are padded.
     Examples
     --------
     >>> from gluoncv.data import batchify
@@ -197,12 +206,14 @@ class Pad(object):
     """
     def __init__(self, axis=0, pad_val=0, ret_length=False):
         self._axis = axis
-        assert isinstance(axis, int), 'axis must be an integer! ' \
-                                      'Received axis=%s, type=%s.' % (str(axis),
-                                                                      str(type(axis)))
+        assert isinstance(axis, int) or (
+            isinstance(axis, (list, tuple)) and all(isinstance(x, int) for x in axis)), \
+            'axis must be an integer or a tuple of integers! ' \
+            'Received axis=%s, type=%s.' % (str(axis), str(type(axis)))
         self._pad_val = pad_val
         self._ret_length = ret_length
 
+    @profiled('batchify.Pad')
     def __call__(self, data):
         """Batchify the input data.
         Parameters
@@ -253,6 +264,7 @@ class Append(object):
         self._expand = expand
         self._batch_axis = batch_axis
 
+    @profiled('batchify.Append')
     def __call__(self, data):
         """Batchify the input data.
 
@@ -331,6 +343,7 @@ class Tuple(object):
             assert hasattr(ele_fn, '__call__'), 'Batchify functions must be callable! ' \
                                                 'type(fn[%d]) = %s' % (i, str(type(ele_fn)))
 
+    @profiled('batchify.Tuple')
     def __call__(self, data):
         """Batchify the input data.
 
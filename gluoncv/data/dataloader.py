@@ -1,8 +1,15 @@
 """DataLoader utils."""
+import sys
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 import numpy as np
 from mxnet import nd
 from mxnet import context
 from mxnet.gluon.data import DataLoader
+from mxnet.gluon.utils import split_and_load
 
 def default_pad_batchify_fn(data):
     """Collate data into batch, labels are padded to same shape"""
@@ -116,3 +123,112 @@ class DetectionDataLoader(DataLoader):
         super(DetectionDataLoader, self).__init__(
             dataset, batch_size, shuffle, sampler, last_batch,
             batch_sampler, batchify_fn, num_workers)
+
+
+def default_split_fn(batch, ctx_list, batch_axis=0, even_split=True):
+    """Split and load each field of a batch to a list of contexts.
+
+    Fields of type `NDArray` are sliced along `batch_axis` by
+    :py:func:`mxnet.gluon.utils.split_and_load`. Fields that are already
+    lists of per-device samples, e.g. produced by :py:class:`gluoncv.data.batchify.Append`,
+    are copied element-wise to the matching context.
+
+    Returns
+    -------
+    list of list of NDArray
+        For each field in batch, a list of NDArrays, one per context.
+
+    """
+    if isinstance(batch, nd.NDArray):
+        batch = [batch]
+    new_batch = []
+    for data in batch:
+        if isinstance(data, nd.NDArray):
+            new_batch.append(split_and_load(data, ctx_list, batch_axis, even_split))
+        else:
+            new_batch.append([x.as_in_context(ctx) for x, ctx in zip(data, ctx_list)])
+    return new_batch
+
+
+class DevicePrefetchLoader(object):
+    """Loader which splits batches and copies them to devices ahead of time.
+
+    A background thread pulls the next `prefetch` batches from `loader`, splits
+    and copies them to the target contexts and waits for the copies to finish,
+    so that input latency of an iteration is hidden behind the computation of
+    the previous one. Batches are kept in a bounded queue, which limits the
+    memory used by prefetched data to `prefetch` batches per device.
+
+    Parameters
+    ----------
+    loader : iterable
+        The source of batches, typically a :py:class:`mxnet.gluon.data.DataLoader`.
+        Using `num_workers` > 0 in the loader keeps batches in shared memory,
+        which is used as staging buffer for the device copies.
+    ctx_list : list of mxnet.Context
+        Contexts to load data to.
+    prefetch : int, default is 2
+        Maximum number of batches loaded ahead of the consumer.
+    split_fn : callable, default is None
+        Function `split_fn(batch, ctx_list)` distributing a batch to devices.
+        Defaults to :py:func:`gluoncv.data.dataloader.default_split_fn`.
+
+    Example::
+        >>> train_data = DevicePrefetchLoader(gluon.data.DataLoader(...), ctx)
+        >>> for data, label in train_data:
+        >>>     # data and label are lists of NDArrays, one per context
+        >>>     outputs = [net(x) for x in data]
+
+    """
+    def __init__(self, loader, ctx_list, prefetch=2, split_fn=None):
+        if isinstance(ctx_list, context.Context):
+            ctx_list = [ctx_list]
+        assert prefetch > 0, "prefetch must be positive, given {}".format(prefetch)
+        self._loader = loader
+        self._ctx_list = ctx_list
+        self._prefetch = prefetch
+        self._split_fn = split_fn if split_fn is not None else default_split_fn
+
+    def __len__(self):
+        return len(self._loader)
+
+    def _worker(self, buf, stop):
+        def _put(item):
+            while not stop.is_set():
+                try:
+                    buf.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for batch in self._loader:
+                batch = self._split_fn(batch, self._ctx_list)
+                for field in batch:
+                    for x in field:
+                        x.wait_to_read()
+                if not _put((batch, None)):
+                    return
+        except Exception:  # pylint: disable=broad-except
+            _put((None, sys.exc_info()[1]))
+            return
+        _put((None, None))
+
+    def __iter__(self):
+        buf = queue.Queue(maxsize=self._prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._worker, args=(buf, stop))
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                batch, error = buf.get()
+                if error is not None:
+                    raise error
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
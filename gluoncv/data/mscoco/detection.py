@@ -5,7 +5,8 @@ import os
 import numpy as np
 import mxnet as mx
 from .utils import try_import_pycocotools
-from ..base import VisionDataset
+from ..base import VisionDataset, PackedLabels
+from .. import profiler
 from ...utils.bbox import bbox_xywh_to_xyxy, bbox_clip_xyxy
 
 __all__ = ['COCODetection']
@@ -34,6 +35,13 @@ class COCODetection(VisionDataset):
         Whether skip images with no valid object. This should be `True` in training, otherwise
         it will cause undefined behavior.
 
+    Notes
+    -----
+    Image paths and labels are packed into compact read-only numpy arrays,
+    which are cheap to pickle and stay shared with forked DataLoader workers.
+    The pycocotools objects are only needed for evaluation, they are not pickled
+    and are lazily reloaded from the annotation files on first access of :py:attr:`coco`.
+
     """
     CLASSES = ['person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train',
                'truck', 'boat', 'traffic light', 'fire hydrant', 'stop sign',
@@ -65,15 +73,25 @@ class COCODetection(VisionDataset):
         self.json_id_to_contiguous = None
         self.contiguous_id_to_json = None
         self._coco = []
-        self._items, self._labels = self._load_jsons()
+        items, labels = self._load_jsons()
+        self._items = np.array(items)
+        self._labels = PackedLabels(labels)
 
     def __str__(self):
         detail = ','.join([str(s) for s in self._splits])
         return self.__class__.__name__ + '(' + detail + ')'
 
+    def __getstate__(self):
+        # heavy pycocotools objects are excluded and lazily reloaded in `coco`
+        state = self.__dict__.copy()
+        state['_coco'] = []
+        return state
+
     @property
     def coco(self):
         """Return pycocotools object for evaluation purposes."""
+        if not self._coco:
+            self._coco = self._load_coco_apis()
         if not self._coco:
             raise ValueError("No coco objects found, dataset not initialized.")
         elif len(self._coco) > 1:
@@ -90,24 +108,31 @@ class COCODetection(VisionDataset):
         return len(self._items)
 
     def __getitem__(self, idx):
-        img_path = self._items[idx]
-        label = self._labels[idx]
-        img = mx.image.imread(img_path, 1)
+        img_path = str(self._items[idx])
+        with profiler.stage('label'):
+            label = self._labels[idx]
+        with profiler.stage('decode') as stage:
+            img = stage.output(mx.image.imread(img_path, 1))
         if self._transform is not None:
-            return self._transform(img, label)
-        return img, np.array(label)
+            # exclusive of the stages of preset transforms, e.g. target generation
+            with profiler.stage('transform') as stage:
+                return stage.output(self._transform(img, label))
+        return img, label
+
+    def _load_coco_apis(self):
+        """Load pycocotools objects of all splits."""
+        # lazy import pycocotools
+        try_import_pycocotools()
+        from pycocotools.coco import COCO
+        return [COCO(os.path.join(self._root, 'annotations', split) + '.json')
+                for split in self._splits]
 
     def _load_jsons(self):
         """Load all image paths and labels from JSON annotation files into buffer."""
         items = []
         labels = []
-        # lazy import pycocotools
-        try_import_pycocotools()
-        from pycocotools.coco import COCO
-        for split in self._splits:
-            anno = os.path.join(self._root, 'annotations', split) + '.json'
-            _coco = COCO(anno)
-            self._coco.append(_coco)
+        self._coco = self._load_coco_apis()
+        for _coco in self._coco:
             classes = [c['name'] for c in _coco.loadCats(_coco.getCatIds())]
             if not classes == self.classes:
                 raise ValueError("Incompatible category names with COCO: ")
@@ -2,7 +2,7 @@
 import os
 import scipy.io
 from PIL import Image
-from ..segbase import SegmentationDataset
+from ..segbase import SegmentationDataset, _cached_file_list
 
 class VOCAugSegmentation(SegmentationDataset):
     """Pascal VOC Augmented Semantic Segmentation Dataset.
@@ -47,16 +47,22 @@ class VOCAugSegmentation(SegmentationDataset):
         else:
             raise RuntimeError('Unknown dataset split: {}'.format(split))
 
-        self.images = []
-        self.masks = []
-        with open(os.path.join(_split_f), "r") as lines:
-            for line in lines:
-                _image = os.path.join(_image_dir, line.rstrip('\n')+".jpg")
-                assert os.path.isfile(_image)
-                self.images.append(_image)
-                _mask = os.path.join(_mask_dir, line.rstrip('\n')+".mat")
-                assert os.path.isfile(_mask)
-                self.masks.append(_mask)
+        def _scan():
+            images = []
+            masks = []
+            with open(os.path.join(_split_f), "r") as lines:
+                for line in lines:
+                    _image = os.path.join(_image_dir, line.rstrip('\n')+".jpg")
+                    assert os.path.isfile(_image)
+                    images.append(_image)
+                    _mask = os.path.join(_mask_dir, line.rstrip('\n')+".mat")
+                    assert os.path.isfile(_mask)
+                    masks.append(_mask)
+            return images, masks
+
+        _manifest = os.path.join(_voc_root, '.{}_pairs.json'.format(split))
+        self.images, self.masks = _cached_file_list(
+            _manifest, [_split_f, _image_dir, _mask_dir], _scan)
 
         assert (len(self.images) == len(self.masks))
 
@@ -10,6 +10,7 @@ except ImportError:
     import xml.etree.ElementTree as ET
 import mxnet as mx
 from ..base import VisionDataset
+from .. import profiler
 
 
 class VOCDetection(VisionDataset):
@@ -73,10 +74,14 @@ class VOCDetection(VisionDataset):
     def __getitem__(self, idx):
         img_id = self._items[idx]
         img_path = self._image_path.format(*img_id)
-        label = self._label_cache[idx] if self._label_cache else self._load_label(idx)
-        img = mx.image.imread(img_path, 1)
+        with profiler.stage('label'):
+            label = self._label_cache[idx] if self._label_cache else self._load_label(idx)
+        with profiler.stage('decode') as stage:
+            img = stage.output(mx.image.imread(img_path, 1))
         if self._transform is not None:
-            return self._transform(img, label)
+            # exclusive of the stages of preset transforms, e.g. target generation
+            with profiler.stage('transform') as stage:
+                return stage.output(self._transform(img, label))
         return img, label
 
     def _load_items(self, splits):
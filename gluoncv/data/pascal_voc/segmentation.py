@@ -4,7 +4,7 @@ import numpy as np
 from PIL import Image
 from mxnet import cpu
 import mxnet.ndarray as F
-from ..segbase import SegmentationDataset
+from ..segbase import SegmentationDataset, _cached_file_list
 
 class VOCSegmentation(SegmentationDataset):
     """Pascal VOC Semantic Segmentation Dataset.
@@ -52,17 +52,23 @@ class VOCSegmentation(SegmentationDataset):
         else:
             raise RuntimeError('Unknown dataset split.')
 
-        self.images = []
-        self.masks = []
-        with open(os.path.join(_split_f), "r") as lines:
-            for line in lines:
-                _image = os.path.join(_image_dir, line.rstrip('\n')+".jpg")
-                assert os.path.isfile(_image)
-                self.images.append(_image)
-                if split != 'test':
-                    _mask = os.path.join(_mask_dir, line.rstrip('\n')+".png")
-                    assert os.path.isfile(_mask)
-                    self.masks.append(_mask)
+        def _scan():
+            images = []
+            masks = []
+            with open(os.path.join(_split_f), "r") as lines:
+                for line in lines:
+                    _image = os.path.join(_image_dir, line.rstrip('\n')+".jpg")
+                    assert os.path.isfile(_image)
+                    images.append(_image)
+                    if split != 'test':
+                        _mask = os.path.join(_mask_dir, line.rstrip('\n')+".png")
+                        assert os.path.isfile(_mask)
+                        masks.append(_mask)
+            return images, masks
+
+        _manifest = os.path.join(_voc_root, '.seg_{}_pairs.json'.format(split))
+        self.images, self.masks = _cached_file_list(
+            _manifest, [_split_f, _image_dir, _mask_dir], _scan)
 
         if split != 'test':
             assert (len(self.images) == len(self.masks))
@@ -0,0 +1,276 @@
+"""Opt-in per-stage timing of data loading pipelines.
+
+Datasets, preset transforms and batchify functions report the time spent in
+each stage (decode, augmentation, target generation, collation...) with
+:py:class:`stage`. Stages may nest, each one records its exclusive time, which
+excludes the time of the stages nested in it, so that stages add up to the
+time of the pipeline. Recording is disabled by default and costs a single flag
+check per stage. Once enabled, each process records its own timings, and
+:py:func:`collect` gathers them from DataLoader worker processes through a
+shared directory.
+
+Example::
+    >>> from gluoncv.data import profiler
+    >>> profiler.enable('/tmp/data_profile')
+    >>> for batch in train_loader:
+    >>>     pass
+    >>> print(profiler.report(profiler.collect()))
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+import os
+import json
+import time
+import functools
+import threading
+import numpy as np
+import mxnet as mx
+
+__all__ = ['enable', 'disable', 'is_enabled', 'stage', 'profiled', 'record',
+           'reset', 'collect', 'summary', 'report']
+
+# worker processes inherit the output directory through environment
+_ENV_KEY = 'GLUONCV_DATA_PROFILE_DIR'
+
+# open stages of each thread, innermost last
+_LOCAL = threading.local()
+
+
+class _State(object):
+    """Profiler state of the current process."""
+    def __init__(self):
+        self.out_dir = os.environ.get(_ENV_KEY, None)
+        self.enabled = bool(self.out_dir)
+        self.pid = os.getpid()
+        self.records = {}
+        self.file = None
+
+_STATE = _State()
+
+
+def _check_pid():
+    # forked workers inherit the parent records, which must not be counted twice
+    if _STATE.pid != os.getpid():
+        _STATE.pid = os.getpid()
+        _STATE.records = {}
+        _STATE.file = None
+
+
+def enable(out_dir=None):
+    """Enable stage recording.
+
+    Parameters
+    ----------
+    out_dir : str, optional
+        Directory where each process dumps its records. It is required to
+        gather timings from DataLoader workers, which must be created after
+        this call. Without it, only the current process is profiled.
+
+    """
+    _close()
+    _STATE.enabled = True
+    if out_dir is not None:
+        out_dir = os.path.abspath(os.path.expanduser(out_dir))
+        if not os.path.isdir(out_dir):
+            os.makedirs(out_dir)
+        os.environ[_ENV_KEY] = out_dir
+    _STATE.out_dir = out_dir
+
+
+def disable():
+    """Disable stage recording, records are kept until :py:func:`reset`."""
+    _close()
+    _STATE.enabled = False
+    _STATE.out_dir = None
+    os.environ.pop(_ENV_KEY, None)
+
+
+def is_enabled():
+    """Whether stage recording is enabled."""
+    return _STATE.enabled
+
+
+def _close():
+    if _STATE.file is not None and _STATE.pid == os.getpid():
+        _STATE.file.close()
+    _STATE.file = None
+
+
+def record(name, seconds):
+    """Add one timing of `seconds` to stage `name`.
+
+    With a shared directory, records are written through immediately since
+    DataLoader workers are terminated without any cleanup.
+    """
+    _check_pid()
+    _STATE.records.setdefault(name, []).append(seconds)
+    if _STATE.out_dir is None:
+        return
+    if _STATE.file is None:
+        _STATE.file = open(os.path.join(_STATE.out_dir, '{}.jsonl'.format(os.getpid())), 'a')
+    _STATE.file.write(json.dumps([name, seconds]) + '\n')
+    _STATE.file.flush()
+
+
+def reset():
+    """Clear records of this process and of the shared directory."""
+    _check_pid()
+    _close()
+    _STATE.records = {}
+    if _STATE.out_dir is not None and os.path.isdir(_STATE.out_dir):
+        for fname in os.listdir(_STATE.out_dir):
+            if fname.endswith('.jsonl'):
+                os.remove(os.path.join(_STATE.out_dir, fname))
+
+
+def collect():
+    """Gather records of all processes.
+
+    Returns
+    -------
+    dict of str to list of float
+        Recorded durations in seconds for each stage.
+
+    """
+    if _STATE.out_dir is None:
+        _check_pid()
+        return {k: list(v) for k, v in _STATE.records.items()}
+    records = {}
+    for fname in sorted(os.listdir(_STATE.out_dir)):
+        if not fname.endswith('.jsonl'):
+            continue
+        with open(os.path.join(_STATE.out_dir, fname)) as f:
+            for line in f:
+                try:
+                    name, seconds = json.loads(line)
+                except ValueError:
+                    # partially written line of a killed worker
+                    continue
+                records.setdefault(name, []).append(seconds)
+    return records
+
+
+def _wait(value):
+    """Wait for NDArrays in `value`, which may be nested in lists and tuples."""
+    if isinstance(value, mx.nd.NDArray):
+        value.wait_to_read()
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _wait(v)
+
+
+class stage(object):
+    """Context manager recording the exclusive duration of a pipeline stage.
+
+    The time of stages nested in this one is not counted. Since MXNet executes
+    operators asynchronously, outputs registered with :py:meth:`output` are
+    waited for before the stage is closed when recording is enabled.
+
+    Parameters
+    ----------
+    name : str
+        Stage name, e.g. 'decode' or 'batchify.Stack'.
+
+    """
+    # pylint: disable=invalid-name
+    __slots__ = ['_name', '_tic', '_nested', '_outputs']
+
+    def __init__(self, name):
+        self._name = name
+        self._tic = None
+        self._nested = 0.
+        self._outputs = []
+
+    def __enter__(self):
+        if _STATE.enabled:
+            if not hasattr(_LOCAL, 'stages'):
+                _LOCAL.stages = []
+            _LOCAL.stages.append(self)
+            self._tic = time.time()
+        return self
+
+    def output(self, value):
+        """Register `value`, NDArrays possibly nested in lists and tuples, to be
+        waited for when the stage is closed. Returns `value`."""
+        if self._tic is not None:
+            self._outputs.append(value)
+        return value
+
+    def __exit__(self, *args):
+        if self._tic is None:
+            return
+        _wait(self._outputs)
+        self._outputs = []
+        elapsed = time.time() - self._tic
+        stages = _LOCAL.stages
+        stages.pop()
+        if stages:
+            stages[-1]._nested += elapsed
+        record(self._name, elapsed - self._nested)
+
+
+def profiled(name):
+    """Decorator recording each call of the decorated function as stage `name`,
+    including the computation of its returned NDArrays."""
+    def _decorator(func):
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            if not _STATE.enabled:
+                return func(*args, **kwargs)
+            with stage(name) as s:
+                return s.output(func(*args, **kwargs))
+        return _wrapper
+    return _decorator
+
+
+def summary(records, elapsed=None):
+    """Compute latency statistics of each stage.
+
+    Parameters
+    ----------
+    records : dict of str to list of float
+        Recorded durations, as returned by :py:func:`collect`.
+    elapsed : float, optional
+        Wall clock time of the profiled run in seconds, used for
+        the aggregated throughput of all workers.
+
+    Returns
+    -------
+    list of dict
+        Per stage `name`, `count`, `total`, `mean`, `p50`, `p99` (in seconds),
+        and `throughput`, calls per second of a single process, sorted by total time.
+        If `elapsed` is given, `wall_throughput` gives calls per second of the run.
+
+    """
+    stats = []
+    for name, values in records.items():
+        values = np.asarray(values, dtype='float64')
+        if not values.size:
+            continue
+        stat = {
+            'name': name,
+            'count': int(values.size),
+            'total': float(values.sum()),
+            'mean': float(values.mean()),
+            'p50': float(np.percentile(values, 50)),
+            'p99': float(np.percentile(values, 99)),
+        }
+        stat['throughput'] = 1. / stat['mean'] if stat['mean'] > 0 else float('inf')
+        if elapsed:
+            stat['wall_throughput'] = stat['count'] / elapsed
+        stats.append(stat)
+    return sorted(stats, key=lambda x: -x['total'])
+
+
+def report(records, elapsed=None):
+    """Format statistics of :py:func:`summary` as a text table."""
+    stats = summary(records, elapsed)
+    header = '{:<28s}{:>9s}{:>11s}{:>11s}{:>11s}{:>12s}'.format(
+        'stage', 'count', 'p50(ms)', 'p99(ms)', 'total(s)', 'calls/s')
+    lines = [header, '-' * len(header)]
+    for stat in stats:
+        lines.append('{:<28s}{:>9d}{:>11.3f}{:>11.3f}{:>11.3f}{:>12.1f}'.format(
+            stat['name'], stat['count'], stat['p50'] * 1e3, stat['p99'] * 1e3,
+            stat['total'], stat.get('wall_throughput', stat['throughput'])))
+    return '\n'.join(lines)
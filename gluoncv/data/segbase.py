@@ -1,4 +1,7 @@
 """Base segmentation dataset"""
+import os
+import json
+import hashlib
 import random
 import numpy as np
 import mxnet as mx
@@ -30,6 +33,57 @@ def ms_batchify_fn(data):
     raise RuntimeError('unknown datatype')
 
 
+def _manifest_key(paths):
+    """Validation hash of a list of files/dirs, based on their path and mtime."""
+    sha1 = hashlib.sha1()
+    for path in paths:
+        mtime = os.path.getmtime(path) if os.path.exists(path) else -1
+        sha1.update('{}:{}\n'.format(os.path.abspath(path), mtime).encode('utf-8'))
+    return sha1.hexdigest()
+
+
+def _cached_file_list(manifest, watch, scan_fn):
+    """Load image/mask file lists from a manifest, or scan and write it.
+
+    Listing and stat-ing every file of a large dataset is slow on network
+    file systems, and is repeated by every process that creates the dataset.
+    The result of `scan_fn` is stored in a json manifest together with a hash
+    of the mtime of every path in `watch`, and is reused until one of them changes.
+
+    Parameters
+    ----------
+    manifest : str
+        Path of the manifest file. It is silently not written if the location is read-only.
+    watch : list of str
+        Directories and files whose modification invalidates the manifest.
+    scan_fn : callable
+        Function returning a tuple of file lists when the manifest is missing or stale.
+
+    Returns
+    -------
+    tuple of list of str
+        The file lists returned by `scan_fn`.
+    """
+    key = _manifest_key(watch)
+    try:
+        with open(manifest, 'r') as f:
+            cached = json.load(f)
+        if cached.get('hash') == key:
+            return tuple(cached['lists'])
+    except (IOError, OSError, ValueError, KeyError):
+        pass
+    lists = tuple(scan_fn())
+    tmp = '{}.{}.tmp'.format(manifest, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump({'hash': key, 'lists': lists}, f)
+        os.rename(tmp, manifest)
+    except (IOError, OSError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return lists
+
+
 class SegmentationDataset(VisionDataset):
     """Segmentation Base Dataset"""
     # pylint: disable=abstract-method
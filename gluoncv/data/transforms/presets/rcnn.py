@@ -5,6 +5,7 @@ import numpy as np
 import mxnet as mx
 from .. import bbox as tbbox
 from .. import image as timage
+from ... import profiler
 
 __all__ = ['load_test', 'FasterRCNNDefaultTrainTransform', 'FasterRCNNDefaultValTransform']
 
@@ -72,6 +73,9 @@ class FasterRCNNDefaultTrainTransform(object):
             If net is ``None``, the transformation will not generate training targets.
             Otherwise it will generate training targets to accelerate the training phase
             since we push some workload to CPU workers instead of GPUs.
+            RPN targets have shape (H, W, A) and (H, W, A, 4), where (H, W) is the
+            feature map size and A the number of anchors per position. Use
+            ``batchify.Pad(axis=(0, 1))`` to batch them with padded images.
 
     mean : array-like of size 3
         Mean pixel values to be subtracted from image tensor. Default is [0.485, 0.456, 0.406].
@@ -100,6 +104,7 @@ class FasterRCNNDefaultTrainTransform(object):
         self._max_size = max_size
         self._mean = mean
         self._std = std
+        self._anchors = None
         if net is None:
             return
 
@@ -121,6 +126,7 @@ class FasterRCNNDefaultTrainTransform(object):
             neg_iou_thresh=neg_iou_thresh, pos_ratio=pos_ratio,
             stds=box_norm, **kwargs)
 
+    @profiler.profiled('rcnn.train_transform')
     def __call__(self, src, label):
         """Apply transform to training image/label."""
         # resize shorter side but keep in max_size
@@ -142,12 +148,20 @@ class FasterRCNNDefaultTrainTransform(object):
 
         # generate RPN target so cpu workers can help reduce the workload
         # feat_h, feat_w = (img.shape[1] // self._stride, img.shape[2] // self._stride)
-        oshape = self._feat_sym.infer_shape(data=(1, 3, img.shape[1], img.shape[2]))[1][0]
-        anchor = self._anchors[:, :, :oshape[2], :oshape[3], :].reshape((-1, 4))
-        gt_bboxes = mx.nd.array(bbox[np.newaxis, :, :4])
-        cls_target, box_target, box_mask = self._target_generator(
-            gt_bboxes, anchor, img.shape[2], img.shape[1])
-        return img, bbox.astype(img.dtype), cls_target[0], box_target[0], box_mask[0]
+        with profiler.stage('rcnn.target') as stage:
+            oshape = self._feat_sym.infer_shape(data=(1, 3, img.shape[1], img.shape[2]))[1][0]
+            anchor = self._anchors[:, :, :oshape[2], :oshape[3], :].reshape((-1, 4))
+            gt_bboxes = mx.nd.array(bbox[np.newaxis, :, :4])
+            cls_target, box_target, box_mask = self._target_generator(
+                gt_bboxes, anchor, img.shape[2], img.shape[1])
+            # targets are laid out on the feature map, so that they can be padded
+            # together with images of different sizes in a batch
+            grid = (oshape[2], oshape[3], -1)
+            cls_target = cls_target[0].reshape(grid)
+            box_target = box_target[0].reshape(grid + (4,))
+            box_mask = box_mask[0].reshape(grid + (4,))
+            stage.output((cls_target, box_target, box_mask))
+        return img, bbox.astype(img.dtype), cls_target, box_target, box_mask
 
 
 class FasterRCNNDefaultValTransform(object):
@@ -172,6 +186,7 @@ class FasterRCNNDefaultValTransform(object):
         self._short = short
         self._max_size = max_size
 
+    @profiler.profiled('rcnn.val_transform')
     def __call__(self, src, label):
         """Apply transform to validation image/label."""
         # resize shorter side but keep in max_size
@@ -5,6 +5,7 @@ import mxnet as mx
 from .. import bbox as tbbox
 from .. import image as timage
 from .. import experimental
+from ... import profiler
 
 __all__ = ['load_test', 'SSDDefaultTrainTransform', 'SSDDefaultValTransform']
 
@@ -102,6 +103,7 @@ class SSDDefaultTrainTransform(object):
         self._target_generator = SSDTargetGenerator(
             iou_thresh=iou_thresh, stds=box_norm, negative_mining_ratio=-1, **kwargs)
 
+    @profiler.profiled('ssd.train_transform')
     def __call__(self, src, label):
         """Apply transform to training image/label."""
         # random color jittering
@@ -139,10 +141,11 @@ class SSDDefaultTrainTransform(object):
             return img, bbox.astype(img.dtype)
 
         # generate training target so cpu workers can help reduce the workload on gpu
-        gt_bboxes = mx.nd.array(bbox[np.newaxis, :, :4])
-        gt_ids = mx.nd.array(bbox[np.newaxis, :, 4:5])
-        cls_targets, box_targets, _ = self._target_generator(
-            self._anchors, None, gt_bboxes, gt_ids)
+        with profiler.stage('ssd.target') as stage:
+            gt_bboxes = mx.nd.array(bbox[np.newaxis, :, :4])
+            gt_ids = mx.nd.array(bbox[np.newaxis, :, 4:5])
+            cls_targets, box_targets, _ = stage.output(self._target_generator(
+                self._anchors, None, gt_bboxes, gt_ids))
         return img, cls_targets[0], box_targets[0]
 
 
@@ -167,6 +170,7 @@ class SSDDefaultValTransform(object):
         self._mean = mean
         self._std = std
 
+    @profiler.profiled('ssd.val_transform')
     def __call__(self, src, label):
         """Apply transform to validation image/label."""
         # resize
@@ -70,6 +70,8 @@ class FocalLoss(gluon.loss.Loss):
 
     def hybrid_forward(self, F, pred, label, sample_weight=None):
         """Loss forward"""
+        # compute loss in float32 with mixed precision
+        pred = F.cast(pred, 'float32')
         if not self._from_logits:
             pred = F.sigmoid(pred)
         if self._sparse_label:
@@ -140,6 +142,8 @@ class SSDMultiBoxLoss(gluon.Block):
         box_losses = []
         sum_losses = []
         for cp, bp, ct, bt in zip(*[cls_pred, box_pred, cls_target, box_target]):
+            # compute loss in float32 with mixed precision
+            cp, bp = cp.astype('float32', copy=False), bp.astype('float32', copy=False)
             pred = nd.log_softmax(cp, axis=-1)
             pos = ct > 0
             cls_loss = -nd.pick(pred, ct, axis=-1, keepdims=False)
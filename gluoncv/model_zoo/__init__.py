@@ -1,13 +1,18 @@
 """Gluon Vision Model Zoo"""
-# pylint: disable=wildcard-import
-from .model_zoo import get_model
-from .model_store import pretrained_model_list
-from .faster_rcnn import *
-from .ssd import *
-from .cifarresnet import *
-from .cifarwideresnet import *
-from .fcn import *
-from .pspnet import *
-from . import segbase
-from .resnetv1b import *
-from .se_resnet import *
+from __future__ import absolute_import
+
+from .._lazy import lazy_module
+
+# architectures are imported on first access, `get_model` only imports the
+# module of the requested model
+lazy_module(__name__, submodules=[
+    'cifarresnet', 'cifarresnext', 'cifarwideresnet', 'export', 'faster_rcnn', 'fcn',
+    'model_store', 'model_zoo', 'pspnet', 'rcnn', 'resnetv1b', 'resnext', 'rpn',
+    'se_resnet', 'segbase', 'senet', 'ssd', 'syncbn', 'tiling', 'tta'], attributes={
+        '.model_zoo': ['get_model'],
+        '.model_store': ['pretrained_model_list'],
+        '.export': ['export_detector'],
+        '.tiling': ['detect_tiled'],
+        '.tta': ['DetectionTTA'],
+    }, fallback=['.faster_rcnn', '.ssd', '.cifarresnet', '.cifarwideresnet', '.fcn',
+                 '.pspnet', '.resnetv1b', '.se_resnet'])
@@ -0,0 +1,94 @@
+"""Export detection models for deployment."""
+from __future__ import absolute_import
+
+import json
+import mxnet as mx
+from mxnet import autograd
+from mxnet.gluon import HybridBlock
+from .ssd import SSD
+from .faster_rcnn import FasterRCNN
+
+__all__ = ['export_detector']
+
+
+def _anchor_feature_pairs(net, x):
+    """Return (feature, anchor generator) pairs of a detector for input `x`."""
+    if isinstance(net, SSD):
+        return list(zip(net.features(x), net.anchor_generators))
+    if isinstance(net, FasterRCNN):
+        return [(net.features(x), net.rpn.anchor_generator)]
+    raise TypeError("Unsupported detector: {}".format(type(net).__name__))
+
+
+def _hybridization(net):
+    """Return (block, active, flags) of `net` and all its hybrid child blocks."""
+    states, blocks = [], [net]
+    while blocks:
+        block = blocks.pop()
+        blocks.extend(block._children.values())
+        if isinstance(block, HybridBlock):
+            states.append((block, block._active, list(block._flags)))
+    return states
+
+
+def export_detector(net, input_shape, path, epoch=0, ctx=mx.cpu()):
+    """Export a SSD or Faster-RCNN detector to `path-symbol.json` and
+    `path-xxxx.params` for a fixed input shape.
+
+    The network is traced in inference mode, so training branches such as
+    target sampling are not part of the exported graph. Anchors are stored as
+    constant parameters and cropped to the input shape by native operators, so the
+    artifacts can be loaded by the C++ predictor or ``SymbolBlock`` without Python.
+    The network is hybridized for tracing, its previous hybridization is restored
+    afterwards.
+
+    Parameters
+    ----------
+    net : gluoncv.model_zoo.SSD or gluoncv.model_zoo.FasterRCNN
+        Initialized detection network.
+    input_shape : tuple of int
+        Input shape as (B, 3, H, W).
+    path : str
+        Path prefix of the exported files.
+    epoch : int, default is 0
+        Epoch number of the saved parameters.
+    ctx : mx.Context, default is mx.cpu()
+        Context used to trace the network.
+
+    Returns
+    -------
+    (str, str)
+        File names of the symbol and parameters.
+
+    """
+    if len(input_shape) != 4:
+        raise ValueError("input_shape must be (B, 3, H, W), given {}".format(input_shape))
+    x = mx.nd.zeros(input_shape, ctx=ctx)
+    with autograd.predict_mode():
+        # pre-generated anchors must cover the feature maps of this input shape
+        for feat, generator in _anchor_feature_pairs(net, x):
+            alloc_size = generator.anchors.shape[2:4]
+            if feat.shape[2] > alloc_size[0] or feat.shape[3] > alloc_size[1]:
+                raise ValueError(
+                    "Anchor map {} of {} is smaller than feature map {} given input shape "
+                    "{}, increase the alloc_size of anchors.".format(
+                        alloc_size, generator.name, feat.shape[2:], input_shape))
+    states = _hybridization(net)
+    try:
+        with autograd.predict_mode():
+            net.hybridize()
+            net(x)
+        net.export(path, epoch)
+    finally:
+        for block, active, flags in states:
+            block._active = active
+            block._flags = flags
+            block._clear_cached_op()
+    sym_file = '%s-symbol.json' % path
+    params_file = '%s-%04d.params' % (path, epoch)
+    with open(sym_file) as f:
+        ops = set(node['op'] for node in json.load(f)['nodes'])
+    if 'Custom' in ops:
+        raise RuntimeError("Exported graph of {} contains Python custom operators.".format(
+            type(net).__name__))
+    return sym_file, params_file
@@ -5,6 +5,7 @@ import os
 import mxnet as mx
 from mxnet import autograd
 from mxnet.gluon import nn
+from ...nn.bbox import BBoxClipToImage
 from .rcnn_target import RCNNTargetSampler, RCNNTargetGenerator
 from ..rcnn import RCNN
 from ..rpn import RPN
@@ -70,21 +71,24 @@ class FasterRCNN(RCNN):
     pos_ratio : float, default is 0.25
         ``pos_ratio`` defines how many positive samples (``pos_ratio * num_sample``) is
         to be sampled.
+    max_batch : int, default is 32
+        Maximum supported batch size.
 
     """
     def __init__(self, features, top_features, scales, ratios, classes, roi_mode, roi_size,
                  stride=16, rpn_channel=1024, num_sample=128, pos_iou_thresh=0.5,
-                 neg_iou_thresh_high=0.5, neg_iou_thresh_low=0.0, pos_ratio=0.25, **kwargs):
+                 neg_iou_thresh_high=0.5, neg_iou_thresh_low=0.0, pos_ratio=0.25,
+                 max_batch=32, **kwargs):
         super(FasterRCNN, self).__init__(
             features, top_features, classes, roi_mode, roi_size, **kwargs)
         self.stride = stride
-        self._max_batch = 1  # currently only support batch size = 1
-        self._max_roi = 100000  # maximum allowed ROIs
+        self._max_batch = max_batch
         self._target_generator = set([RCNNTargetGenerator(self.num_class)])
         with self.name_scope():
             self.rpn = RPN(rpn_channel, stride, scales=scales, ratios=ratios)
+            self._clipper = BBoxClipToImage()
             self.sampler = RCNNTargetSampler(num_sample, pos_iou_thresh, neg_iou_thresh_high,
-                                             neg_iou_thresh_low, pos_ratio)
+                                             neg_iou_thresh_low, pos_ratio, max_batch)
 
     @property
     def target_generator(self):
@@ -99,7 +103,7 @@ class FasterRCNN(RCNN):
         return list(self._target_generator)[0]
 
     # pylint: disable=arguments-differ
-    def hybrid_forward(self, F, x, gt_box=None):
+    def hybrid_forward(self, F, x, gt_box=None, im_size=None):
         """Forward Faster-RCNN network.
 
         The behavior during traing and inference is different.
@@ -107,37 +111,47 @@ class FasterRCNN(RCNN):
         Parameters
         ----------
         x : mxnet.nd.NDArray or mxnet.symbol
-            The network input tensor.
+            The network input tensor with shape (B, 3, H, W). Images of different
+            sizes are padded to the same size at the bottom and right.
         gt_box : type, only required during training
-            The ground-truth bbox tensor with shape (1, N, 4).
+            The ground-truth bbox tensor with shape (B, N, 4), padded with -1.
+            Use `None` in inference.
+        im_size : mxnet.nd.NDArray or mxnet.symbol, optional
+            Valid (height, width) of each image with shape (B, 2), e.g. the lengths
+            returned by `batchify.Pad(axis=(1, 2), ret_length=True)`. Proposals and
+            detections are then clipped to each image rather than the padded batch.
 
         Returns
         -------
         (ids, scores, bboxes)
             During inference, returns final class id, confidence scores, bounding
-            boxes.
+            boxes, with shape (B, K, 1), (B, K, 1) and (B, K, 4) respectively.
+            Results have a batch axis like SSD, unlike (K, 1), (K, 1) and (K, 4)
+            of previous releases which supported a single image.
 
         """
         feat = self.features(x)
         # RPN proposals
         if autograd.is_training():
             _, rpn_box, raw_rpn_score, raw_rpn_box, anchors = self.rpn(
-                feat, F.zeros_like(x))
+                feat, F.zeros_like(x), im_size)
             # sample 128 roi
             assert gt_box is not None
             rpn_box, samples, matches = self.sampler(rpn_box, gt_box)
         else:
-            _, rpn_box = self.rpn(feat, F.zeros_like(x))
+            _, rpn_box = self.rpn(feat, F.zeros_like(x), im_size)
 
         # create batchid for roi
         with autograd.pause():
-            roi_batchid = F.arange(
-                0, self._max_batch, repeat=self._max_roi).reshape(
-                    (-1, self._max_roi))
-            roi_batchid = F.slice_like(roi_batchid, rpn_box * 0, axes=(0, 1))
+            roi_like = F.zeros_like(rpn_box.slice_axis(axis=-1, begin=0, end=1))
+            roi_batchid = F.slice_like(
+                F.arange(0, self._max_batch).reshape((-1, 1, 1)), roi_like, axes=(0,))
+            roi_batchid = F.broadcast_add(roi_like, roi_batchid)
             rpn_roi = F.concat(*[roi_batchid.reshape((-1, 1)), rpn_box.reshape((-1, 4))], dim=-1)
 
         # ROI features
+        if self._dtype != 'float32':
+            rpn_roi = F.cast(rpn_roi, self._dtype)
         if self._roi_mode == 'pool':
             pooled_feat = F.ROIPooling(feat, rpn_roi, self._roi_size, 1. / self.stride)
         elif self._roi_mode == 'align':
@@ -149,17 +163,68 @@ class FasterRCNN(RCNN):
         # top_feat = F.Pooling(top_feat, global_pool=True, pool_type='avg', kernel=self._roi_size)
         top_feat = self.global_avg_pool(top_feat)
         cls_pred = self.class_predictor(top_feat)
-        box_pred = self.box_predictor(top_feat).reshape(
-            (-1, self.num_class, 4)).transpose((1, 0, 2))
+        box_pred = self.box_predictor(top_feat).reshape((-1, self.num_class, 4))
+        if self._dtype != 'float32':
+            cls_pred = F.cast(cls_pred, 'float32')
+            box_pred = F.cast(box_pred, 'float32')
 
         # no need to convert bounding boxes in training, just return
         if autograd.is_training():
-            box_pred = box_pred.transpose((1, 0, 2))
             return (cls_pred, box_pred, rpn_box, samples, matches,
                     raw_rpn_score, raw_rpn_box, anchors)
 
-        # translate bboxes
-        bboxes = self.box_decoder(box_pred, self.box_to_center(rpn_box)).split(
+        # restore batch axis, (B * R, ...) -> (B, R, ...)
+        cls_pred = F.reshape_like(cls_pred, F.broadcast_add(
+            roi_like, F.zeros((1, 1, self.num_class + 1))))
+        box_pred = F.reshape_like(box_pred.reshape((0, -1)), F.broadcast_add(
+            roi_like, F.zeros((1, 1, self.num_class * 4))))
+        if 0 < self.nms_thresh < 1 and self.nms_topk > 0:
+            result = self._sparse_detections(F, cls_pred, box_pred, rpn_box)
+        else:
+            result = self._dense_detections(F, cls_pred, box_pred, rpn_box)
+        if self.nms_thresh > 0 and self.nms_thresh < 1:
+            result = F.contrib.box_nms(
+                result, overlap_thresh=self.nms_thresh, topk=self.nms_topk,
+                id_index=0, score_index=1, coord_start=2)
+            if self.post_nms > 0:
+                result = result.slice_axis(axis=1, begin=0, end=self.post_nms)
+        ids = F.slice_axis(result, axis=-1, begin=0, end=1)
+        scores = F.slice_axis(result, axis=-1, begin=1, end=2)
+        bboxes = F.slice_axis(result, axis=-1, begin=2, end=6)
+        if im_size is not None:
+            # clip valid detections to their image, padded ones stay -1
+            valid = F.repeat(ids >= 0, repeats=4, axis=-1)
+            bboxes = F.where(valid, self._clipper(bboxes, x, im_size), bboxes)
+        return ids, scores, bboxes
+
+    def _sparse_detections(self, F, cls_pred, box_pred, rpn_box):
+        """Select the `nms_topk` best (roi, class) pairs of each image, as NMS would
+        only consider these, and decode boxes of the selected pairs only.
+        Returns (B, nms_topk, 6) detections."""
+        scores = F.softmax(cls_pred, axis=-1).slice_axis(axis=-1, begin=1, end=None)
+        scores = scores.reshape((0, -1))
+        # pad with invalid scores, so that `nms_topk` may exceed the number of pairs
+        pad = F.tile(F.ones_like(scores.slice_axis(axis=-1, begin=0, end=1)) * -1,
+                     reps=(1, self.nms_topk))
+        scores, indices = F.topk(F.concat(scores, pad, dim=-1), axis=-1, k=self.nms_topk,
+                                 ret_typ='both')
+        mask = scores > self._score_thresh
+        # padded pairs point to the first roi and are discarded
+        indices = F.where(mask, indices, F.zeros_like(indices))
+        roi_ids = F.floor(indices / self.num_class)
+        cls_ids = indices - roi_ids * self.num_class
+        # (B, R, num_class * 4) rows are in the same order as the flattened scores
+        box_pred = self.bbox_gather(box_pred.reshape((0, -1, 4)), indices)
+        rois = self.bbox_gather(rpn_box, roi_ids)
+        bboxes = self.box_decoder(box_pred, self.box_to_center(rois))
+        cls_ids = F.where(mask, cls_ids, F.ones_like(cls_ids) * -1)
+        scores = F.where(mask, scores, F.zeros_like(scores))
+        return F.concat(cls_ids.expand_dims(-1), scores.expand_dims(-1), bboxes, dim=-1)
+
+    def _dense_detections(self, F, cls_pred, box_pred, rpn_box):
+        """Decode all (roi, class) pairs as (B, num_class * R, 6) detections."""
+        box_pred = box_pred.reshape((0, 0, -4, self.num_class, 4)).transpose((2, 0, 1, 3))
+        bboxes = self.box_decoder(box_pred, self.box_to_center(rpn_box).expand_dims(0)).split(
             axis=0, num_outputs=self.num_class, squeeze_axis=True)
         cls_ids, scores = self.cls_decoder(F.softmax(cls_pred, axis=-1))
         results = []
@@ -170,17 +235,7 @@ class FasterRCNN(RCNN):
             per_result = F.concat(*[cls_id, score, bboxes[i]], dim=-1)
 
             results.append(per_result)
-        result = F.concat(*results, dim=0).expand_dims(0)
-        if self.nms_thresh > 0 and self.nms_thresh < 1:
-            result = F.contrib.box_nms(
-                result, overlap_thresh=self.nms_thresh, topk=self.nms_topk,
-                id_index=0, score_index=1, coord_start=2)
-            if self.post_nms > 0:
-                result = result.slice_axis(axis=1, begin=0, end=self.post_nms).squeeze(axis=0)
-        ids = F.slice_axis(result, axis=-1, begin=0, end=1)
-        scores = F.slice_axis(result, axis=-1, begin=1, end=2)
-        bboxes = F.slice_axis(result, axis=-1, begin=2, end=6)
-        return ids, scores, bboxes
+        return F.concat(*results, dim=1)
 
 def get_faster_rcnn(name, features, top_features, scales, ratios, classes,
                     roi_mode, roi_size, dataset, stride=16,
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 
 from mxnet import gluon
 from mxnet import autograd
+from ...nn.bbox import BBoxBatchGather
 from ...nn.coder import MultiClassEncoder, NormalizedPerClassBoxCenterEncoder
 from ...nn.matcher import MaximumMatcher
 
@@ -27,29 +28,55 @@ class RCNNTargetSampler(gluon.HybridBlock):
     pos_ratio : float, default is 0.25
         ``pos_ratio`` defines how many positive samples (``pos_ratio * num_sample``) is
         to be sampled.
+    max_batch : int, default is 32
+        Maximum supported batch size.
 
     """
     def __init__(self, num_sample=128, pos_iou_thresh=0.5, neg_iou_thresh_high=0.5,
-                 neg_iou_thresh_low=0.0, pos_ratio=0.25):
+                 neg_iou_thresh_low=0.0, pos_ratio=0.25, max_batch=32):
         super(RCNNTargetSampler, self).__init__()
         self._num_sample = num_sample
         self._pos_iou_thresh = pos_iou_thresh
         self._neg_iou_thresh_high = neg_iou_thresh_high
         self._neg_iou_thresh_low = neg_iou_thresh_low
         self._pos_ratio = pos_ratio
+        self._max_batch = max_batch
         self._matcher = MaximumMatcher(pos_iou_thresh)
+        self._gather = BBoxBatchGather(max_batch)
 
     #pylint: disable=arguments-differ
     def hybrid_forward(self, F, roi, gt_box):
-        """
-        Only support batch_size=1 now.
+        """Sample `num_sample` rois of each image.
+
+        Parameters
+        ----------
+        roi : mxnet.nd.NDArray or mxnet.symbol
+            RPN proposals with shape (B, N, 4).
+        gt_box : mxnet.nd.NDArray or mxnet.symbol
+            Ground-truth boxes with shape (B, M, 4), padded with -1.
+
+        Returns
+        -------
+        (new_roi, samples, matches)
+            Sampled rois (B, num_sample, 4), sampling results (B, num_sample) and
+            matched ground-truth indices (B, num_sample).
+
         """
         with autograd.pause():
             # cocnat rpn roi with ground truths
-            all_roi = F.concat(roi.squeeze(axis=0), gt_box.squeeze(axis=0), dim=0)
-            # calculate ious between (N, 4) anchors and (M, 4) bbox ground-truths
-            # ious is (N, M)
-            ious = F.contrib.box_iou(all_roi, gt_box, format='corner').transpose((1, 0, 2))
+            all_roi = F.concat(roi, gt_box, dim=1)
+            # ious between rois and ground-truths of all images are (B, N, B, M),
+            # keep the (B, N, M) ones within the same image
+            ious = F.contrib.box_iou(all_roi, gt_box, format='corner')
+            batch_ids = F.slice_like(F.arange(0, self._max_batch), all_roi, axes=(0,))
+            same_image = F.broadcast_equal(batch_ids.reshape((-1, 1, 1, 1)),
+                                           batch_ids.reshape((1, 1, -1, 1)))
+            ious = F.broadcast_mul(ious, same_image).sum(axis=2)
+            # padded ground-truths and invalid rois are ignored with -1 ious
+            gt_valid = gt_box.slice_axis(axis=-1, begin=0, end=1).reshape((0, 1, -1)) >= 0
+            roi_valid = all_roi.slice_axis(axis=-1, begin=0, end=1) >= 0
+            valid = F.broadcast_mul(gt_valid, roi_valid)
+            ious = F.where(valid, ious, F.ones_like(ious) * -1)
             matches = self._matcher(ious)
             samples = F.Custom(matches, ious, op_type='quota_sampler',
                                num_sample=self._num_sample,
@@ -57,16 +84,14 @@ class RCNNTargetSampler(gluon.HybridBlock):
                                neg_thresh_high=self._neg_iou_thresh_high,
                                neg_thresh_low=self._neg_iou_thresh_low,
                                pos_ratio=self._pos_ratio)
-            samples = samples.squeeze(axis=0)   # remove batch axis
-            matches = matches.squeeze(axis=0)
 
             # shuffle and argsort, take first num_sample samples
             sf_samples = F.where(samples == 0, F.ones_like(samples) * -999, samples)
-            indices = F.argsort(sf_samples, is_ascend=False).slice_axis(
-                axis=0, begin=0, end=self._num_sample)
-            new_roi = all_roi.take(indices).expand_dims(0)
-            new_samples = samples.take(indices).expand_dims(0)
-            new_matches = matches.take(indices).expand_dims(0)
+            indices = F.argsort(sf_samples, axis=-1, is_ascend=False).slice_axis(
+                axis=1, begin=0, end=self._num_sample)
+            new_roi = self._gather(all_roi, indices)
+            new_samples = self._gather(samples.expand_dims(-1), indices).reshape((0, -1))
+            new_matches = self._gather(matches.expand_dims(-1), indices).reshape((0, -1))
         return new_roi, new_samples, new_matches
 
 
@@ -91,15 +116,14 @@ class RCNNTargetGenerator(gluon.Block):
 
     #pylint: disable=arguments-differ
     def forward(self, roi, samples, matches, gt_label, gt_box):
-        """
-        Only support batch_size=1 now.
-        """
+        """Generate targets of (B, N) sampled rois, flattened to match
+        (B * N, ...) RCNN predictions."""
         with autograd.pause():
             cls_target = self._cls_encoder(samples, matches, gt_label)
             box_target, box_mask = self._box_encoder(
                 samples, matches, roi, gt_label, gt_box)
             # modify shapes to match predictions
-            cls_target = cls_target[0]
-            box_target = box_target.transpose((1, 2, 0, 3))[0]
-            box_mask = box_mask.transpose((1, 2, 0, 3))[0]
+            cls_target = cls_target.reshape((-1,))
+            box_target = box_target.transpose((1, 2, 0, 3)).reshape((-3, 0, 0))
+            box_mask = box_mask.transpose((1, 2, 0, 3)).reshape((-3, 0, 0))
         return cls_target, box_target, box_mask
@@ -21,6 +21,9 @@ class FCN(SegBaseModel):
         'resnet101' or 'resnet152').
     norm_layer : object
         Normalization layer used in backbone network (default: :class:`mxnet.gluon.nn.BatchNorm`;
+    checkpoint_stages : iterable of int, default ()
+        Backbone stages, from 1 to 4, which recompute activations in backward instead of
+        storing them, e.g. (3, 4) to train with larger batches.
 
 
     Reference:
@@ -51,12 +54,12 @@ class FCN(SegBaseModel):
 
         outputs = []
         x = self.head(c4)
-        x = F.contrib.BilinearResize2D(x, **self._up_kwargs)
+        x = self._upsample(F, x)
         outputs.append(x)
 
         if self.aux:
             auxout = self.auxlayer(c3)
-            auxout = F.contrib.BilinearResize2D(auxout, **self._up_kwargs)
+            auxout = self._upsample(F, auxout)
             outputs.append(auxout)
             return tuple(outputs)
         else:
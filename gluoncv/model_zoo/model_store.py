@@ -2,10 +2,12 @@
 from __future__ import print_function
 __all__ = ['get_model_file', 'purge']
 import os
+import json
 import zipfile
 
 from mxnet.gluon.utils import check_sha1
 from ..utils import download
+from ..utils.filesystem import makedirs, FileLock
 
 _model_sha1 = {name: checksum for checksum, name in [
     ('4fa2e1ad96b8c8d1ba9e5a43556cd909d70b3985', 'vgg16_atrous'),
@@ -47,7 +49,38 @@ def short_hash(name):
         raise ValueError('Pretrained model for {name} is not available.'.format(name=name))
     return _model_sha1[name][:8]
 
-def get_model_file(name, root=os.path.join('~', '.mxnet', 'models')):
+# verified files of this process as {path: {'sha1', 'size', 'mtime'}}
+_verified = {}
+
+def _check_sha1(file_path, sha1_hash):
+    """Check sha1 of a file, skipping files already verified.
+
+    A verified hash is recorded with file size and mtime, in memory and in a
+    `.sha1` file next to the model file if the directory is writable.
+    """
+    stat = os.stat(file_path)
+    record = {'sha1': sha1_hash, 'size': stat.st_size, 'mtime': stat.st_mtime}
+    if _verified.get(file_path) == record:
+        return True
+    memo_path = file_path + '.sha1'
+    try:
+        with open(memo_path) as f:
+            if json.load(f) == record:
+                _verified[file_path] = record
+                return True
+    except (IOError, OSError, ValueError):
+        pass
+    if not check_sha1(file_path, sha1_hash):
+        return False
+    _verified[file_path] = record
+    try:
+        with open(memo_path, 'w') as f:
+            json.dump(record, f)
+    except (IOError, OSError):
+        pass  # e.g. read-only mirror
+    return True
+
+def get_model_file(name, root=os.path.join('~', '.mxnet', 'models'), mirror=None):
     r"""Return location for the pretrained on local file system.
 
     This function will download from online model zoo when model cannot be found or has mismatch.
@@ -59,47 +92,53 @@ def get_model_file(name, root=os.path.join('~', '.mxnet', 'models')):
         Name of the model.
     root : str, default '~/.mxnet/models'
         Location for keeping the model parameters.
+    mirror : str, default is None
+        Read-only directory searched before `root`, e.g. a shared team cache.
+        Default is the `GLUONCV_MODEL_MIRROR` environment variable if set.
 
     Returns
     -------
     file_path
         Path to the requested pretrained model file.
     """
-    from mxnet.gluon.model_zoo.model_store import get_model_file as upstream_get_model_file
-    try:
-        file_name = upstream_get_model_file(name=name, root=root)
-    except ValueError:
-        file_name = '{name}-{short_hash}'.format(name=name,
-                                                 short_hash=short_hash(name))
+    file_name = '{name}-{short_hash}'.format(name=name, short_hash=short_hash(name))
+    sha1_hash = _model_sha1[name]
+    mirror = mirror or os.environ.get('GLUONCV_MODEL_MIRROR')
+    if mirror:
+        mirror_path = os.path.join(os.path.expanduser(mirror), file_name+'.params')
+        if os.path.exists(mirror_path) and _check_sha1(mirror_path, sha1_hash):
+            return mirror_path
     root = os.path.expanduser(root)
     file_path = os.path.join(root, file_name+'.params')
-    sha1_hash = _model_sha1[name]
-    if os.path.exists(file_path):
-        if check_sha1(file_path, sha1_hash):
+    if os.path.exists(file_path) and _check_sha1(file_path, sha1_hash):
+        return file_path
+
+    makedirs(root)
+    # concurrent workers download and extract the same file only once
+    with FileLock(os.path.join(root, file_name+'.lock')):
+        if os.path.exists(file_path):
+            if _check_sha1(file_path, sha1_hash):
+                return file_path
+            else:
+                print('Mismatch in the content of model file detected. Downloading again.')
+        else:
+            print('Model file is not found. Downloading.')
+
+        zip_file_path = os.path.join(root, file_name+'.zip')
+        repo_url = os.environ.get('MXNET_GLUON_REPO', apache_repo_url)
+        if repo_url[-1] != '/':
+            repo_url = repo_url + '/'
+        download(_url_format.format(repo_url=repo_url, file_name=file_name),
+                 path=zip_file_path,
+                 overwrite=True)
+        with zipfile.ZipFile(zip_file_path) as zf:
+            zf.extractall(root)
+        os.remove(zip_file_path)
+
+        if _check_sha1(file_path, sha1_hash):
             return file_path
         else:
-            print('Mismatch in the content of model file detected. Downloading again.')
-    else:
-        print('Model file is not found. Downloading.')
-
-    if not os.path.exists(root):
-        os.makedirs(root)
-
-    zip_file_path = os.path.join(root, file_name+'.zip')
-    repo_url = os.environ.get('MXNET_GLUON_REPO', apache_repo_url)
-    if repo_url[-1] != '/':
-        repo_url = repo_url + '/'
-    download(_url_format.format(repo_url=repo_url, file_name=file_name),
-             path=zip_file_path,
-             overwrite=True)
-    with zipfile.ZipFile(zip_file_path) as zf:
-        zf.extractall(root)
-    os.remove(zip_file_path)
-
-    if check_sha1(file_path, sha1_hash):
-        return file_path
-    else:
-        raise ValueError('Downloaded file has different hash. Please try again.')
+            raise ValueError('Downloaded file has different hash. Please try again.')
 
 def purge(root=os.path.join('~', '.mxnet', 'models')):
     r"""Purge all pretrained model files in local file store.
@@ -112,7 +151,7 @@ def purge(root=os.path.join('~', '.mxnet', 'models')):
     root = os.path.expanduser(root)
     files = os.listdir(root)
     for f in files:
-        if f.endswith(".params"):
+        if f.endswith(".params") or f.endswith(".params.sha1"):
             os.remove(os.path.join(root, f))
 
 def pretrained_model_list():
@@ -22,6 +22,9 @@ class PSPNet(SegBaseModel):
         for Synchronized Cross-GPU BachNormalization).
     aux : bool
         Auxilary loss.
+    checkpoint_stages : iterable of int, default ()
+        Backbone stages, from 1 to 4, which recompute activations in backward instead of
+        storing them, e.g. (3, 4) to train with larger batches.
 
 
     Reference:
@@ -47,12 +50,12 @@ class PSPNet(SegBaseModel):
         c3, c4 = self.base_forward(x)
         outputs = []
         x = self.head(c4)
-        x = F.contrib.BilinearResize2D(x, **self._up_kwargs)
+        x = self._upsample(F, x)
         outputs.append(x)
 
         if self.aux:
             auxout = self.auxlayer(c3)
-            auxout = F.contrib.BilinearResize2D(auxout, **self._up_kwargs)
+            auxout = self._upsample(F, auxout)
             outputs.append(auxout)
             return tuple(outputs)
         else:
@@ -1,10 +1,11 @@
 """RCNN Model."""
 from __future__ import absolute_import
 
+import numpy as np
 import mxnet as mx
 from mxnet import gluon
 from mxnet.gluon import nn
-from ...nn.bbox import BBoxCornerToCenter
+from ...nn.bbox import BBoxCornerToCenter, BBoxBatchGather
 from ...nn.coder import NormalizedBoxCenterDecoder, MultiPerClassDecoder
 
 
@@ -64,6 +65,8 @@ class RCNN(gluon.HybridBlock):
         self.nms_topk = nms_topk
         self.post_nms = post_nms
         self.train_patterns = train_patterns
+        self._score_thresh = 0.01
+        self._dtype = 'float32'
 
         with self.name_scope():
             self.features = features
@@ -73,9 +76,19 @@ class RCNN(gluon.HybridBlock):
                 self.num_class + 1, weight_initializer=mx.init.Normal(0.01))
             self.box_predictor = nn.Dense(
                 self.num_class * 4, weight_initializer=mx.init.Normal(0.001))
-            self.cls_decoder = MultiPerClassDecoder(num_class=self.num_class+1)
+            self.cls_decoder = MultiPerClassDecoder(
+                num_class=self.num_class+1, thresh=self._score_thresh)
             self.box_to_center = BBoxCornerToCenter()
             self.box_decoder = NormalizedBoxCenterDecoder()
+            self.bbox_gather = BBoxBatchGather()
+
+    def cast(self, dtype):
+        """Cast features and predictors to `dtype`, e.g. 'float16' for mixed precision.
+        Anchors, proposals, box decoding and NMS stay in float32, and predictions are
+        returned as float32.
+        """
+        self._dtype = np.dtype(dtype).name
+        super(RCNN, self).cast(dtype)
 
     def collect_train_params(self, select=None):
         """Collect trainable params.
@@ -100,7 +113,7 @@ class RCNN(gluon.HybridBlock):
             return self.collect_params(self.train_patterns)
         return self.collect_params(select)
 
-    def set_nms(self, nms_thresh=0.3, nms_topk=400, post_nms=100):
+    def set_nms(self, nms_thresh=0.3, nms_topk=400, post_nms=100, score_thresh=0.01):
         """Set NMS parameters to the network.
 
         .. Note::
@@ -118,6 +131,8 @@ class RCNN(gluon.HybridBlock):
             Only return top `post_nms` detection results, the rest is discarded. The number is
             based on COCO dataset which has maximum 100 objects per image. You can adjust this
             number if expecting more objects. You can use -1 to return all detections.
+        score_thresh : float, default is 0.01
+            Detections with scores not larger than `score_thresh` are discarded before NMS.
 
         Returns
         -------
@@ -127,6 +142,8 @@ class RCNN(gluon.HybridBlock):
         self.nms_thresh = nms_thresh
         self.nms_topk = nms_topk
         self.post_nms = post_nms
+        self._score_thresh = score_thresh
+        self.cls_decoder.set_thresh(score_thresh)
 
     # pylint: disable=arguments-differ
     def hybrid_forward(self, F, x, width, height):
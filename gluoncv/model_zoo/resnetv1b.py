@@ -6,6 +6,7 @@ from mxnet.context import cpu
 from mxnet.gluon.block import HybridBlock
 from mxnet.gluon import nn
 from mxnet.gluon.nn import BatchNorm
+from ..nn.checkpoint import CheckpointStagesBlock
 
 __all__ = ['ResNetV1b', 'resnet18_v1b', 'resnet34_v1b',
            'resnet50_v1b', 'resnet101_v1b',
@@ -95,7 +96,7 @@ class BottleneckV1b(HybridBlock):
         return out
 
 
-class ResNetV1b(HybridBlock):
+class ResNetV1b(CheckpointStagesBlock):
     """ Pre-trained ResNetV1b Model, which preduces the strides of 8
     featuremaps at conv5.
 
@@ -113,6 +114,11 @@ class ResNetV1b(HybridBlock):
     norm_layer : object
         Normalization layer used in backbone network (default: :class:`mxnet.gluon.nn.BatchNorm`;
         for Synchronized Cross-GPU BachNormalization).
+    checkpoint_stages : iterable of int, default ()
+        Stages, from 1 to 4, whose residual blocks recompute their activations in backward
+        instead of storing them, which trades computation for memory in training, e.g.
+        (3, 4) for the stride-8 stages of dilated networks. Checkpointing runs imperatively
+        while recording, on hybridized stages.
 
 
     Reference:
@@ -124,9 +130,9 @@ class ResNetV1b(HybridBlock):
     """
     # pylint: disable=unused-variable
     def __init__(self, block, layers, classes=1000, dilated=False, norm_layer=BatchNorm,
-                 **kwargs):
+                 checkpoint_stages=(), **kwargs):
         self.inplanes = 64
-        super(ResNetV1b, self).__init__()
+        super(ResNetV1b, self).__init__(checkpoint_stages=checkpoint_stages)
         with self.name_scope():
             self.conv1 = nn.Conv2D(in_channels=3, channels=64, kernel_size=7, strides=2, padding=3,
                                    use_bias=False)
@@ -187,10 +193,10 @@ class ResNetV1b(HybridBlock):
         x = self.relu(x)
         x = self.maxpool(x)
 
-        x = self.layer1(x)
-        x = self.layer2(x)
-        x = self.layer3(x)
-        x = self.layer4(x)
+        x = self._stage_forward(1, self.layer1, x)
+        x = self._stage_forward(2, self.layer2, x)
+        x = self._stage_forward(3, self.layer3, x)
+        x = self._stage_forward(4, self.layer4, x)
 
         x = self.avgpool(x)
         x = self.flat(x)
@@ -2,4 +2,3 @@
 from __future__ import absolute_import
 
 from .rpn import RPN
-from . import bbox_clip
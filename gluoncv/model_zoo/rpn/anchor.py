@@ -79,6 +79,10 @@ class RPNAnchorGenerator(gluon.HybridBlock):
         anchors = anchors.reshape((1, 1, height, width, -1)).astype(np.float32)
         return anchors
 
+    def cast(self, dtype):
+        """Anchors are kept in float32 with mixed precision."""
+        super(RPNAnchorGenerator, self).cast('float32')
+
     # pylint: disable=arguments-differ
     def hybrid_forward(self, F, x, anchors):
         """Slice anchors given the input image shape.
@@ -3,7 +3,7 @@ from __future__  import absolute_import
 
 from mxnet import autograd
 from mxnet import gluon
-from ...nn.bbox import BBoxCornerToCenter
+from ...nn.bbox import BBoxCornerToCenter, BBoxBatchGather, BBoxClipToImage
 from ...nn.coder import NormalizedBoxCenterDecoder
 
 
@@ -36,7 +36,8 @@ class RPNProposal(gluon.HybridBlock):
         super(RPNProposal, self).__init__()
         self._box_to_center = BBoxCornerToCenter()
         self._box_decoder = NormalizedBoxCenterDecoder(stds=stds)
-        # self._clipper = BBoxClipToImage()
+        self._gather = BBoxBatchGather()
+        self._clipper = BBoxClipToImage()
         # self._compute_area = BBoxArea()
         self._nms_thresh = nms_thresh
         self._train_pre_nms = max(1, train_pre_nms)
@@ -46,9 +47,12 @@ class RPNProposal(gluon.HybridBlock):
         self._min_size = min_size
 
     #pylint: disable=arguments-differ
-    def hybrid_forward(self, F, anchor, score, bbox_pred, img):
+    def hybrid_forward(self, F, anchor, score, bbox_pred, img, im_size=None,
+                       center_anchor=None):
         """
-        Generate proposals. Limit to batch-size=1 in current implementation.
+        Generate proposals of each image in the batch, clipped to its valid
+        (height, width) in `im_size` if given, otherwise to the padded batch.
+        `center_anchor` is the center form of `anchor`, if already known.
         """
         if autograd.is_training():
             pre_nms = self._train_pre_nms
@@ -58,12 +62,30 @@ class RPNProposal(gluon.HybridBlock):
             post_nms = self._test_post_nms
 
         with autograd.pause():
+            # only the top pre_nms anchors are kept by NMS, so select them before
+            # decoding. Scores are padded in case there are fewer anchors than
+            # pre_nms, padded entries are sliced off right after selection.
+            score = score.reshape((0, -1))
+            num_keep = F.slice(score, begin=(None, 0), end=(None, pre_nms))
+            pad = F.broadcast_add(score.slice_axis(axis=1, begin=0, end=1) * 0,
+                                  F.zeros((1, pre_nms))) - 1
+            score, indices = F.topk(F.concat(score, pad, dim=1), axis=-1, k=pre_nms,
+                                    ret_typ='both')
+            score = F.slice_like(score, num_keep, axes=(1,)).expand_dims(-1)
+            indices = F.slice_like(indices, num_keep, axes=(1,))
+            if center_anchor is None:
+                anchor = self._box_to_center(
+                    self._gather(F.broadcast_add(anchor, F.zeros_like(bbox_pred)), indices))
+            else:
+                anchor = self._gather(
+                    F.broadcast_add(center_anchor, F.zeros_like(bbox_pred)), indices)
+            bbox_pred = self._gather(bbox_pred, indices)
+
             # restore bounding boxes
-            roi = self._box_decoder(bbox_pred, self._box_to_center(anchor))
+            roi = self._box_decoder(bbox_pred, anchor)
 
             # clip rois to image's boundary
-            roi = F.Custom(roi, img, op_type='bbox_clip_to_image')
-            # roi = self._clipper(roi, width, height)
+            roi = self._clipper(roi, img, im_size)
 
             # remove bounding boxes that don't meet the min_size constraint
             # by setting them to (-1, -1, -1, -1)
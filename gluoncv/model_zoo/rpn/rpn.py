@@ -1,11 +1,13 @@
 """Region Proposal Networks Definition."""
 from __future__ import absolute_import
 
+import numpy as np
 import mxnet as mx
 from mxnet import gluon
 from mxnet import autograd
 from mxnet.gluon import nn
 from .anchor import RPNAnchorGenerator
+from ...nn.bbox import AnchorCache
 from .proposal import RPNProposal
 
 
@@ -55,16 +57,21 @@ class RPN(gluon.HybridBlock):
         These values must be the same as stds used in RPNTargetGenerator.
     weight_initializer : mxnet.initializer, default is mx.init.Normal(0.01)
         Weight intializer for RPN convolutional layers.
+    anchor_cache_size : int, default is 8
+        Number of feature shapes whose anchors are cached for imperative inference.
+        Use 0 to disable the cache.
 
     """
     def __init__(self, channels, stride, base_size=16, ratios=(0.5, 1, 2),
                  scales=(8, 16, 32), alloc_size=(128, 128),
                  nms_thresh=0.7, train_pre_nms=12000, train_post_nms=2000,
                  test_pre_nms=6000, test_post_nms=300, min_size=16, stds=(1., 1., 1., 1.),
-                 weight_initializer=None, **kwargs):
+                 weight_initializer=None, anchor_cache_size=8, **kwargs):
         super(RPN, self).__init__(**kwargs)
+        self._dtype = 'float32'
         if weight_initializer is None:
             weight_initializer = mx.init.Normal(0.01)
+        self._anchor_cache = AnchorCache(anchor_cache_size)
         with self.name_scope():
             self.anchor_generator = RPNAnchorGenerator(
                 stride, base_size, ratios, scales, alloc_size)
@@ -80,8 +87,13 @@ class RPN(gluon.HybridBlock):
             self.score = nn.Conv2D(anchor_depth, 1, 1, 0, weight_initializer=weight_initializer)
             self.loc = nn.Conv2D(anchor_depth * 4, 1, 1, 0, weight_initializer=weight_initializer)
 
+    def cast(self, dtype):
+        """Cast convolutions to `dtype`, anchors and proposals stay in float32."""
+        self._dtype = np.dtype(dtype).name
+        super(RPN, self).cast(dtype)
+
     # pylint: disable=arguments-differ
-    def hybrid_forward(self, F, x, img):
+    def hybrid_forward(self, F, x, img, im_size=None):
         """Forward RPN.
 
         The behavior during traing and inference is different.
@@ -92,6 +104,9 @@ class RPN(gluon.HybridBlock):
             Feature tensor.
         img : mxnet.nd.NDArray or mxnet.symbol
             The original input image.
+        im_size : mxnet.nd.NDArray or mxnet.symbol, optional
+            Valid (height, width) of each image with shape (B, 2), to which proposals
+            are clipped if images are padded in a batch.
 
         Returns
         -------
@@ -99,13 +114,22 @@ class RPN(gluon.HybridBlock):
             Returns predicted scores and regions which are candidates of objects.
 
         """
-        anchors = self.anchor_generator(x)
+        center_anchors = None
+        if F is mx.nd and not autograd.is_training():
+            # anchors only depend on feature size, reuse them for repeated shapes
+            anchors, center_anchors = self._anchor_cache.get(
+                (x.shape[2:], x.context, x.dtype), lambda: self.anchor_generator(x))
+        else:
+            anchors = self.anchor_generator(x)
         x = self.conv1(x)
         raw_rpn_scores = self.score(x).transpose(axes=(0, 2, 3, 1)).reshape((0, -1, 1))
-        rpn_scores = F.sigmoid(raw_rpn_scores)
         rpn_box_pred = self.loc(x).transpose(axes=(0, 2, 3, 1)).reshape((0, -1, 4))
+        if self._dtype != 'float32':
+            raw_rpn_scores = F.cast(raw_rpn_scores, 'float32')
+            rpn_box_pred = F.cast(rpn_box_pred, 'float32')
+        rpn_scores = F.sigmoid(raw_rpn_scores)
         rpn_score, rpn_box = self.region_proposaler(
-            anchors, rpn_scores, rpn_box_pred, img)
+            anchors, rpn_scores, rpn_box_pred, img, im_size, center_anchors)
         if autograd.is_training():
             # return raw predictions as well in training for bp
             return rpn_score, rpn_box, raw_rpn_scores, rpn_box_pred, anchors
@@ -3,11 +3,11 @@ import math
 import numpy as np
 import mxnet as mx
 from mxnet.ndarray import NDArray
-from mxnet.gluon.nn import HybridBlock
 from mxnet.gluon.loss import Loss, _apply_weighting
 from ..utils.metrics import voc_segmentation
 from ..utils.parallel import parallel_apply
 from .resnetv1b import resnet50_v1b, resnet101_v1b, resnet152_v1b
+from ..nn.checkpoint import CheckpointStagesBlock
 from ..utils.parallel import tuple_map
 # pylint: disable=abstract-method,arguments-differ,dangerous-default-value,missing-docstring
 
@@ -23,7 +23,7 @@ def get_segmentation_model(model, **kwargs):
     }
     return models[model](**kwargs)
 
-class SegBaseModel(HybridBlock):
+class SegBaseModel(CheckpointStagesBlock):
     r"""Base Model for Semantic Segmentation
 
     Parameters
@@ -34,19 +34,26 @@ class SegBaseModel(HybridBlock):
     norm_layer : Block
         Normalization layer used in backbone network (default: :class:`mxnet.gluon.nn.BatchNorm`;
         for Synchronized Cross-GPU BachNormalization).
+    pretrained_base : bool, default True
+        Whether to load ImageNet pre-trained weights of the backbone.
+    checkpoint_stages : iterable of int, default ()
+        Backbone stages, from 1 to 4, which recompute activations in backward instead of
+        storing them, e.g. (3, 4) to train with larger batches. See
+        :py:class:`gluoncv.model_zoo.ResNetV1b`.
     """
     # pylint : disable=arguments-differ
-    def __init__(self, nclass, aux, backbone='resnet50', height=480, width=480, **kwargs):
-        super(SegBaseModel, self).__init__()
+    def __init__(self, nclass, aux, backbone='resnet50', height=480, width=480,
+                 pretrained_base=True, checkpoint_stages=(), **kwargs):
+        super(SegBaseModel, self).__init__(checkpoint_stages=checkpoint_stages)
         self.aux = aux
         self.nclass = nclass
         with self.name_scope():
             if backbone == 'resnet50':
-                pretrained = resnet50_v1b(pretrained=True, dilated=True, **kwargs)
+                pretrained = resnet50_v1b(pretrained=pretrained_base, dilated=True, **kwargs)
             elif backbone == 'resnet101':
-                pretrained = resnet101_v1b(pretrained=True, dilated=True, **kwargs)
+                pretrained = resnet101_v1b(pretrained=pretrained_base, dilated=True, **kwargs)
             elif backbone == 'resnet152':
-                pretrained = resnet152_v1b(pretrained=True, dilated=True, **kwargs)
+                pretrained = resnet152_v1b(pretrained=pretrained_base, dilated=True, **kwargs)
             else:
                 raise RuntimeError('unknown backbone: {}'.format(backbone))
             self.conv1 = pretrained.conv1
@@ -58,6 +65,19 @@ class SegBaseModel(HybridBlock):
             self.layer3 = pretrained.layer3
             self.layer4 = pretrained.layer4
         self._up_kwargs = {'height': height, 'width': width}
+        self._dtype = 'float32'
+
+    def cast(self, dtype):
+        """Cast the network to `dtype`, e.g. 'float16' for mixed precision.
+        Predictions are upsampled and returned in float32."""
+        self._dtype = np.dtype(dtype).name
+        super(SegBaseModel, self).cast(dtype)
+
+    def _upsample(self, F, x):
+        """Upsample predictions to the output size in float32."""
+        if self._dtype != 'float32':
+            x = F.cast(x, 'float32')
+        return F.contrib.BilinearResize2D(x, **self._up_kwargs)
 
     def base_forward(self, x):
         """forwarding pre-trained network"""
@@ -65,10 +85,10 @@ class SegBaseModel(HybridBlock):
         x = self.bn1(x)
         x = self.relu(x)
         x = self.maxpool(x)
-        x = self.layer1(x)
-        x = self.layer2(x)
-        c3 = self.layer3(x)
-        c4 = self.layer4(c3)
+        x = self._stage_forward(1, self.layer1, x)
+        x = self._stage_forward(2, self.layer2, x)
+        c3 = self._stage_forward(3, self.layer3, x)
+        c4 = self._stage_forward(4, self.layer4, c3)
         return c3, c4
 
     def evaluate(self, x, target=None):
@@ -98,6 +118,8 @@ class SoftmaxCrossEntropyLoss(Loss):
         self._size_average = size_average
 
     def hybrid_forward(self, F, pred, label, sample_weight=None):
+        # compute loss in float32 with mixed precision
+        pred = F.cast(pred, 'float32')
         if not self._from_logits:
             pred = F.log_softmax(pred, axis=self._axis)
         if self._sparse_label:
@@ -2,9 +2,42 @@
 """Anchor box generator for SSD detector."""
 from __future__ import absolute_import
 
+import threading
+from collections import OrderedDict
 from mxnet import gluon
 import numpy as np
 
+# anchors of recent (sizes, ratios, step, alloc_size, offsets) settings, shared by all
+# models, the least recently used setting is evicted first
+_ANCHOR_CACHE = OrderedDict()
+_ANCHOR_CACHE_SIZE = 32
+_ANCHOR_CACHE_LOCK = threading.Lock()
+
+
+def _ssd_anchors(sizes, ratios, step, alloc_size, offsets):
+    """Compute (1, 1, H, W, 4 * D) anchors in (cx, cy, w, h) format.
+    At each location, D anchors are of size `sizes[0]`, `sqrt(sizes[0] * sizes[1])`
+    with ratio `ratios[0]`, then of size `sizes[0]` with each ratio in `ratios[1:]`."""
+    # generate same shapes on every location
+    shapes = [[sizes[0], sizes[0]], [sizes[1], sizes[1]]]
+    for r in ratios[1:]:
+        sr = np.sqrt(r)
+        shapes.append([sizes[0] * sr, sizes[0] / sr])
+    shapes = np.array(shapes)  # (D, 2)
+
+    # propagate to all locations
+    height, width = alloc_size
+    cy = (np.arange(height) + offsets[0]) * step
+    cx = (np.arange(width) + offsets[1]) * step
+    cx, cy = np.meshgrid(cx, cy)
+    anchors = np.empty((height, width, shapes.shape[0], 4))
+    anchors[:, :, :, 0] = cx[:, :, np.newaxis]
+    anchors[:, :, :, 1] = cy[:, :, np.newaxis]
+    anchors[:, :, :, 2:] = shapes
+    anchors = anchors.reshape((1, 1, height, width, -1)).astype(np.float32)
+    anchors.flags.writeable = False
+    return anchors
+
 
 class SSDAnchorGenerator(gluon.HybridBlock):
     """Bounding box anchor generator for Single-shot Object Detection.
@@ -27,44 +60,48 @@ class SSDAnchorGenerator(gluon.HybridBlock):
         anchor map so we can skip re-generating anchors for each input.
     offsets : tuple of float
         Center offsets of anchor boxes as (h, w) in range(0, 1).
+    memoize : bool, default is True
+        Whether to share anchors with other generators of the same setting in this
+        process. Anchors of the 32 most recently used settings are kept.
 
     """
     def __init__(self, index, im_size, sizes, ratios, step, alloc_size=(128, 128),
-                 offsets=(0.5, 0.5), clip=False, **kwargs):
+                 offsets=(0.5, 0.5), clip=False, memoize=True, **kwargs):
         super(SSDAnchorGenerator, self).__init__(**kwargs)
         assert len(im_size) == 2
         self._im_size = im_size
         self._clip = clip
         self._sizes = (sizes[0], np.sqrt(sizes[0] * sizes[1]))
         self._ratios = ratios
-        anchors = self._generate_anchors(self._sizes, self._ratios, step, alloc_size, offsets)
+        anchors = self._generate_anchors(self._sizes, self._ratios, step, alloc_size, offsets,
+                                         memoize)
         self.anchors = self.params.get_constant('anchor_%d'%(index), anchors)
 
-    def _generate_anchors(self, sizes, ratios, step, alloc_size, offsets):
-        """Generate anchors for once."""
+    def _generate_anchors(self, sizes, ratios, step, alloc_size, offsets, memoize=True):
+        """Generate anchors for once, results are memoized for recent settings."""
         assert len(sizes) == 2, "SSD requires sizes to be (size_min, size_max)"
-        anchors = []
-        for i in range(alloc_size[0]):
-            for j in range(alloc_size[1]):
-                cy = (i + offsets[0]) * step
-                cx = (j + offsets[1]) * step
-                # ratio = ratios[0], size = size_min or sqrt(size_min * size_max)
-                r = ratios[0]
-                anchors.append([cx, cy, sizes[0], sizes[0]])
-                anchors.append([cx, cy, sizes[1], sizes[1]])
-                # size = sizes[0], ratio = ...
-                for r in ratios[1:]:
-                    sr = np.sqrt(r)
-                    w = sizes[0] * sr
-                    h = sizes[0] / sr
-                    anchors.append([cx, cy, w, h])
-        return np.array(anchors).reshape(1, 1, alloc_size[0], alloc_size[1], -1)
+        if not memoize:
+            return _ssd_anchors(sizes, ratios, step, alloc_size, offsets)
+        key = (tuple(float(x) for x in sizes), tuple(float(x) for x in ratios), float(step),
+               tuple(alloc_size), tuple(float(x) for x in offsets))
+        with _ANCHOR_CACHE_LOCK:
+            anchors = _ANCHOR_CACHE.pop(key, None)
+            if anchors is None:
+                anchors = _ssd_anchors(sizes, ratios, step, alloc_size, offsets)
+                while len(_ANCHOR_CACHE) >= _ANCHOR_CACHE_SIZE:
+                    _ANCHOR_CACHE.popitem(last=False)
+            _ANCHOR_CACHE[key] = anchors
+        return anchors
 
     @property
     def num_depth(self):
         """Number of anchors at each pixel."""
         return len(self._sizes) + len(self._ratios) - 1
 
+    def cast(self, dtype):
+        """Anchors are kept in float32 with mixed precision."""
+        super(SSDAnchorGenerator, self).cast('float32')
+
     # pylint: disable=arguments-differ
     def hybrid_forward(self, F, x, anchors):
         a = F.slice_like(anchors, x * 0, axes=(2, 3))
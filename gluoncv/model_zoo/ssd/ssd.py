@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 
 import os
+import numpy as np
 import mxnet as mx
 from mxnet import autograd
 from mxnet.gluon import nn
@@ -10,6 +11,7 @@ from ...nn.feature import FeatureExpander
 from .anchor import SSDAnchorGenerator
 from ...nn.predictor import ConvPredictor
 from ...nn.coder import MultiPerClassDecoder, NormalizedBoxCenterDecoder
+from ...nn.bbox import BBoxBatchGather, AnchorCache
 from .vgg_atrous import vgg16_atrous_300, vgg16_atrous_512
 # from ...utils import set_lr_mult
 from ...data import VOCDetection
@@ -85,6 +87,9 @@ class SSD(HybridBlock):
         maps, which will later saved in parameters. During inference, we support arbitrary
         input image by cropping corresponding area of the anchor map. This allow us
         to export to symbol so we can run it in c++, scalar, etc.
+    anchor_cache_size : int, default is 8
+        Number of input shapes whose concatenated anchors are cached for imperative
+        inference. Use 0 to disable the cache.
     ctx : mx.Context
         Network context.
 
@@ -93,7 +98,7 @@ class SSD(HybridBlock):
                  steps, classes, use_1x1_transition=True, use_bn=True,
                  reduce_ratio=1.0, min_depth=128, global_pool=False, pretrained=False,
                  stds=(0.1, 0.1, 0.2, 0.2), nms_thresh=0.45, nms_topk=400, post_nms=100,
-                 anchor_alloc_size=128, ctx=mx.cpu(), **kwargs):
+                 anchor_alloc_size=128, anchor_cache_size=8, ctx=mx.cpu(), **kwargs):
         super(SSD, self).__init__(**kwargs)
         if network is None:
             num_layers = len(ratios)
@@ -114,6 +119,9 @@ class SSD(HybridBlock):
         self.nms_thresh = nms_thresh
         self.nms_topk = nms_topk
         self.post_nms = post_nms
+        self._score_thresh = 0.01
+        self._dtype = 'float32'
+        self._anchor_cache = AnchorCache(anchor_cache_size, center=True)
 
         with self.name_scope():
             if network is None:
@@ -138,9 +146,10 @@ class SSD(HybridBlock):
                 self.class_predictors.add(ConvPredictor(num_anchors * self.num_classes))
                 self.box_predictors.add(ConvPredictor(num_anchors * 4))
             self.bbox_decoder = NormalizedBoxCenterDecoder(stds)
-            self.cls_decoder = MultiPerClassDecoder(self.num_classes, thresh=0.01)
+            self.cls_decoder = MultiPerClassDecoder(self.num_classes, thresh=self._score_thresh)
+            self.bbox_gather = BBoxBatchGather()
 
-    def set_nms(self, nms_thresh=0, nms_topk=400, post_nms=100):
+    def set_nms(self, nms_thresh=0, nms_topk=400, post_nms=100, score_thresh=0.01):
         """Set non-maximum suppression parameters.
 
         Parameters
@@ -154,6 +163,8 @@ class SSD(HybridBlock):
             Only return top `post_nms` detection results, the rest is discarded. The number is
             based on COCO dataset which has maximum 100 objects per image. You can adjust this
             number if expecting more objects. You can use -1 to return all detections.
+        score_thresh : float, default is 0.01
+            Detections with scores not larger than `score_thresh` are discarded before NMS.
 
         Returns
         -------
@@ -163,6 +174,16 @@ class SSD(HybridBlock):
         self.nms_thresh = nms_thresh
         self.nms_topk = nms_topk
         self.post_nms = post_nms
+        self._score_thresh = score_thresh
+        self.cls_decoder.set_thresh(score_thresh)
+
+    def cast(self, dtype):
+        """Cast features and predictors to `dtype`, e.g. 'float16' for mixed precision.
+        Anchors, box decoding and NMS stay in float32, and predictions are returned
+        as float32.
+        """
+        self._dtype = np.dtype(dtype).name
+        super(SSD, self).cast(dtype)
 
     # pylint: disable=arguments-differ
     def hybrid_forward(self, F, x):
@@ -172,23 +193,24 @@ class SSD(HybridBlock):
                      for feat, cp in zip(features, self.class_predictors)]
         box_preds = [F.flatten(F.transpose(bp(feat), (0, 2, 3, 1)))
                      for feat, bp in zip(features, self.box_predictors)]
-        anchors = [F.reshape(ag(feat), shape=(1, -1))
-                   for feat, ag in zip(features, self.anchor_generators)]
         cls_preds = F.concat(*cls_preds, dim=1).reshape((0, -1, self.num_classes))
         box_preds = F.concat(*box_preds, dim=1).reshape((0, -1, 4))
-        anchors = F.concat(*anchors, dim=1).reshape((1, -1, 4))
+        if self._dtype != 'float32':
+            cls_preds = F.cast(cls_preds, 'float32')
+            box_preds = F.cast(box_preds, 'float32')
         if autograd.is_training():
-            return [cls_preds, box_preds, anchors]
+            return [cls_preds, box_preds, self._anchors(F, features)]
+        if F is mx.nd:
+            # anchors only depend on input size, reuse them for repeated shapes
+            _, anchors = self._anchor_cache.get(
+                (x.shape[2:], x.context, x.dtype), lambda: self._anchors(F, features))
+        else:
+            anchors = self._anchors(F, features)
         bboxes = self.bbox_decoder(box_preds, anchors)
-        cls_ids, scores = self.cls_decoder(F.softmax(cls_preds, axis=-1))
-        results = []
-        for i in range(self.num_classes - 1):
-            cls_id = cls_ids.slice_axis(axis=-1, begin=i, end=i+1)
-            score = scores.slice_axis(axis=-1, begin=i, end=i+1)
-            # per class results
-            per_result = F.concat(*[cls_id, score, bboxes], dim=-1)
-            results.append(per_result)
-        result = F.concat(*results, dim=1)
+        if 0 < self.nms_thresh < 1 and self.nms_topk > 0:
+            result = self._sparse_detections(F, cls_preds, bboxes)
+        else:
+            result = self._dense_detections(F, cls_preds, bboxes)
         if self.nms_thresh > 0 and self.nms_thresh < 1:
             result = F.contrib.box_nms(
                 result, overlap_thresh=self.nms_thresh, topk=self.nms_topk,
@@ -200,6 +222,45 @@ class SSD(HybridBlock):
         bboxes = F.slice_axis(result, axis=2, begin=2, end=6)
         return ids, scores, bboxes
 
+    def _anchors(self, F, features):
+        """Concatenate anchors of all layers as (1, N, 4) center boxes."""
+        anchors = [F.reshape(ag(feat), shape=(1, -1))
+                   for feat, ag in zip(features, self.anchor_generators)]
+        return F.concat(*anchors, dim=1).reshape((1, -1, 4))
+
+    def _sparse_detections(self, F, cls_preds, bboxes):
+        """Select the `nms_topk` best (anchor, class) pairs of each image, as NMS
+        would only consider these, and return them as (B, nms_topk, 6) detections."""
+        fg_class = self.num_classes - 1
+        scores = F.softmax(cls_preds, axis=-1).slice_axis(axis=-1, begin=1, end=None)
+        scores = scores.reshape((0, -1))
+        # pad with invalid scores, so that `nms_topk` may exceed the number of pairs
+        pad = F.tile(F.ones_like(scores.slice_axis(axis=-1, begin=0, end=1)) * -1,
+                     reps=(1, self.nms_topk))
+        scores, indices = F.topk(F.concat(scores, pad, dim=-1), axis=-1, k=self.nms_topk,
+                                 ret_typ='both')
+        mask = scores > self._score_thresh
+        # padded pairs point to the first anchor and are discarded
+        indices = F.where(mask, indices, F.zeros_like(indices))
+        anchor_ids = F.floor(indices / fg_class)
+        cls_ids = indices - anchor_ids * fg_class
+        bboxes = self.bbox_gather(bboxes, anchor_ids)
+        cls_ids = F.where(mask, cls_ids, F.ones_like(cls_ids) * -1)
+        scores = F.where(mask, scores, F.zeros_like(scores))
+        return F.concat(cls_ids.expand_dims(-1), scores.expand_dims(-1), bboxes, dim=-1)
+
+    def _dense_detections(self, F, cls_preds, bboxes):
+        """Return all (anchor, class) pairs as (B, N * fg_class, 6) detections."""
+        cls_ids, scores = self.cls_decoder(F.softmax(cls_preds, axis=-1))
+        results = []
+        for i in range(self.num_classes - 1):
+            cls_id = cls_ids.slice_axis(axis=-1, begin=i, end=i+1)
+            score = scores.slice_axis(axis=-1, begin=i, end=i+1)
+            # per class results
+            per_result = F.concat(*[cls_id, score, bboxes], dim=-1)
+            results.append(per_result)
+        return F.concat(*results, dim=1)
+
 def get_ssd(name, base_size, features, filters, sizes, ratios, steps, classes,
             dataset, pretrained=False, pretrained_base=True, ctx=mx.cpu(),
             root=os.path.join('~', '.mxnet', 'models'), **kwargs):
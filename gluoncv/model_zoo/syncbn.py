@@ -1,11 +1,14 @@
 """Synchronized Cross GPU Batch Normalization"""
 import threading
 
+import mxnet as mx
 from mxnet import autograd, test_utils
 from mxnet.gluon import HybridBlock
 
 import numpy as np
 
+__all__ = ['BatchNorm', 'Communicator', 'LocalCommunicator', 'KVStoreCommunicator']
+
 
 class BatchNorm(HybridBlock):
     """Cross-GPU Synchronized Batch normalization (SyncBN)
@@ -13,12 +16,15 @@ class BatchNorm(HybridBlock):
     SyncBN normalizes the input within the whole mini-batch.
     We follow the sync-onece implmentation described in the paper [2]_ .
 
+    The per-channel sum, sum of squares and number of elements of each device are
+    reduced in a single all-reduce by a :py:class:`Communicator`, and gradients flow
+    back through the reduction. Devices driven by threads of one process, e.g. by
+    `DataParallelModel(sync=True)`, use :py:class:`LocalCommunicator`; processes of
+    distributed training use :py:class:`KVStoreCommunicator`. Statistics are reduced
+    imperatively, so networks are trained without hybridization.
+
     Parameters
     ----------
-    axis : int, default 1
-        The axis that should be normalized. This is typically the channels
-        (C) axis. For instance, after a `Conv2D` layer with `layout='NCHW'`,
-        set `axis=1` in `BatchNorm`. If `layout='NHWC'`, then set `axis=3`.
     momentum: float, default 0.9
         Momentum for the moving average.
     epsilon: float, default 1e-5
@@ -31,10 +37,6 @@ class BatchNorm(HybridBlock):
         When the next layer is linear (also e.g. `nn.relu`),
         this can be disabled since the scaling
         will be done by the next layer.
-    use_global_stats: bool, default False
-        If True, use global moving statistics instead of local batch-norm. This will force
-        change batch-norm into a scale shift operator.
-        If False, use local batch-norm.
     beta_initializer: str or `Initializer`, default 'zeros'
         Initializer for the beta weight.
     gamma_initializer: str or `Initializer`, default 'ones'
@@ -48,6 +50,11 @@ class BatchNorm(HybridBlock):
         initialization will be deferred to the first time `forward` is called
         and `in_channels` will be inferred from the shape of input data.
     nGPUs : int, default number of visible GPUs
+        Number of devices of the default :py:class:`LocalCommunicator`, ignored if
+        `communicator` is given.
+    communicator : Communicator, default None
+        Communicator reducing statistics, may be shared by all layers. Use
+        `functools.partial(BatchNorm, communicator=...)` as `norm_layer` of models.
     Inputs:
         - **data**: input tensor with arbitrary shape.
     Outputs:
@@ -66,7 +73,7 @@ class BatchNorm(HybridBlock):
     def __init__(self, momentum=0.9, epsilon=1e-5, center=True, scale=True,
                  beta_initializer='zeros', gamma_initializer='ones',
                  running_mean_initializer='zeros', running_variance_initializer='ones',
-                 in_channels=0, nGPUs=None, **kwargs):
+                 in_channels=0, nGPUs=None, communicator=None, **kwargs):
         super(BatchNorm, self).__init__(**kwargs)
         self._kwargs = {'eps': epsilon, 'momentum': momentum,
                         'fix_gamma': not scale}
@@ -93,11 +100,9 @@ class BatchNorm(HybridBlock):
                                            init=running_variance_initializer,
                                            allow_deferred_init=True,
                                            differentiable=False)
-        if nGPUs is None:
-            nGPUs = self._get_nGPUs()
-        self.xsum = _SharedTensor(nGPUs)
-        self.xsqu = _SharedTensor(nGPUs)
-        self.updater = _SharedUpdater(nGPUs)
+        if communicator is None:
+            communicator = LocalCommunicator(nGPUs if nGPUs else self._get_nGPUs())
+        self.communicator = communicator
 
     def _get_nGPUs(self):
         # caution: if not using all the GPUs, please mannually set nGPUs
@@ -113,32 +118,37 @@ class BatchNorm(HybridBlock):
 
     def hybrid_forward(self, F, x, gamma, beta, running_mean, running_var):
         """Hybrid forward"""
-        if autograd.is_training():
-            isum, isqu = F.SumSquare(x)
-            # reduce sum for E(x) and E(x^2)
-            idsum = self.xsum.push(isum)
-            idsqu = self.xsqu.push(isqu)
-            osum = self.xsum.get(F, idsum)
-            osqu = self.xsqu.get(F, idsqu)
-            assert(len(self.xsum) == len(self.xsqu))
-            N = len(self.xsum)*x.shape[0]*x.shape[2]*x.shape[3]
-            # calc mean and std
-            mean = osum / N
-            sumvar = osqu - osum * osum / N
-            bias_var = sumvar / N
-            std = F.sqrt(F.clip(bias_var, a_min=self.eps, a_max=bias_var.max().asscalar()))
-            # update running mean and var
-            with autograd.pause():
-                unbias_var = sumvar / (N - 1)
-                ctx = x.context
-                self.updater(self.running_mean, self.running_var, mean, unbias_var,
-                             self.momentum, ctx)
-            return F.DecoupleBatchNorm(x, gamma, beta, mean, std,
-                                       name='fwd', **self._kwargs)
-        else:
-            ctx = x.context
+        if not autograd.is_training():
             return F.BatchNorm(x, gamma, beta, running_mean, running_var, name='fwd',
                                **self._kwargs)
+        if not isinstance(x, mx.nd.NDArray):
+            raise ValueError('SyncBN reduces statistics imperatively, networks with '
+                             'SyncBN cannot be hybridized for training.')
+        dtype = x.dtype
+        if dtype != np.float32:
+            x = x.astype('float32')
+        channels = x.shape[1]
+        axis = (0,) + tuple(range(2, x.ndim))
+        count = F.full((1,), x.size // channels, ctx=x.context)
+        # a single reduction of sum, sum of squares and count of all devices
+        stats = self.communicator.allreduce(self.name, F.concat(
+            F.sum(x, axis=axis), F.sum(F.square(x), axis=axis), count, dim=0))
+        count = F.slice_axis(stats, axis=0, begin=2 * channels, end=2 * channels + 1)
+        mean = F.slice_axis(stats, axis=0, begin=0, end=channels) / count
+        var = F.relu(F.slice_axis(stats, axis=0, begin=channels, end=2 * channels) / count -
+                     F.square(mean))
+        with autograd.pause():
+            unbias_var = var * count / F.maximum(count - 1, 1)
+            running_mean[:] = self.momentum * running_mean + (1. - self.momentum) * mean
+            running_var[:] = self.momentum * running_var + (1. - self.momentum) * unbias_var
+        scale = F.rsqrt(var + self.eps)
+        if not self._kwargs['fix_gamma']:
+            scale = scale * gamma
+        shape = (1, channels) + (1,) * (x.ndim - 2)
+        out = F.broadcast_add(
+            F.broadcast_mul(F.broadcast_sub(x, mean.reshape(shape)), scale.reshape(shape)),
+            beta.reshape(shape))
+        return out.astype(dtype, copy=False)
 
     def __repr__(self):
         s = '{name}({content}'
@@ -151,85 +161,165 @@ class BatchNorm(HybridBlock):
                                            for k, v in self._kwargs.items()]))
 
 
-class _SharedUpdater(object):
-    # update only once
-    def __init__(self, nGPUs):
-        self.mutex = threading.Lock()
-        self.nGPUs = nGPUs
-        self._clear()
-
-    def _clear(self):
-        self.tasks = self.nGPUs
-
-    def __call__(self, running_mean, running_var, mean, unbias_var, momentum, ctx):
-        with self.mutex:
-            if self.tasks == self.nGPUs:
-                running_mean.set_data(momentum * running_mean.data(ctx) + \
-                    (1.0 - momentum) * mean)
-                running_var.set_data(momentum * running_var.data(ctx) + \
-                    (1.0 - momentum) * unbias_var)
-            self.tasks -= 1
-        if self.tasks == 0:
-            self._clear()
-
-
-class _SharedTensor(object):
-    def __init__(self, nGPUs):
-        self.mutex = threading.Lock()
-        self.all_tasks_done = threading.Condition(self.mutex)
-        self.nGPUs = nGPUs
-        self._clear()
-
-    def _clear(self):
-        self.list = []
-        self.push_tasks = self.nGPUs
-        self.reduce_tasks = self.nGPUs
-
-    def push(self, t):
-        """push to _SharedTensor"""
-        with self.mutex:
-            if self.push_tasks == 0:
-                self._clear()
-            self.list.append(t)
-            idx = len(self.list) - 1
-            self.push_tasks -= 1
-
-        with self.all_tasks_done:
-            if self.push_tasks == 0:
-                self.all_tasks_done.notify_all()
-            while self.push_tasks:
-                self.all_tasks_done.wait()
-        return idx
-
-    def _reduce(self, F):
-        with self.mutex:
-            if self.reduce_tasks == 1:
-                assert(len(self.list) == self.nGPUs)
-                self.list = F.AllReduce(*self.list)
-                for xi in self.list:
-                    # mannually attach grad to avoid wrong allocation
-                    xi.attach_grad()
-                    xi.wait_to_read()
-                self.reduce_tasks -= 1
+class Communicator(object):
+    """Base class of communicators, which sum statistics of SyncBN over devices."""
+    def allreduce(self, key, x):
+        """Sum `x` over all devices, differentiably when recording.
+
+        Parameters
+        ----------
+        key : str
+            Name of the reduction, identical on all devices and unique per layer.
+        x : mxnet.nd.NDArray
+            Tensor of this device.
+
+        Returns
+        -------
+        mxnet.nd.NDArray
+            Sum over all devices, on the context of `x`.
+
+        """
+        raise NotImplementedError
+
+
+class LocalCommunicator(Communicator):
+    """Communicator of devices driven by threads of one process, such as
+    `DataParallelModel(sync=True)`.
+
+    Threads wait until all devices provided their tensor, then each sums the tensors
+    on its own device. The copies are recorded, so a single `autograd.backward` of the
+    losses of all devices also reduces gradients, without waiting on devices.
+
+    Parameters
+    ----------
+    num_devices : int
+        Number of devices, i.e. of threads calling :py:meth:`allreduce` per key.
+
+    """
+    def __init__(self, num_devices):
+        self.num_devices = num_devices
+        self._cond = threading.Condition()
+        self._pending = {}
+
+    def allreduce(self, key, x):
+        if self.num_devices == 1:
+            return x
+        with self._cond:
+            tensors = self._pending.setdefault(key, [])
+            tensors.append(x)
+            if len(tensors) == self.num_devices:
+                del self._pending[key]
+                self._cond.notify_all()
             else:
-                self.reduce_tasks -= 1
+                while self._pending.get(key) is tensors:
+                    self._cond.wait()
+        # the same order on every device gives identical sums
+        tensors = sorted(tensors, key=lambda t: (t.context.device_typeid,
+                                                 t.context.device_id))
+        return mx.nd.add_n(*[t.as_in_context(x.context) for t in tensors])
 
-        with self.all_tasks_done:
-            if self.reduce_tasks == 0:
-                self.all_tasks_done.notify_all()
-            while self.reduce_tasks:
-                self.all_tasks_done.wait()
 
-    def get(self, F, idx):
-        """Get form _SharedTensor"""
-        self._reduce(F)
-        return self.list[idx]
+class KVStoreCommunicator(Communicator):
+    """Communicator of processes through a kvstore, e.g. workers of `dist_sync`
+    or `dist_device_sync` training with one device per process.
 
-    def test(self):
-        print('self.list', self.list)
+    Statistics are pushed and pulled in forward, and their gradients in backward.
+    All operations are asynchronous, and processes call them in the same order
+    because their graphs are identical.
 
-    def __len__(self):
-        return len(self.list)
+    Each layer uses two integer keys from `key_offset` on, in the order layers are
+    first called, so that they do not collide with the indices of parameters. The
+    kvstore may be shared with a `gluon.Trainer` created with
+    `update_on_kvstore=False`; otherwise the optimizer of the kvstore would also
+    update the statistics. Workers of distributed kvstores do not know whether their
+    servers have an optimizer, so a shared kvstore requires its trainer, see
+    :py:meth:`set_trainer`, which is checked to not update on the kvstore.
 
-    def __repr__(self):
-        return '_SharedTensor'
+    Parameters
+    ----------
+    kvstore : str or mxnet.kvstore.KVStore
+        Type of a kvstore dedicated to SyncBN, or a kvstore shared with a trainer which
+        does not update on the kvstore.
+    key_offset : int, default 100000
+        First key of SyncBN, larger than the number of parameters of the trainer.
+    trainer : mxnet.gluon.Trainer, default None
+        Trainer sharing `kvstore`, which may also be set later by :py:meth:`set_trainer`.
+
+    """
+    def __init__(self, kvstore, key_offset=100000, trainer=None):
+        self._dedicated = isinstance(kvstore, str)
+        if self._dedicated:
+            kvstore = mx.kv.create(kvstore)
+        self.kvstore = kvstore
+        self._key_offset = key_offset
+        self._keys = {}
+        self._trainer = trainer
+
+    def set_trainer(self, trainer):
+        """Set the trainer sharing the kvstore, e.g. once it is created after the network.
+
+        Parameters
+        ----------
+        trainer : mxnet.gluon.Trainer
+            Trainer created with `kvstore` of this communicator and
+            `update_on_kvstore=False`.
+
+        """
+        self._trainer = trainer
+
+    def _check_kvstore(self):
+        """Raise if the kvstore may apply an optimizer to the statistics."""
+        if getattr(self.kvstore, '_updater', None) is not None:
+            raise ValueError('The kvstore of SyncBN has an optimizer, create the trainer '
+                             'sharing it with update_on_kvstore=False.')
+        if self._trainer is not None:
+            # pylint: disable=protected-access
+            trainer = self._trainer
+            if trainer._kv_initialized:
+                # a trainer of a single device may not use its kvstore at all
+                updates = trainer._kvstore is not None and trainer._update_on_kvstore
+            else:
+                updates = trainer._kvstore_params['update_on_kvstore'] is not False
+            if updates:
+                raise ValueError('The trainer sharing the kvstore of SyncBN may update on '
+                                 'the kvstore, create it with update_on_kvstore=False.')
+        elif not self._dedicated and 'dist' in self.kvstore.type:
+            raise ValueError('Whether the servers of a shared distributed kvstore have an '
+                             'optimizer is unknown, pass the trainer sharing it to '
+                             'set_trainer, or the kvstore type to create a dedicated one.')
+
+    def _key(self, name, x):
+        if name not in self._keys:
+            key = self._key_offset + 2 * len(self._keys)
+            for k in (key, key + 1):
+                self.kvstore.init(k, mx.nd.zeros(x.shape, dtype=x.dtype))
+            self._keys[name] = key
+        return self._keys[name]
+
+    def reduce(self, key, x, grad=False):
+        """Sum `x`, or its gradient if `grad`, over processes without recording."""
+        key = self._key(key, x) + int(grad)
+        out = mx.nd.empty(x.shape, ctx=x.context, dtype=x.dtype)
+        self.kvstore.push(key, x)
+        self.kvstore.pull(key, out=out)
+        return out
+
+    def allreduce(self, key, x):
+        self._check_kvstore()
+        if not autograd.is_recording():
+            return self.reduce(key, x)
+        return _KVStoreAllReduce(self, key)(x)
+
+
+class _KVStoreAllReduce(autograd.Function):
+    """Sum over processes, whose gradient is the sum of gradients over processes."""
+    def __init__(self, communicator, key):
+        super(_KVStoreAllReduce, self).__init__()
+        self._communicator = communicator
+        self._key = key
+
+    def forward(self, x):
+        return self._communicator.reduce(self._key, x)
+
+    def backward(self, dy):
+        return self._communicator.reduce(self._key, dy, grad=True)
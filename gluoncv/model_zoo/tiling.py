@@ -0,0 +1,164 @@
+"""Detection on large images with overlapping tiles."""
+from __future__ import absolute_import, division
+
+import numpy as np
+import mxnet as mx
+from ..utils.bbox import bbox_nms, _weighted_fusion
+
+__all__ = ['tile_windows', 'detect_tiled']
+
+
+def tile_windows(height, width, tile_size, overlap):
+    """Positions of overlapping tiles which cover an image.
+
+    Parameters
+    ----------
+    height : int
+        Image height.
+    width : int
+        Image width.
+    tile_size : int or (int, int)
+        Tile size as (height, width).
+    overlap : int
+        Minimum overlap of neighboring tiles in pixels. It should be larger than the
+        objects cut by tile borders.
+
+    Returns
+    -------
+    list of (int, int)
+        Top left corners of tiles as (y, x). The last row and column are aligned to
+        the bottom and right borders, tiles only exceed the image if it is smaller
+        than a tile.
+
+    """
+    tile_h, tile_w = (tile_size, tile_size) if isinstance(tile_size, int) else tile_size
+    if overlap >= min(tile_h, tile_w):
+        raise ValueError("Overlap {} must be smaller than tile size {}".format(
+            overlap, (tile_h, tile_w)))
+
+    def starts(size, tile):
+        if size <= tile:
+            return [0]
+        stride = tile - overlap
+        positions = list(range(0, size - tile, stride))
+        return positions + [size - tile]
+    return [(y, x) for y in starts(height, tile_h) for x in starts(width, tile_w)]
+
+
+def _merge(ids, scores, bboxes, weights, method, iou_thresh, topk, metric):
+    """Merge duplicated detections of neighboring tiles. Fused boxes keep the weights
+    of their clusters, so that merging again fuses them like their clusters."""
+    if not len(scores):
+        return ids, scores, bboxes, weights
+    if method == 'nms':
+        keep = bbox_nms(bboxes, scores, ids, iou_thresh, topk, metric)
+        return ids[keep], scores[keep], bboxes[keep], weights[keep]
+    if method == 'wbf':
+        bboxes, scores, weights, ids = _weighted_fusion(
+            bboxes, scores, weights, ids, iou_thresh, metric)
+        if topk > 0:
+            ids, scores, bboxes, weights = [x[:topk] for x in (ids, scores, bboxes, weights)]
+        return ids, scores, bboxes, weights
+    raise ValueError("Unknown merge method: {}, expected 'nms' or 'wbf'".format(method))
+
+
+def detect_tiled(net, img, tile_size=512, overlap=64, batch_size=4, merge='nms',
+                 iou_thresh=0.5, metric='ios', score_thresh=0.05, topk=-1, max_pending=20000,
+                 mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225), ctx=mx.cpu()):
+    """Detect objects in a large image at full resolution, by splitting it into
+    overlapping tiles.
+
+    Tiles are normalized like the preset val transforms, without resizing, and run
+    through the detector in batches. Detections are mapped back to image coordinates,
+    then duplicates of objects on tile seams are merged with class-aware NMS or
+    weighted box fusion.
+
+    Memory is bounded regardless of image size: only `batch_size` tiles are
+    converted at a time, so `img` can be a ``numpy.memmap``. Detections below
+    `score_thresh` are dropped, and pending detections are merged whenever they
+    exceed `max_pending`. Boxes fused by weighted box fusion keep the total score of
+    their cluster as weight for later merges, so that they are fused with further
+    detections like the detections they replace.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.HybridBlock
+        Detector returning `(ids, scores, bboxes)`, e.g. SSD or Faster-RCNN.
+    img : numpy.ndarray or mxnet.nd.NDArray
+        RGB image with shape `H, W, 3`.
+    tile_size : int or (int, int), default is 512
+        Tile size as (height, width), e.g. the data shape a SSD was trained with.
+    overlap : int, default is 64
+        Minimum overlap of neighboring tiles in pixels.
+    batch_size : int, default is 4
+        Number of tiles in a forward pass.
+    merge : str, default is 'nms'
+        'nms' for class-aware non-maximum suppression, 'wbf' for weighted box fusion.
+    iou_thresh : float, default is 0.5
+        Overlap threshold of merging.
+    metric : str, default is 'ios'
+        Overlap metric of merging. 'ios', intersection over the smaller area, also
+        merges parts of objects cut by tile borders into the complete detections from
+        neighboring tiles. 'iou' is the usual intersection over union.
+    score_thresh : float, default is 0.05
+        Detections with lower scores are dropped.
+    topk : int, default is -1
+        Maximum number of detections returned, -1 to return all.
+    max_pending : int, default is 20000
+        Number of pending detections which triggers merging.
+    mean : array-like of size 3
+        Mean pixel values to be subtracted from image tensor.
+    std : array-like of size 3
+        Standard deviation to be divided from image.
+    ctx : mx.Context, default is mx.cpu()
+        Context of the network.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Class ids with shape `N, 1`, scores with shape `N, 1` and boxes with shape
+        `N, 4` in image coordinates, in descending order of scores.
+
+    Examples
+    --------
+    >>> net = gluoncv.model_zoo.get_model('ssd_512_resnet50_v1_voc', pretrained=True)
+    >>> img = mx.image.imread('aerial.jpg')
+    >>> ids, scores, bboxes = detect_tiled(net, img, tile_size=512, overlap=128)
+
+    """
+    if isinstance(img, mx.nd.NDArray):
+        img = img.asnumpy()
+    height, width = img.shape[:2]
+    tile_h, tile_w = (tile_size, tile_size) if isinstance(tile_size, int) else tile_size
+    windows = tile_windows(height, width, (tile_h, tile_w), overlap)
+    mean = np.array(mean, dtype=np.float32).reshape(3, 1, 1)
+    std = np.array(std, dtype=np.float32).reshape(3, 1, 1)
+
+    pending = ([], [], [], [])
+    num_pending = 0
+    for i in range(0, len(windows), batch_size):
+        batch = windows[i:i + batch_size]
+        # pad tiles at image borders with the mean pixel, which is zero after normalizing,
+        # and the last batch with empty tiles, so that the network sees a single shape
+        data = np.zeros((batch_size, 3, tile_h, tile_w), dtype=np.float32)
+        for j, (y, x) in enumerate(batch):
+            tile = np.asarray(img[y:y + tile_h, x:x + tile_w], dtype=np.float32)
+            data[j, :, :tile.shape[0], :tile.shape[1]] = \
+                (tile.transpose((2, 0, 1)) / 255 - mean) / std
+        ids, scores, bboxes = [out.asnumpy() for out in net(mx.nd.array(data, ctx=ctx))]
+        for j, (y, x) in enumerate(batch):
+            valid = (ids[j, :, 0] >= 0) & (scores[j, :, 0] >= score_thresh)
+            boxes = bboxes[j, valid] + [x, y, x, y]
+            pending[0].append(ids[j, valid, 0])
+            pending[1].append(scores[j, valid, 0])
+            pending[2].append(np.clip(boxes, 0, [width, height, width, height]))
+            pending[3].append(scores[j, valid, 0])
+            num_pending += int(valid.sum())
+        if num_pending > max_pending:
+            merged = _merge(*([np.concatenate(p) for p in pending] +
+                            [merge, iou_thresh, -1, metric]))
+            pending = tuple([p] for p in merged)
+            num_pending = len(merged[1])
+    ids, scores, bboxes, _ = _merge(*([np.concatenate(p) for p in pending] +
+                                      [merge, iou_thresh, topk, metric]))
+    return ids.reshape(-1, 1), scores.reshape(-1, 1), bboxes.reshape(-1, 4)
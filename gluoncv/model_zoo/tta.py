@@ -0,0 +1,176 @@
+"""Test-time augmentation of detectors."""
+from __future__ import absolute_import, division
+
+import inspect
+import numpy as np
+import mxnet as mx
+from mxnet.gluon import Block, HybridBlock
+from ..utils.bbox import bbox_iou
+
+__all__ = ['DetectionTTA']
+
+
+def _im_size_index(net):
+    """Position of the `im_size` argument of `net` after the data, or None if absent."""
+    hybrid = isinstance(net, HybridBlock)
+    func = net.hybrid_forward if hybrid else net.forward
+    try:
+        names = list(inspect.signature(func).parameters)
+    except AttributeError:
+        names = inspect.getargspec(func).args[1:]
+    if 'im_size' not in names:
+        return None
+    # skip F of hybrid_forward and the data
+    return names.index('im_size') - (2 if hybrid else 1)
+
+
+class DetectionTTA(Block):
+    """Flip and multi-scale test-time augmentation of a detector, like
+    :py:class:`gluoncv.model_zoo.segbase.MultiEvalModel` for segmentation.
+
+    All augmented views of a batch are padded into a single batch and run in one
+    forward pass. Boxes are mapped back to the input with vectorized operations,
+    then detections of all views of an image are fused by a single NMS, optionally
+    followed by box voting, which replaces each kept box by the score-weighted
+    average of the boxes it suppressed.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.Block
+        Detector returning `(ids, scores, bboxes)` with the batch axis first, e.g.
+        SSD or Faster-RCNN. If it takes an `im_size` argument, like Faster-RCNN, it
+        gets the valid (height, width) of each view, so padding is excluded from
+        proposals and boxes are clipped to each view.
+    scales : iterable of float, default is (1.0,)
+        Resize factors of views.
+    flip : bool, default is True
+        Whether to add horizontally flipped views.
+    nms_thresh : float, default is 0.5
+        Overlap threshold of fusing NMS.
+    nms_topk : int, default is -1
+        Number of detections of an image considered by fusing NMS, -1 for all.
+    post_nms : int, default is 100
+        Maximum number of detections returned per image, -1 for all.
+    vote_thresh : float, default is None
+        If set, each kept box is replaced by the score-weighted average of the boxes
+        of its class overlapping it by more than `vote_thresh`.
+
+    Examples
+    --------
+    >>> net = gluoncv.model_zoo.get_model('ssd_512_resnet50_v1_voc', pretrained=True)
+    >>> tta = DetectionTTA(net, scales=(0.75, 1.0, 1.25), flip=True)
+    >>> ids, scores, bboxes = tta(x)
+
+    """
+    def __init__(self, net, scales=(1.0,), flip=True, nms_thresh=0.5, nms_topk=-1,
+                 post_nms=100, vote_thresh=None, **kwargs):
+        super(DetectionTTA, self).__init__(**kwargs)
+        self.net = net
+        self._scales = tuple(scales)
+        self._flip = flip
+        self._nms_thresh = nms_thresh
+        self._nms_topk = nms_topk
+        self._post_nms = post_nms
+        self._vote_thresh = vote_thresh
+        self._im_size_index = _im_size_index(net)
+
+    @property
+    def num_views(self):
+        """Number of augmented views of an image."""
+        return len(self._scales) * (2 if self._flip else 1)
+
+    def _views(self, x, sizes):
+        """Augmented views of each image, and their (scale_x, scale_y, flip, width)."""
+        views, meta = [], []
+        for img, (height, width) in zip(x, sizes):
+            img = img.expand_dims(0)[:, :, :height, :width]
+            for scale in self._scales:
+                h, w = int(height * scale + 0.5), int(width * scale + 0.5)
+                view = img if (h, w) == (height, width) else \
+                    mx.nd.contrib.BilinearResize2D(img, height=h, width=w)
+                views.append(view)
+                meta.append((w / width, h / height, 0, w))
+                if self._flip:
+                    views.append(view.flip(axis=3))
+                    meta.append((w / width, h / height, 1, w))
+        return views, meta
+
+    def forward(self, x, sizes=None):
+        """Detect on augmented views of `x`.
+
+        Parameters
+        ----------
+        x : mxnet.nd.NDArray
+            Input images with shape `B, C, H, W`, e.g. from preset val transforms.
+        sizes : mxnet.nd.NDArray or numpy.ndarray, optional
+            Valid (height, width) of each image with shape `B, 2`, if images are padded
+            in a batch. Padding is excluded from views.
+
+        Returns
+        -------
+        (mxnet.nd.NDArray, mxnet.nd.NDArray, mxnet.nd.NDArray)
+            Class ids with shape `B, N, 1`, scores with shape `B, N, 1` and boxes with
+            shape `B, N, 4` in coordinates of `x`. Missing detections are padded with -1.
+
+        """
+        batch_size, channels = x.shape[:2]
+        if sizes is None:
+            sizes = [x.shape[2:]] * batch_size
+        elif isinstance(sizes, mx.nd.NDArray):
+            sizes = sizes.asnumpy()
+        sizes = [(int(h), int(w)) for h, w in np.asarray(sizes).reshape(-1, 2)]
+        views, meta = self._views(x, sizes)
+
+        # pad all views to one batch, padding is zero which is the mean pixel
+        height = max(v.shape[2] for v in views)
+        width = max(v.shape[3] for v in views)
+        data = mx.nd.zeros((len(views), channels, height, width), ctx=x.context, dtype=x.dtype)
+        for i, view in enumerate(views):
+            data[i, :, :view.shape[2], :view.shape[3]] = view[0]
+        if self._im_size_index is None:
+            ids, scores, bboxes = self.net(data)
+        else:
+            im_size = mx.nd.array([v.shape[2:] for v in views], ctx=x.context)
+            args = [None] * self._im_size_index + [im_size]
+            ids, scores, bboxes = self.net(data, *args)
+
+        # undo flip and resize of all views at once
+        meta = mx.nd.array(meta, ctx=bboxes.context).reshape((-1, 1, 4))
+        scale_x, scale_y, flipped, view_width = mx.nd.split(meta, num_outputs=4, axis=-1)
+        xmin, ymin, xmax, ymax = mx.nd.split(bboxes, num_outputs=4, axis=-1)
+        xmin, xmax = (mx.nd.where(flipped.broadcast_like(xmin), view_width - xmax, xmin),
+                      mx.nd.where(flipped.broadcast_like(xmax), view_width - xmin, xmax))
+        bboxes = mx.nd.concat(mx.nd.broadcast_div(xmin, scale_x),
+                              mx.nd.broadcast_div(ymin, scale_y),
+                              mx.nd.broadcast_div(xmax, scale_x),
+                              mx.nd.broadcast_div(ymax, scale_y), dim=-1)
+
+        # views of an image are consecutive, fuse them with a single batched NMS
+        dets = mx.nd.concat(ids, scores, bboxes, dim=-1).reshape(
+            (batch_size, -1, 6))
+        result = mx.nd.contrib.box_nms(
+            dets, overlap_thresh=self._nms_thresh, topk=self._nms_topk, id_index=0,
+            score_index=1, coord_start=2, force_suppress=False)
+        if 0 < self._post_nms < result.shape[1]:
+            result = result.slice_axis(axis=1, begin=0, end=self._post_nms)
+        if self._vote_thresh is not None:
+            result = self._vote(result, dets)
+        ids = result.slice_axis(axis=2, begin=0, end=1)
+        scores = result.slice_axis(axis=2, begin=1, end=2)
+        bboxes = result.slice_axis(axis=2, begin=2, end=6)
+        return ids, scores, bboxes
+
+    def _vote(self, result, dets):
+        """Replace kept boxes by the score-weighted average of overlapping boxes."""
+        result_np, dets_np = result.asnumpy(), dets.asnumpy()
+        for res, det in zip(result_np, dets_np):
+            keep = np.where(res[:, 0] >= 0)[0]
+            det = det[(det[:, 0] >= 0) & (det[:, 1] > 0)]
+            if not keep.size or not det.shape[0]:
+                continue
+            iou = bbox_iou(res[keep, 2:6], det[:, 2:6])
+            weights = (iou > self._vote_thresh) * (res[keep, :1] == det[:, 0]) * det[:, 1]
+            # a kept box always votes for itself
+            weights = np.maximum(weights, 1e-12 * (iou > 1 - 1e-6))
+            res[keep, 2:6] = np.dot(weights, det[:, 2:6]) / weights.sum(axis=1, keepdims=True)
+        return mx.nd.array(result_np, ctx=result.context, dtype=result.dtype)
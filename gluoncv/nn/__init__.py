@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 
 from . import bbox
+from . import checkpoint
 from . import coder
 from . import feature
 from . import predictor
@@ -2,6 +2,8 @@
 """Bounding boxes operators"""
 from __future__ import absolute_import
 
+import threading
+from collections import OrderedDict
 from mxnet import gluon
 
 
@@ -122,3 +124,154 @@ class BBoxArea(gluon.HybridBlock):
         width = F.where(width > 0, width, F.zeros_like(width))
         height = F.where(height > 0, height, F.zeros_like(height))
         return width * height
+
+
+class BBoxBatchGather(gluon.HybridBlock):
+    """Gather boxes (or any per-box rows) of each image in a batch by index.
+
+    Parameters
+    ----------
+    max_batch : int, default is 4096
+        Maximum supported batch size. Batch indices are sliced from a
+        pre-computed range, so the operation stays hybridizable for any batch
+        size up to `max_batch`.
+
+    Inputs:
+        - **data**: BxNxM NDArray of per-box rows, e.g. M=4 for box coordinates.
+        - **indices**: BxK NDArray of indices in range [0, N).
+
+    Returns
+    -------
+    A BxKxM NDArray, which is `data[b, indices[b, k], :]`.
+
+    """
+    def __init__(self, max_batch=4096, **kwargs):
+        super(BBoxBatchGather, self).__init__(**kwargs)
+        self._max_batch = max_batch
+
+    def hybrid_forward(self, F, data, indices):
+        batch_ids = F.slice_like(
+            F.arange(0, self._max_batch).reshape((-1, 1)), indices, axes=(0,))
+        batch_ids = F.broadcast_add(F.zeros_like(indices), batch_ids)
+        return F.gather_nd(data, F.stack(batch_ids, indices, axis=0))
+
+
+class BBoxClipToImage(gluon.HybridBlock):
+    """Clip bounding box coordinates to image boundaries.
+
+    Coordinates are clipped to [0, width - 1] and [0, height - 1], where width
+    and height are inferred from the image tensor, or given per image if images
+    are padded in a batch. Only native operators are used, so the block can be
+    hybridized and exported without Python callbacks.
+
+    Parameters
+    ----------
+    axis : int, default is -1
+        The coordinate axis with length 4.
+    max_size : int, default is 16384
+        Maximum supported image width and height. Image sizes are sliced from a
+        pre-computed range.
+
+    Inputs:
+        - **x**: NDArray of corner boxes (xmin, ymin, xmax, ymax) along `axis`.
+        - **img**: BxCxHxW image tensor.
+        - **im_size**: optional Bx2 valid (height, width) of each image. Boxes of
+          shape BxNx4 are then clipped to the image they belong to.
+
+    Returns
+    -------
+    Clipped boxes with the same shape as `x`.
+
+    """
+    def __init__(self, axis=-1, max_size=16384, **kwargs):
+        super(BBoxClipToImage, self).__init__(**kwargs)
+        self._axis = axis
+        self._max_size = max_size
+
+    def hybrid_forward(self, F, x, img, im_size=None):
+        if im_size is not None:
+            # (width - 1, height - 1) twice as the window of each image
+            window = F.tile(F.reverse(F.cast(im_size, 'float32'), axis=1) - 1, reps=(1, 2))
+            return F.broadcast_minimum(F.maximum(x, 0), window.expand_dims(1))
+        window = F.arange(0, self._max_size)
+        width = F.slice_like(window.reshape((1, 1, 1, -1)), img, axes=(3,)).max()
+        height = F.slice_like(window.reshape((1, 1, -1, 1)), img, axes=(2,)).max()
+        xmin, ymin, xmax, ymax = F.split(F.maximum(x, 0), axis=self._axis, num_outputs=4)
+        xmin = F.broadcast_minimum(xmin, width)
+        ymin = F.broadcast_minimum(ymin, height)
+        xmax = F.broadcast_minimum(xmax, width)
+        ymax = F.broadcast_minimum(ymax, height)
+        return F.concat(xmin, ymin, xmax, ymax, dim=self._axis)
+
+
+class AnchorCache(object):
+    """Thread-safe least-recently-used cache of anchors computed for an input shape.
+
+    Anchors only depend on the spatial size of the input, so imperative inference
+    on a few fixed resolutions can skip slicing and concatenating anchor maps.
+    Anchors are cached in both corner and center forms, so that decoders do not
+    convert them on every call either. Hybridized networks run their graph as a
+    whole and do not use this cache.
+
+    Parameters
+    ----------
+    max_size : int, default is 8
+        Maximum number of cached entries, the least recently used entry is evicted
+        first. Use 0 to disable caching.
+    center : bool, default is False
+        Whether anchors computed on cache miss are center boxes, otherwise corner
+        boxes.
+
+    """
+    def __init__(self, max_size=8, center=False):
+        self._max_size = max_size
+        self._center = center
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def get(self, key, fn):
+        """Return the cached anchors of `key`, or compute them with `fn()` and cache
+        them.
+
+        Parameters
+        ----------
+        key : hashable
+            Cache key, usually input (H, W), context and dtype.
+        fn : callable
+            Function without arguments computing the anchors on cache miss.
+
+        Returns
+        -------
+        (mxnet.nd.NDArray, mxnet.nd.NDArray)
+            Anchors in corner and center forms.
+
+        """
+        with self._lock:
+            value = self._cache.pop(key, None)
+            if value is not None:
+                self._cache[key] = value
+                return value
+        anchors = fn()
+        if self._center:
+            value = (BBoxCenterToCorner()(anchors), anchors)
+        else:
+            value = (anchors, BBoxCornerToCenter()(anchors))
+        if self._max_size <= 0:
+            return value
+        with self._lock:
+            self._cache.pop(key, None)
+            while len(self._cache) >= self._max_size:
+                self._cache.popitem(last=False)
+            self._cache[key] = value
+        return value
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._cache.clear()
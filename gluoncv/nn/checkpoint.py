@@ -0,0 +1,135 @@
+"""Gradient checkpointing, which recomputes activations in backward instead of
+storing them."""
+from __future__ import absolute_import
+
+import mxnet as mx
+from mxnet import autograd
+from mxnet.gluon import HybridBlock
+from mxnet.gluon.parameter import DeferredInitializationError
+
+__all__ = ['checkpoint', 'checkpoint_sequential', 'CheckpointStagesBlock']
+
+
+class _Recompute(autograd.Function):
+    """Run a block without recording its graph, then record and differentiate it
+    again in backward."""
+    def __init__(self, block, training):
+        super(_Recompute, self).__init__()
+        self._block = block
+        self._training = training
+
+    def forward(self, x):
+        self.save_for_backward(x)
+        # running statistics of batchnorm are updated by forward or backward, depending
+        # on the backend, reset them before recomputation so that they are updated once
+        self._states = [(p, p.data(x.context).copy()) for p in
+                        self._block.collect_params().values() if p.grad_req == 'null']
+        with autograd.train_mode() if self._training else autograd.predict_mode():
+            return self._block(x)
+
+    def backward(self, dy):
+        x, = self.saved_tensors
+        x = x.detach()
+        x.attach_grad()
+        for param, data in self._states:
+            data.copyto(param.data(x.context))
+        with autograd.record(train_mode=self._training):
+            y = self._block(x)
+        autograd.backward(y, head_grads=dy)
+        # the outer backward is not ordered after operations pushed by this callback,
+        # so the recomputation has to finish before returning
+        for param in self._block.collect_params().values():
+            if param.grad_req != 'null':
+                param.grad(x.context).wait_to_read()
+        x.grad.wait_to_read()
+        return x.grad
+
+
+def checkpoint(block, x):
+    """Run `block` on `x` without storing its intermediate activations, which are
+    recomputed in backward.
+
+    The block must be deterministic, and its parameter gradients are written by the
+    recomputation. Checkpointing only applies when recording with NDArrays, otherwise
+    `block` is simply called.
+
+    Parameters
+    ----------
+    block : mxnet.gluon.Block
+        Block with a single input and output.
+    x : mxnet.nd.NDArray or mxnet.symbol
+        Input of `block`.
+
+    Returns
+    -------
+    mxnet.nd.NDArray or mxnet.symbol
+        Output of `block`.
+
+    """
+    if not isinstance(x, mx.nd.NDArray) or not autograd.is_recording():
+        return block(x)
+    return _Recompute(block, autograd.is_training())(x)
+
+
+def checkpoint_sequential(blocks, x):
+    """Run sequential `blocks` with :py:func:`checkpoint` on each of them, so that
+    only their inputs are stored for backward.
+
+    Parameters
+    ----------
+    blocks : mxnet.gluon.nn.HybridSequential or mxnet.gluon.nn.Sequential
+        Blocks to run in order.
+    x : mxnet.nd.NDArray or mxnet.symbol
+        Input of the first block.
+
+    Returns
+    -------
+    mxnet.nd.NDArray or mxnet.symbol
+        Output of the last block.
+
+    """
+    if not isinstance(x, mx.nd.NDArray) or not autograd.is_recording():
+        return blocks(x)
+    for i in range(len(blocks)):
+        x = checkpoint(blocks[i], x)
+    return x
+
+
+class CheckpointStagesBlock(HybridBlock):
+    """Base block of networks whose stages can be checkpointed, e.g. backbones.
+
+    Stages are run with :py:meth:`_stage_forward` in `hybrid_forward`. When recording,
+    a hybridized network runs its own forward imperatively, because recomputation is
+    driven from python, while its stages keep their cached graphs. Otherwise, e.g. at
+    inference, the whole network runs as a single cached graph.
+
+    Parameters
+    ----------
+    checkpoint_stages : iterable of int, default ()
+        Indices of stages whose activations are recomputed in backward.
+
+    """
+    def __init__(self, checkpoint_stages=(), **kwargs):
+        super(CheckpointStagesBlock, self).__init__(**kwargs)
+        self._checkpoint_stages = tuple(checkpoint_stages)
+
+    def forward(self, x, *args):
+        if not (self._active and self._checkpoint_stages and
+                isinstance(x, mx.nd.NDArray) and autograd.is_recording()):
+            return super(CheckpointStagesBlock, self).forward(x, *args)
+        with x.context:
+            try:
+                params = {k: v.data(x.context) for k, v in self._reg_params.items()}
+            except DeferredInitializationError:
+                self._deferred_infer_shape(x, *args)
+                for param in self.params.values():
+                    param._finish_deferred_init()
+                params = {k: v.data(x.context) for k, v in self._reg_params.items()}
+            return self.hybrid_forward(mx.nd, x, *args, **params)
+
+    def _stage_forward(self, index, stage, x):
+        """Run `stage`, with :py:func:`checkpoint_sequential` if `index` is one of
+        the checkpointed stages."""
+        if index in self._checkpoint_stages:
+            return checkpoint_sequential(stage, x)
+        return stage(x)
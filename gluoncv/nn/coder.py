@@ -235,6 +235,19 @@ class MultiPerClassDecoder(gluon.HybridBlock):
         self._axis = axis
         self._thresh = thresh
 
+    def set_thresh(self, thresh):
+        """Set the confidence threshold of post-softmax scores.
+
+        Parameters
+        ----------
+        thresh : float
+            Scores less than `thresh` are marked with `0`, and their `cls_id` with `-1`.
+
+        """
+        self._thresh = thresh
+        # the threshold is a constant of the cached graph
+        self._clear_cached_op()
+
     def hybrid_forward(self, F, x):
         scores = x.slice_axis(axis=self._axis, begin=1, end=None)  # b x N x fg_class
         template = F.zeros_like(x.slice_axis(axis=-1, begin=0, end=1))
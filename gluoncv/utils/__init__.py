@@ -1,17 +1,22 @@
 """GluonCV Utility functions."""
 from __future__ import absolute_import
 
-from .download import download
-from .filesystem import makedirs
-from . import bbox
-from .bbox import bbox_iou
-from .block import recursive_visit, set_lr_mult, freeze_bn
-from . import viz
-from . import random
-from . import metrics
+from .._lazy import lazy_module
 
-from .lr_scheduler import PolyLRScheduler
-from .metrics.voc_segmentation import batch_pix_accuracy, batch_intersection_union
-from . import parallel
-
-from .plot_history import TrainingHistory
+# members are imported on first access, so that e.g. `utils.bbox` does not
+# import matplotlib or mxnet
+lazy_module(__name__, submodules=[
+    'bbox', 'block', 'filesystem', 'loss_scaler', 'lr_scheduler', 'metrics', 'parallel',
+    'params', 'plot_history', 'quantization', 'random', 'serving', 'video', 'viz'], attributes={
+        '.download': ['download'],
+        '.filesystem': ['makedirs'],
+        '.bbox': ['bbox_iou'],
+        '.block': ['recursive_visit', 'set_lr_mult', 'freeze_bn', 'fuse_bn'],
+        '.quantization': ['quantize_net'],
+        '.params': ['load_params_mmap'],
+        '.serving': ['BatchServer'],
+        '.lr_scheduler': ['PolyLRScheduler'],
+        '.loss_scaler': ['DynamicLossScaler'],
+        '.metrics.voc_segmentation': ['batch_pix_accuracy', 'batch_intersection_union'],
+        '.plot_history': ['TrainingHistory'],
+    })
@@ -140,3 +140,133 @@ def bbox_clip_xyxy(xyxy, width, height):
     else:
         raise TypeError(
             'Expect input xywh a list, tuple or numpy.ndarray, given {}'.format(type(xyxy)))
+
+def _class_offset(bboxes, labels):
+    """Shift boxes of different classes apart, so that they never overlap."""
+    if labels is None or not len(bboxes):
+        return bboxes
+    offset = bboxes[:, :4].max() - min(bboxes[:, :4].min(), 0) + 1
+    return bboxes[:, :4] + (np.asarray(labels).reshape(-1, 1) * offset)
+
+def _bbox_overlap(bbox_a, bbox_b, metric):
+    """Overlap of boxes as 'iou', or 'ios' for intersection over the smaller area."""
+    if metric == 'iou':
+        return bbox_iou(bbox_a, bbox_b)
+    if metric != 'ios':
+        raise ValueError("Unknown overlap metric: {}, expected 'iou' or 'ios'".format(metric))
+    tl = np.maximum(bbox_a[:, None, :2], bbox_b[:, :2])
+    br = np.minimum(bbox_a[:, None, 2:4], bbox_b[:, 2:4])
+    area_i = np.prod(br - tl, axis=2) * (tl < br).all(axis=2)
+    area_a = np.prod(bbox_a[:, 2:4] - bbox_a[:, :2], axis=1)
+    area_b = np.prod(bbox_b[:, 2:4] - bbox_b[:, :2], axis=1)
+    return area_i / np.maximum(np.minimum(area_a[:, None], area_b), np.finfo(np.float64).eps)
+
+def bbox_nms(bboxes, scores, labels=None, iou_thresh=0.5, topk=-1, metric='iou'):
+    """Non-maximum suppression of bounding boxes with format (xmin, ymin, xmax, ymax).
+
+    Parameters
+    ----------
+    bboxes : numpy.ndarray
+        Bounding boxes with shape `N, 4`.
+    scores : numpy.ndarray
+        Scores with shape `N`.
+    labels : numpy.ndarray, optional
+        Class labels with shape `N`. If provided, only boxes of the same class
+        suppress each other.
+    iou_thresh : float, default is 0.5
+        Boxes overlapping a kept box with higher score by more than `iou_thresh`
+        are suppressed.
+    topk : int, default is -1
+        Maximum number of kept boxes, -1 to keep all.
+    metric : str, default is 'iou'
+        Overlap metric, 'iou' or 'ios' for intersection over the smaller area, which
+        also suppresses boxes contained in others, e.g. objects cut by tile borders.
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of kept boxes, in descending order of scores.
+
+    """
+    scores = np.asarray(scores).reshape(-1)
+    bboxes = _class_offset(np.asarray(bboxes, dtype=np.float64), labels)
+    order = np.argsort(-scores, kind='mergesort')
+    keep = []
+    while order.size > 0 and (topk < 0 or len(keep) < topk):
+        i = order[0]
+        keep.append(i)
+        iou = _bbox_overlap(bboxes[i:i + 1], bboxes[order[1:]], metric)[0]
+        order = order[1:][iou <= iou_thresh]
+    return np.array(keep, dtype=np.int64)
+
+def bbox_weighted_fusion(bboxes, scores, labels=None, iou_thresh=0.55, metric='iou'):
+    """Weighted box fusion: clusters of overlapping boxes are replaced by their
+    score-weighted average box, with the highest score of the cluster.
+
+    Unlike NMS, which keeps one box of a cluster, all boxes contribute to the
+    location of the fused box.
+
+    Parameters
+    ----------
+    bboxes : numpy.ndarray
+        Bounding boxes with shape `N, 4`.
+    scores : numpy.ndarray
+        Scores with shape `N`.
+    labels : numpy.ndarray, optional
+        Class labels with shape `N`. If provided, only boxes of the same class
+        are fused.
+    iou_thresh : float, default is 0.55
+        Boxes overlapping the fused box of a cluster by more than `iou_thresh`
+        join the cluster.
+    metric : str, default is 'iou'
+        Overlap metric, 'iou' or 'ios' for intersection over the smaller area.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Fused boxes with shape `M, 4`, scores with shape `M` and labels with shape
+        `M`, or None if `labels` is None, in descending order of scores.
+
+    """
+    bboxes, scores, _, labels = _weighted_fusion(bboxes, scores, None, labels,
+                                                 iou_thresh, metric)
+    return bboxes, scores, labels
+
+def _weighted_fusion(bboxes, scores, weights, labels, iou_thresh, metric):
+    """Weighted box fusion of boxes with a fusion weight each, which defaults to their
+    score. Fused boxes are returned with the sum of the weights of their cluster, so
+    that they can be fused again with further boxes, as if their clusters were."""
+    bboxes = np.asarray(bboxes, dtype=np.float64)[:, :4]
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    weights = scores if weights is None else np.asarray(weights, dtype=np.float64).reshape(-1)
+    classes = np.zeros(len(scores)) if labels is None else np.asarray(labels).reshape(-1)
+    out_boxes, out_scores, out_weights, out_labels = [], [], [], []
+    for cls_id in np.unique(classes):
+        idx = np.where(classes == cls_id)[0]
+        idx = idx[np.argsort(-scores[idx], kind='mergesort')]
+        fused, cluster_weights, best = [], [], []
+        for i in idx:
+            if fused:
+                iou = _bbox_overlap(bboxes[i:i + 1], np.array(fused) /
+                                    np.array(cluster_weights)[:, None], metric)[0]
+                j = int(np.argmax(iou))
+                if iou[j] > iou_thresh:
+                    fused[j] += bboxes[i] * weights[i]
+                    cluster_weights[j] += weights[i]
+                    best[j] = max(best[j], scores[i])
+                    continue
+            fused.append(bboxes[i] * weights[i])
+            cluster_weights.append(weights[i])
+            best.append(scores[i])
+        if fused:
+            out_boxes.append(np.array(fused) / np.array(cluster_weights)[:, None])
+            out_scores.append(np.array(best))
+            out_weights.append(np.array(cluster_weights))
+            out_labels.append(np.full(len(best), cls_id))
+    if not out_boxes:
+        return (np.zeros((0, 4)), np.zeros((0,)), np.zeros((0,)),
+                None if labels is None else np.zeros((0,)))
+    out_boxes, out_scores = np.concatenate(out_boxes), np.concatenate(out_scores)
+    order = np.argsort(-out_scores, kind='mergesort')
+    out_labels = None if labels is None else np.concatenate(out_labels)[order]
+    return out_boxes[order], out_scores[order], np.concatenate(out_weights)[order], out_labels
@@ -1,6 +1,9 @@
 """Utility functions for gluon parameters."""
 import re
-from mxnet.gluon.nn import BatchNorm
+import json
+import mxnet as mx
+from mxnet.gluon import HybridBlock, SymbolBlock
+from mxnet.gluon.nn import BatchNorm, Conv2D
 
 def recursive_visit(net, callback, **kwargs):
     """Recursively visit and apply callback to a net and its sub-net
@@ -66,3 +69,190 @@ def freeze_bn(net, use_global_stats=True):
 
     """
     recursive_visit(net, _freeze_bn_callback, use_global_stats=use_global_stats)
+
+
+class _Identity(HybridBlock):
+    """Identity block replacing folded BatchNorm layers."""
+    def hybrid_forward(self, F, x):
+        return x
+
+def _graph(net):
+    """Json graph of a network with a single input."""
+    out = net(mx.sym.var('data'))
+    if isinstance(out, (list, tuple)):
+        out = mx.sym.Group(list(out))
+    return json.loads(out.tojson())
+
+def _conv_bn_pairs(graph):
+    """Find (conv, bn) node indices where the BatchNorm is the only consumer of the
+    convolution."""
+    nodes = graph['nodes']
+    consumers = [0] * len(nodes)
+    for node in nodes:
+        for inp in node['inputs']:
+            consumers[inp[0]] += 1
+    for head in graph['heads']:
+        consumers[head[0]] += 1
+    names = [node['name'] for node in nodes]
+    pairs = []
+    for i, node in enumerate(nodes):
+        if node['op'] != 'BatchNorm':
+            continue
+        conv_id = node['inputs'][0][0]
+        conv = nodes[conv_id]
+        if conv['op'] != 'Convolution' or consumers[conv_id] != 1:
+            continue
+        if names.count(conv['name']) != 1 or names.count(node['name']) != 1:
+            continue  # blocks shared in multiple places
+        pairs.append((conv_id, i))
+    return pairs
+
+def _folded(weight, bias, gamma, beta, mean, var, eps, fix_gamma):
+    """Convolution weight and bias with BatchNorm statistics folded in."""
+    if fix_gamma:
+        gamma = mx.nd.ones_like(gamma)
+    scale = gamma / mx.nd.sqrt(var + eps)
+    if bias is None:
+        bias = mx.nd.zeros_like(beta)
+    return (mx.nd.broadcast_mul(weight, scale.reshape((-1, 1, 1, 1))),
+            (bias - mean) * scale + beta)
+
+def _fold_bn(conv, bn):
+    """Fold BatchNorm statistics into weight and bias of the preceding convolution."""
+    ctx = conv.weight.list_ctx()[0]
+    weight = conv.weight.data(ctx)
+    bias = None if conv.bias is None else conv.bias.data(ctx)
+    weight, bias = _folded(weight, bias, *([p.data(ctx) for p in (
+        bn.gamma, bn.beta, bn.running_mean, bn.running_var)] +
+                                           [bn._kwargs['eps'], bn._kwargs['fix_gamma']]))
+    if conv.bias is None:
+        # add a bias to hold the folded shift
+        conv._kwargs['no_bias'] = False
+        conv.bias = conv.params.get('bias', shape=(weight.shape[0],),
+                                    init='zeros', dtype=weight.dtype)
+        conv.bias.initialize(ctx=conv.weight.list_ctx())
+    conv.weight.set_data(weight)
+    conv.bias.set_data(bias)
+
+def _is_true(value):
+    return str(value).lower() in ('true', '1')
+
+def _fuse_symbol_block(block):
+    """Fold BatchNorm operators into preceding convolutions in the graph of a
+    SymbolBlock, e.g. backbones of detectors built from symbols. Returns whether
+    any was folded."""
+    inputs, out = block._cached_graph
+    graph = json.loads(out.tojson())
+    nodes = graph['nodes']
+    params = block.params
+    bn_to_conv = {}
+    for conv_id, bn_id in _conv_bn_pairs(graph):
+        conv, bn = nodes[conv_id], nodes[bn_id]
+        conv_attrs, bn_attrs = conv.get('attrs', {}), bn.get('attrs', {})
+        if conv_attrs.get('layout', 'NCHW') not in ('NCHW', 'None') or \
+                int(bn_attrs.get('axis', 1)) != 1 or \
+                _is_true(bn_attrs.get('output_mean_var', False)):
+            continue
+        names = [nodes[inp[0]]['name'] for inp in conv['inputs'][1:] + bn['inputs'][1:]]
+        if any(name not in params.keys() for name in names):
+            continue  # parameters given as inputs
+        no_bias = _is_true(conv_attrs.get('no_bias', False))
+        weight = params[names[0]]
+        ctx = weight.list_ctx()[0]
+        bias = None if no_bias else params[names[1]].data(ctx)
+        stats = [params[name].data(ctx) for name in names[-4:]]
+        weight_data, bias_data = _folded(
+            weight.data(ctx), bias, *(stats + [float(bn_attrs.get('eps', 1e-3)),
+                                               _is_true(bn_attrs.get('fix_gamma', True))]))
+        weight.set_data(weight_data)
+        if no_bias:
+            # add a bias to hold the folded shift
+            bias_param = params.get(conv['name'] + '_bias', shape=bias_data.shape,
+                                    init='zeros', dtype=weight_data.dtype)
+            bias_param.initialize(ctx=weight.list_ctx())
+            bias_param.set_data(bias_data)
+            nodes.append({'op': 'null', 'name': bias_param.name, 'inputs': []})
+            conv['inputs'].append([len(nodes) - 1, 0, 0])
+            conv.setdefault('attrs', {})['no_bias'] = 'False'
+        else:
+            params[names[1]].set_data(bias_data)
+        bn_to_conv[bn_id] = conv_id
+    if not bn_to_conv:
+        return False
+    # consumers of folded BatchNorm layers read their convolution instead
+    for entry in [inp for node in nodes for inp in node['inputs']] + graph['heads']:
+        entry[0] = bn_to_conv.get(entry[0], entry[0])
+    out = mx.sym.load_json(json.dumps(graph))
+    block._cached_graph = inputs, out
+    # drop parameters of removed BatchNorm layers, and register added biases
+    used = set(out.list_arguments() + out.list_auxiliary_states())
+    prefix = min([len(p.name) - len(k) for k, p in block._reg_params.items()] or [0])
+    for name in list(params.keys()):
+        if name not in used:
+            del params._params[name]
+    block._reg_params = {name[prefix:]: params[name] for name in params.keys()}
+    return True
+
+def fuse_bn(net):
+    """Fold inference BatchNorm layers into preceding convolutions.
+
+    Each `BatchNorm` whose input is only consumed by it and comes from a `Conv2D`
+    in NCHW layout is folded into the convolution weight and bias using its running
+    statistics, then replaced by an identity block. Convolution and BatchNorm
+    operators in the graphs of `SymbolBlock`, e.g. backbones of detectors built from
+    symbols, are folded likewise. Outputs in inference mode are
+    numerically equivalent, while the graph has one less operator for each folded
+    layer. The network must not be trained afterwards.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.HybridBlock
+        The network to be fused, with a single input. Parameters must be initialized
+        with known shapes, e.g. after a forward pass.
+
+    Returns
+    ------
+    mxnet.gluon.HybridBlock
+        Original network with BatchNorm layers folded.
+
+    """
+    # map operator names to (block, parent, key in parent's children)
+    blocks = {}
+    def _collect(parent):
+        for key, child in parent._children.items():
+            blocks[child.prefix + 'fwd'] = (child, parent, key)
+            _collect(child)
+    _collect(net)
+    # symbol blocks have no children, their graphs are rewritten instead
+    symbol_blocks = []
+    recursive_visit(net, lambda block: symbol_blocks.append(block)
+                    if isinstance(block, SymbolBlock) else None)
+    for block in symbol_blocks:
+        while _fuse_symbol_block(block):
+            pass
+    # a convolution followed by several BatchNorm layers folds them one per pass
+    folded = True
+    while folded:
+        folded = False
+        graph = _graph(net)
+        names = [node['name'] for node in graph['nodes']]
+        for conv_id, bn_id in _conv_bn_pairs(graph):
+            conv_name, bn_name = names[conv_id], names[bn_id]
+            if conv_name not in blocks or bn_name not in blocks:
+                continue
+            conv = blocks[conv_name][0]
+            bn, parent, key = blocks[bn_name]
+            if not isinstance(conv, Conv2D) or not isinstance(bn, BatchNorm) or \
+                    conv._kwargs['layout'] != 'NCHW' or bn._kwargs['axis'] != 1:
+                continue
+            _fold_bn(conv, bn)
+            identity = _Identity(prefix=bn.prefix)
+            # bypass the attribute type check of Block.__setattr__
+            parent._children[key] = identity
+            if parent.__dict__.get(key) is bn:
+                parent.__dict__[key] = identity
+            del blocks[bn_name]
+            folded = True
+    # drop cached graphs built with BatchNorm layers
+    net.hybridize(net._active)
+    return net
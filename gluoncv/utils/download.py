@@ -4,8 +4,14 @@ import requests
 from tqdm import tqdm
 from mxnet.gluon.utils import check_sha1
 
+_CHUNK_SIZE = 1024 * 1024
+
 def download(url, path=None, overwrite=False, sha1_hash=None):
     """Download an given URL
+
+    Files are downloaded to `path.part` first. An interrupted download is resumed
+    from the partial file with a HTTP range request.
+
     Parameters
     ----------
     url : str
@@ -37,22 +43,34 @@ def download(url, path=None, overwrite=False, sha1_hash=None):
         if not os.path.exists(dirname):
             os.makedirs(dirname)
 
+        # download to a partial file first, an interrupted download is resumed
+        # with a range request next time
+        part_fname = fname + '.part'
+        offset = os.path.getsize(part_fname) if os.path.exists(part_fname) else 0
         print('Downloading %s from %s...'%(fname, url))
-        r = requests.get(url, stream=True)
-        if r.status_code != 200:
+        r = requests.get(url, stream=True,
+                         headers={'Range': 'bytes=%d-' % offset} if offset else None)
+        if offset and r.status_code == 416:
+            # range not satisfiable, the partial file is invalid
+            os.remove(part_fname)
+            offset = 0
+            r = requests.get(url, stream=True)
+        if r.status_code == 200:
+            offset = 0  # server ignored the range request
+        elif r.status_code != 206 or not offset:
             raise RuntimeError("Failed downloading url %s"%url)
         total_length = r.headers.get('content-length')
-        with open(fname, 'wb') as f:
-            if total_length is None: # no content length header
-                for chunk in r.iter_content(chunk_size=1024):
+        total_length = int(total_length) + offset if total_length is not None else None
+        with open(part_fname, 'ab' if offset else 'wb') as f:
+            with tqdm(total=total_length, initial=offset, unit='B', unit_scale=True,
+                      dynamic_ncols=True, disable=total_length is None) as pbar:
+                for chunk in r.iter_content(chunk_size=_CHUNK_SIZE):
                     if chunk: # filter out keep-alive new chunks
                         f.write(chunk)
-            else:
-                total_length = int(total_length)
-                for chunk in tqdm(r.iter_content(chunk_size=1024),
-                                  total=int(total_length / 1024. + 0.5),
-                                  unit='KB', unit_scale=False, dynamic_ncols=True):
-                    f.write(chunk)
+                        pbar.update(len(chunk))
+        if os.path.exists(fname):
+            os.remove(fname)
+        os.rename(part_fname, fname)
 
         if sha1_hash and not check_sha1(fname, sha1_hash):
             raise UserWarning('File {} is downloaded but the content hash does not match. ' \
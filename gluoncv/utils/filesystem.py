@@ -1,6 +1,12 @@
 """Filesystem utility functions."""
 import os
+import time
 import errno
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
 
 def makedirs(path):
     """Create directory recursively if not exists.
@@ -17,6 +23,89 @@ def makedirs(path):
         if exc.errno != errno.EEXIST:
             raise
 
+class FileLock(object):
+    """Inter-process lock backed by an operating system lock of a lock file, i.e.
+    ``fcntl.flock`` or ``msvcrt.locking`` on Windows.
+
+    The operating system releases the lock when its owner exits, also when it is
+    killed, so a lock is never left stale and waiting lasts as long as the owner holds
+    it. The lock file itself is kept, because removing it would let a process lock a
+    new file while another one still locks the removed one.
+
+    Parameters
+    ----------
+    path : str
+        Path of the lock file.
+    interval : float, default is 0.1
+        Seconds between attempts to acquire the lock.
+
+    Examples
+    --------
+    >>> with FileLock('/tmp/model.zip.lock'):
+    ...     pass  # only one process at a time
+
+    """
+    def __init__(self, path, interval=0.1):
+        self._path = path
+        self._interval = interval
+        self._fd = None
+
+    def acquire(self):
+        """Block until the lock is acquired."""
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT)
+        try:
+            while not _try_lock(fd):
+                time.sleep(self._interval)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self):
+        """Release the lock."""
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock(fd)
+            finally:
+                os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+if fcntl is not None:
+    def _try_lock(fd):
+        """Lock file `fd` without blocking, return whether it succeeded."""
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as exc:
+            if exc.errno not in (errno.EACCES, errno.EAGAIN):
+                raise
+            return False
+        return True
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+else:
+    def _try_lock(fd):
+        """Lock file `fd` without blocking, return whether it succeeded."""
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except (IOError, OSError) as exc:
+            if exc.errno not in (errno.EACCES, errno.EDEADLOCK):
+                raise
+            return False
+        return True
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
 def import_try_install(package, extern_url=None):
     """Try import the specified package.
     If the package not installed, try use pip to install and import if success.
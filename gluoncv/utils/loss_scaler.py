@@ -0,0 +1,109 @@
+"""Dynamic loss scaling for mixed precision training."""
+from __future__ import absolute_import, division
+
+import numpy as np
+import mxnet as mx
+
+__all__ = ['DynamicLossScaler']
+
+
+class DynamicLossScaler(object):
+    """Dynamic loss scaler for float16 training.
+
+    Losses are multiplied by a large scale before backward, so that small float16
+    gradients do not underflow. If any gradient overflows, the update is skipped and
+    the scale is reduced; after `scale_window` updates without overflow the scale is
+    increased again.
+
+    Parameters
+    ----------
+    init_scale : float, default is 2 ** 15
+        Initial loss scale.
+    scale_factor : float, default is 2
+        Factor by which the scale is reduced on overflow and increased after
+        `scale_window` good updates.
+    scale_window : int, default is 2000
+        Number of updates without overflow before the scale is increased.
+    min_scale : float, default is 1
+        Lower bound of the loss scale.
+
+    Examples
+    --------
+    >>> net.cast('float16')
+    >>> trainer = gluon.Trainer(net.collect_params(), 'sgd', {'multi_precision': True})
+    >>> scaler = DynamicLossScaler()
+    >>> with autograd.record():
+    ...     loss = loss_fn(net(x.astype('float16')), y)
+    ...     autograd.backward(scaler.scale(loss))
+    >>> scaler.step(trainer, batch_size)
+
+    """
+    def __init__(self, init_scale=2.**15, scale_factor=2., scale_window=2000, min_scale=1.):
+        self.loss_scale = float(init_scale)
+        self._scale_factor = scale_factor
+        self._scale_window = scale_window
+        self._min_scale = min_scale
+        self._good_steps = 0
+
+    def scale(self, loss):
+        """Multiply a loss, or a list of losses, by the loss scale."""
+        if isinstance(loss, (list, tuple)):
+            return [l * self.loss_scale for l in loss]
+        return loss * self.loss_scale
+
+    @staticmethod
+    def has_overflow(params):
+        """Whether any gradient of `params` contains inf or nan.
+
+        Parameters
+        ----------
+        params : mxnet.gluon.ParameterDict or list of mxnet.gluon.Parameter
+            Parameters to check, gradients on all contexts are checked.
+
+        """
+        if hasattr(params, 'values'):
+            params = params.values()
+        sums = []
+        for param in params:
+            if param.grad_req == 'null' or param._data is None:
+                continue
+            # inf and nan propagate through the sum, accumulate in float32
+            sums.extend(mx.nd.sum(g.astype('float32', copy=False)).as_in_context(mx.cpu())
+                        for g in param.list_grad())
+        if not sums:
+            return False
+        return not np.isfinite(mx.nd.concat(*sums, dim=0).asnumpy()).all()
+
+    def update(self, overflow):
+        """Update the loss scale after a step with or without overflow."""
+        if overflow:
+            self.loss_scale = max(self.loss_scale / self._scale_factor, self._min_scale)
+            self._good_steps = 0
+        else:
+            self._good_steps += 1
+            if self._good_steps >= self._scale_window:
+                self.loss_scale *= self._scale_factor
+                self._good_steps = 0
+
+    def step(self, trainer, batch_size):
+        """Unscale gradients and make one step of `trainer`, unless gradients overflow.
+
+        Parameters
+        ----------
+        trainer : mxnet.gluon.Trainer
+            Trainer of the network, with `multi_precision` for float16 parameters.
+        batch_size : int
+            Batch size of the step, gradients are normalized by
+            `batch_size * loss_scale`.
+
+        Returns
+        -------
+        bool
+            Whether the step was made.
+
+        """
+        overflow = self.has_overflow(trainer._params)
+        if not overflow:
+            trainer.step(batch_size * self.loss_scale)
+        self.update(overflow)
+        return not overflow
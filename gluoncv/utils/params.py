@@ -0,0 +1,185 @@
+"""Memory-mapped loading of parameter files."""
+from __future__ import absolute_import
+
+import mmap
+import struct
+import numpy as np
+import mxnet as mx
+
+__all__ = ['load_params_mmap']
+
+_LIST_MAGIC = 0x112
+_NDARRAY_V1_MAGIC = 0xF993fac8
+_NDARRAY_V2_MAGIC = 0xF993fac9
+_DTYPES = {0: np.float32, 1: np.float64, 2: np.float16, 3: np.uint8,
+           4: np.int32, 5: np.int8, 6: np.int64}
+
+
+class _Reader(object):
+    """Sequential reader of little-endian values from a buffer."""
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def read(self, fmt):
+        """Read values of struct format `fmt`, a single value is not wrapped in tuple."""
+        values = struct.unpack_from('<' + fmt, self.buf, self.pos)
+        self.pos += struct.calcsize('<' + fmt)
+        return values if len(values) != 1 else values[0]
+
+
+def _read_array(reader, buf, filename):
+    """Read one dense NDArray as a numpy view of `buf`."""
+    magic = reader.read('I')
+    if magic == _NDARRAY_V2_MAGIC:
+        if reader.read('i') != 0:
+            raise ValueError("Only dense arrays can be memory-mapped: %s" % filename)
+    elif magic != _NDARRAY_V1_MAGIC:
+        raise ValueError("Unsupported NDArray format in %s" % filename)
+    ndim = reader.read('I')
+    shape = struct.unpack_from('<%dq' % ndim, buf, reader.pos)
+    reader.pos += 8 * ndim
+    if not shape:
+        return np.zeros(shape, dtype=np.float32)
+    reader.read('ii')  # saved context
+    type_flag = reader.read('i')
+    if type_flag not in _DTYPES:
+        raise ValueError("Unsupported dtype %d in %s" % (type_flag, filename))
+    dtype = np.dtype(_DTYPES[type_flag])
+    size = int(np.prod(shape))
+    array = np.frombuffer(buf, dtype=dtype, count=size, offset=reader.pos).reshape(shape)
+    reader.pos += size * dtype.itemsize
+    return array
+
+
+def _load_mmap_arrays(filename):
+    """Memory-map a parameter file saved by ``mx.nd.save`` or ``save_params``.
+
+    The file is mapped copy-on-write: pages are read from disk when first
+    touched and shared between all processes mapping the same file, until a
+    process writes to them.
+
+    Parameters
+    ----------
+    filename : str
+        Path to parameter file.
+
+    Returns
+    -------
+    dict of str to numpy.ndarray
+        Parameter names mapped to arrays backed by the mapped file.
+
+    """
+    with open(filename, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    reader = _Reader(buf)
+    magic, _ = reader.read('QQ')
+    if magic != _LIST_MAGIC:
+        raise ValueError("Invalid parameter file %s" % filename)
+    arrays = [_read_array(reader, buf, filename) for _ in range(reader.read('Q'))]
+    names = []
+    for _ in range(reader.read('Q')):
+        length = reader.read('Q')
+        names.append(buf[reader.pos:reader.pos + length].decode('utf-8'))
+        reader.pos += length
+    if len(names) != len(arrays):
+        raise ValueError("Parameter file %s has no names for its arrays" % filename)
+    return dict(zip(names, arrays))
+
+
+class _MappedArray(object):
+    """Array of a mapped file, which is turned into NDArray on first use."""
+    def __init__(self, array):
+        self.array = array
+        self.shape = array.shape
+
+    def copyto(self, ctx):
+        """Zero-copy NDArray on CPU if supported, copy otherwise."""
+        if ctx.device_type == 'cpu' and hasattr(mx.nd, 'from_numpy') and \
+                self.array.ctypes.data % self.array.dtype.itemsize == 0:
+            return mx.nd.from_numpy(self.array, zero_copy=True)
+        return mx.nd.array(self.array, ctx=ctx, dtype=self.array.dtype)
+
+
+def _check_parameter_layout():
+    """Check the private members of ``gluon.Parameter`` set for lazy loading.
+
+    In MXNet 1.x, `_deferred_init` is a tuple (init, ctx, default_init, data), which
+    `_finish_deferred_init` consumes by copying `data` to each context with
+    `data.copyto(ctx)`, and `_data` and `_grad` are None until then.
+    """
+    param = mx.gluon.Parameter('layout', shape=(1,))
+    if not mx.__version__.startswith('1.') or \
+            not all(hasattr(param, k) for k in ('_data', '_grad', '_deferred_init')):
+        raise NotImplementedError(
+            "load_params_mmap relies on the Parameter layout of MXNet 1.x, "
+            "found MXNet %s" % mx.__version__)
+
+
+def load_params_mmap(net, filename, ctx=mx.cpu(), allow_missing=False, ignore_extra=False):
+    """Load parameters of `net` from a memory-mapped file, like ``net.load_params``.
+
+    Parameters are materialized on the first forward pass of the blocks that use
+    them, the same way as deferred initialization, so cold start only reads the
+    weights which are actually touched. On CPU, parameters are backed by the
+    mapped file without copy, so that inference processes loading the same file
+    share its physical memory. Training writes to private copies of the touched
+    pages and never to the file.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.Block
+        Network to load parameters to.
+    filename : str
+        Path to parameter file, e.g. from ``model_zoo.model_store.get_model_file``.
+    ctx : Context or list of Context, default is mx.cpu()
+        Context(s) of parameters. Weights are copied to non-CPU contexts.
+    allow_missing : bool, default is False
+        Whether to silently skip parameters not present in the file.
+    ignore_extra : bool, default is False
+        Whether to silently ignore parameters from the file that are not
+        present in `net`.
+
+    Examples
+    --------
+    >>> net = gluoncv.model_zoo.get_model('resnet50_v1b', pretrained=False)
+    >>> load_params_mmap(net, gluoncv.model_zoo.model_store.get_model_file('resnet50_v1b'))
+
+    """
+    _check_parameter_layout()
+    ctx = [ctx] if isinstance(ctx, mx.Context) else list(ctx)
+    loaded = {}
+    for name, array in _load_mmap_arrays(filename).items():
+        if name.startswith(('arg:', 'aux:')):
+            name = name[4:]
+        loaded[name] = array
+    if any('.' in name for name in loaded):
+        # structural names saved by `save_parameters`
+        params = net._collect_params_with_prefix()
+    else:
+        params = {name[len(net.prefix):] if name.startswith(net.prefix) else name: param
+                  for name, param in net.collect_params().items()}
+    if not allow_missing:
+        for name in params:
+            if name not in loaded:
+                raise AssertionError(
+                    "Parameter '%s' is missing in file '%s'" % (name, filename))
+    for name, array in loaded.items():
+        if name not in params:
+            if not ignore_extra:
+                raise AssertionError(
+                    "Parameter '%s' loaded from file '%s' is not present in the network"
+                    % (name, filename))
+            continue
+        param = params[name]
+        if param.shape:
+            assert all(i in (0, j) for i, j in zip(param.shape, array.shape)) and \
+                len(param.shape) == len(array.shape), \
+                "Failed loading Parameter '%s': shape incompatible expected %s vs saved %s" % (
+                    name, str(param.shape), str(array.shape))
+        param.shape = array.shape
+        param.dtype = array.dtype
+        # private layout of MXNet 1.x, see `_check_parameter_layout`
+        param._data = None
+        param._grad = None
+        param._deferred_init = (mx.init.Zero(), ctx, None, _MappedArray(array))
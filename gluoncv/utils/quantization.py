@@ -0,0 +1,115 @@
+"""Post-training INT8 quantization of gluon networks."""
+from __future__ import absolute_import
+
+import logging
+import numpy as np
+import mxnet as mx
+from .block import fuse_bn
+
+__all__ = ['quantize_net']
+
+
+def _mkldnn_enabled():
+    """Whether MXNet is built with MKL-DNN, whose quantized operators need fused graphs."""
+    try:
+        return mx.runtime.Features().is_enabled('MKLDNN')
+    except AttributeError:
+        return False
+
+
+def _calib_iter(calib_data, batch_size, num_calib_examples):
+    """Collect `num_calib_examples` images from an iterable of batches into a data iterator."""
+    data = []
+    num_examples = 0
+    for batch in calib_data:
+        if isinstance(batch, (list, tuple)):
+            batch = batch[0]
+        data.append(batch.asnumpy() if isinstance(batch, mx.nd.NDArray) else np.asarray(batch))
+        num_examples += data[-1].shape[0]
+        if num_examples >= num_calib_examples:
+            break
+    if not data:
+        raise ValueError("Empty calibration data.")
+    data = np.concatenate(data, axis=0)[:num_calib_examples]
+    return mx.io.NDArrayIter(data, batch_size=batch_size, last_batch_handle='discard'), \
+        data.shape[0] - data.shape[0] % batch_size
+
+
+def quantize_net(net, calib_data, input_shape, path, num_calib_examples=500,
+                 calib_mode='naive', exclude_layers=None, quantized_dtype='auto',
+                 ctx=mx.cpu(), logger=None):
+    """Quantize a network to INT8 with calibration, and save the quantized model to
+    `path-symbol.json` and `path-0000.params`.
+
+    BatchNorm layers are folded into convolutions first, then MXNet quantization ops
+    replace convolution, fully-connected and pooling layers. With MKL-DNN builds,
+    convolutions are fused with their activations before and after quantization.
+    Activation ranges are collected on the calibration data. Other operators, e.g. the
+    detection heads of SSD, stay in float32. The saved files can be loaded with
+    ``mx.gluon.SymbolBlock.imports``.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.HybridBlock
+        Initialized network with a single input. It is modified in place by folding
+        BatchNorm layers.
+    calib_data : iterable
+        Iterable of calibration batches, e.g. a ``DataLoader``. If a batch is a list
+        or tuple, the first element is used as network input.
+    input_shape : tuple of int
+        Input shape as (B, C, H, W), batches of `calib_data` must match it.
+    path : str
+        Path prefix of the saved files.
+    num_calib_examples : int, default is 500
+        Number of images used for calibration.
+    calib_mode : str, default is 'naive'
+        'naive' uses min/max of activations, 'entropy' minimizes KL divergence between
+        float32 and quantized activation distributions, which is slower but usually more
+        accurate.
+    exclude_layers : list of str, default is None
+        Names of symbol nodes which are not quantized.
+    quantized_dtype : str, default is 'auto'
+        Quantized data type, 'int8', 'uint8' or 'auto', which picks the type from
+        calibrated ranges.
+    ctx : mx.Context, default is mx.cpu()
+        Context used for calibration. Quantized operators only run on CPU.
+    logger : logging.Logger, default is None
+        Logger of calibration progress.
+
+    Returns
+    -------
+    (str, str)
+        File names of the symbol and parameters.
+
+    """
+    from mxnet.contrib.quantization import quantize_model
+    net.collect_params().reset_ctx(ctx)
+    net.hybridize()
+    net(mx.nd.zeros(input_shape, ctx=ctx))
+    fuse_bn(net)
+    sym = net(mx.sym.var('data'))
+    if isinstance(sym, (list, tuple)):
+        sym = mx.sym.Group(list(sym))
+    arg_names = set(sym.list_arguments())
+    aux_names = set(sym.list_auxiliary_states())
+    arg_params, aux_params = {}, {}
+    for name, param in net.collect_params().items():
+        if name in arg_names:
+            arg_params[name] = param.data(ctx)
+        elif name in aux_names:
+            aux_params[name] = param.data(ctx)
+
+    if _mkldnn_enabled():
+        sym = sym.get_backend_symbol('MKLDNN_QUANTIZE')
+
+    calib_iter, num_calib_examples = _calib_iter(
+        calib_data, input_shape[0], num_calib_examples)
+    qsym, qarg_params, aux_params = quantize_model(
+        sym=sym, arg_params=arg_params, aux_params=aux_params, ctx=ctx,
+        excluded_sym_names=exclude_layers, calib_mode=calib_mode,
+        calib_data=calib_iter, num_calib_examples=num_calib_examples,
+        quantized_dtype=quantized_dtype, logger=logger or logging)
+    if _mkldnn_enabled():
+        qsym = qsym.get_backend_symbol('MKLDNN_QUANTIZE')
+    mx.model.save_checkpoint(path, 0, qsym, qarg_params, aux_params)
+    return '%s-symbol.json' % path, '%s-0000.params' % path
@@ -0,0 +1,391 @@
+"""In-process inference server which batches single-image requests dynamically."""
+from __future__ import absolute_import, division
+
+import json
+import time
+import inspect
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+import numpy as np
+import mxnet as mx
+
+__all__ = ['BatchServer', 'serve_http']
+
+
+def _takes_label(transform):
+    """Whether `transform` is called with (src, label), like detection presets."""
+    func = transform if inspect.isfunction(transform) or inspect.ismethod(transform) \
+        else transform.__call__
+    try:
+        params = list(inspect.signature(func).parameters.values())
+        return len([p for p in params if p.default is p.empty and p.kind in (
+            p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]) >= 2
+    except AttributeError:
+        args = inspect.getargspec(func)
+        num_args = len(args.args) - len(args.defaults or ())
+        return num_args - (1 if inspect.ismethod(func) else 0) >= 2
+
+
+class _Request(object):
+    """A pending request."""
+    def __init__(self, data, scale):
+        self.data = data
+        self.scale = scale
+        self.future = Future()
+        self.arrival = time.time()
+
+
+class _Metrics(object):
+    """Thread-safe latency statistics of the most recent requests."""
+    def __init__(self, window):
+        self._lock = threading.Lock()
+        self._latency = deque(maxlen=window)
+        self._queue = deque(maxlen=window)
+        self._num_requests = 0
+        self._num_batches = 0
+
+    def update(self, requests, start, end):
+        with self._lock:
+            self._num_batches += 1
+            self._num_requests += len(requests)
+            for r in requests:
+                self._queue.append(start - r.arrival)
+                self._latency.append(end - r.arrival)
+
+    def get(self):
+        with self._lock:
+            latency = np.array(self._latency) * 1000
+            queue = np.array(self._queue) * 1000
+            stats = {'requests': self._num_requests, 'batches': self._num_batches,
+                     'avg_batch_size': self._num_requests / max(self._num_batches, 1)}
+        if latency.size:
+            stats['latency_ms'] = OrderedDict(
+                (k, float(np.percentile(latency, p))) for k, p in
+                (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100)))
+            stats['latency_ms']['mean'] = float(latency.mean())
+            stats['queue_ms'] = float(queue.mean())
+        return stats
+
+
+class BatchServer(object):
+    """Serve a network to single-image requests, which are coalesced into batches.
+
+    A batch is run as soon as `max_batch_size` requests are pending, or when the
+    oldest pending request has waited for `max_wait` seconds. One forward pass
+    handles the whole batch, then its outputs are split back to the requests.
+
+    The network is hybridized. To bound the number of input shapes the hybridized
+    graph sees, images are zero-padded at the bottom and right to the smallest of
+    `buckets` which fits, and batches are padded to the next power of two, up to
+    `max_batch_size`. Padding at the bottom and right keeps box coordinates of
+    detectors valid.
+
+    The parameters of `net` are moved to `ctx` and `net` is hybridized in place, so
+    use a dedicated copy of a network which is also used elsewhere.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.HybridBlock
+        Network with a single (B, C, H, W) input, e.g. from ``model_zoo.get_model``.
+        All outputs must have the batch axis first.
+    transform : callable, default is None
+        Preset val transform applied to every request image in the calling thread,
+        e.g. ``SSDDefaultValTransform(300, 300)``. Detection presets are called with an
+        empty label. If it returns a tuple, its first element is the network input.
+        If None, request images must already be (C, H, W) inputs.
+    max_batch_size : int, default is 8
+        Maximum number of requests in a batch.
+    max_wait : float, default is 0.005
+        Maximum time in seconds a request waits for others to join its batch.
+    buckets : list of (int, int), default is None
+        Padded input sizes as (height, width). If None, inputs are batched by their
+        own size. Larger inputs are rejected.
+    ctx : mx.Context, default is mx.cpu()
+        Context of the network.
+    metrics_window : int, default is 10000
+        Number of most recent requests used for latency statistics.
+    bbox_output : int, default is None
+        Index of the output with boxes of detectors, e.g. 2 for `(ids, scores, bboxes)`.
+        These boxes are scaled from the transformed input back to the request image,
+        like :py:class:`gluoncv.utils.video.VideoDetector` does. If None, outputs are
+        returned as computed, i.e. boxes are in coordinates of the transformed input.
+
+    Examples
+    --------
+    >>> net = gluoncv.model_zoo.get_model('ssd_512_resnet50_v1_voc', pretrained=True)
+    >>> with BatchServer(net, SSDDefaultValTransform(512, 512), bbox_output=2) as server:
+    ...     ids, scores, bboxes = server.predict(mx.image.imread('street.jpg'))
+
+    """
+    def __init__(self, net, transform=None, max_batch_size=8, max_wait=0.005,
+                 buckets=None, ctx=mx.cpu(), metrics_window=10000, bbox_output=None):
+        self._net = net
+        self._bbox_output = bbox_output
+        self._transform = transform
+        self._transform_label = transform is not None and _takes_label(transform)
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._buckets = sorted(buckets, key=lambda b: b[0] * b[1]) if buckets else None
+        self._ctx = ctx
+        self._batch_sizes = [1]
+        while self._batch_sizes[-1] < max_batch_size:
+            self._batch_sizes.append(min(self._batch_sizes[-1] * 2, max_batch_size))
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopped = True
+        self._thread = None
+        self.metrics = _Metrics(metrics_window)
+        net.collect_params().reset_ctx(ctx)
+        net.hybridize()
+
+    def start(self):
+        """Start the worker thread."""
+        with self._cond:
+            if not self._stopped:
+                return self
+            self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name='BatchServer')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Run all pending requests and stop the worker thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def warmup(self, channels=3):
+        """Run every bucketed input shape once, so that requests do not pay for
+        building graphs. Only possible with `buckets`, call it before :py:meth:`start`."""
+        assert self._buckets, "Warmup requires buckets"
+        for height, width in self._buckets:
+            for batch_size in self._batch_sizes:
+                outputs = self._net(mx.nd.zeros(
+                    (batch_size, channels, height, width), ctx=self._ctx))
+                for out in outputs if isinstance(outputs, (list, tuple)) else [outputs]:
+                    out.wait_to_read()
+
+    def _prepare(self, img):
+        """Transform and pad an image to its bucket, and return it with the scale from
+        coordinates of the transformed image to the request image."""
+        if not isinstance(img, mx.nd.NDArray):
+            img = mx.nd.array(img, dtype=np.uint8 if self._transform else None)
+        src_shape = img.shape
+        if self._transform is not None:
+            if self._transform_label:
+                img = self._transform(img, np.zeros((0, 6), dtype='float32'))
+            else:
+                img = self._transform(img)
+            if isinstance(img, (list, tuple)):
+                img = img[0]
+        channels, height, width = img.shape
+        if self._transform is not None:
+            scale = np.array([src_shape[1] / width, src_shape[0] / height] * 2)
+        else:
+            scale = np.ones(4)
+        if self._buckets:
+            for bucket in self._buckets:
+                if bucket[0] >= height and bucket[1] >= width:
+                    break
+            else:
+                raise ValueError("Input of size %dx%d is larger than all buckets %s" % (
+                    height, width, str(self._buckets)))
+            if bucket != (height, width):
+                padded = mx.nd.zeros((channels,) + tuple(bucket), dtype=img.dtype)
+                padded[:, :height, :width] = img
+                img = padded
+        return img, scale
+
+    def submit(self, img):
+        """Submit a request. This is thread-safe.
+
+        Parameters
+        ----------
+        img : mxnet.nd.NDArray or numpy.ndarray
+            Image in (H, W, C) format as input of `transform`, or network input
+            in (C, H, W) format if there is no transform.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of the network outputs for this image as a tuple of numpy arrays,
+            or a single numpy array if the network has a single output.
+
+        """
+        data, scale = self._prepare(img)
+        request = _Request(data, scale)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("BatchServer is not started")
+            self._pending.setdefault(data.shape, deque()).append(request)
+            self._cond.notify()
+        return request.future
+
+    def predict(self, img, timeout=None):
+        """Submit a request and wait for its outputs, see :py:meth:`submit`."""
+        return self.submit(img).result(timeout)
+
+    def predict_async(self, img, loop=None):
+        """Submit a request from asyncio, see :py:meth:`submit`.
+
+        Returns
+        -------
+        asyncio.Future
+            Awaitable outputs of the request.
+
+        """
+        import asyncio
+        return asyncio.wrap_future(self.submit(img), loop=loop)
+
+    def stats(self):
+        """Statistics of requests, batch sizes and latency in milliseconds."""
+        return self.metrics.get()
+
+    def _next_batch(self):
+        """Pop a batch which is full or timed out, otherwise return the time to wait."""
+        now = time.time()
+        wait = None
+        for shape, queue in self._pending.items():
+            deadline = queue[0].arrival + self._max_wait
+            if len(queue) >= self._max_batch_size or deadline <= now or self._stopped:
+                batch = [queue.popleft() for _ in range(min(len(queue), self._max_batch_size))]
+                if not queue:
+                    del self._pending[shape]
+                return batch, None
+            wait = deadline - now if wait is None else min(wait, deadline - now)
+        return None, wait
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                batch, wait = self._next_batch()
+                while batch is None:
+                    if self._stopped:
+                        return
+                    self._cond.wait(wait)
+                    batch, wait = self._next_batch()
+            self._run(batch)
+
+    def _run(self, batch):
+        """Run a batch of requests with the same input shape."""
+        start = time.time()
+        try:
+            batch_size = next(s for s in self._batch_sizes if s >= len(batch))
+            data = [r.data for r in batch]
+            data += [mx.nd.zeros_like(data[0])] * (batch_size - len(batch))
+            outputs = self._net(mx.nd.stack(*data).as_in_context(self._ctx))
+            single = not isinstance(outputs, (list, tuple))
+            outputs = [out.asnumpy() for out in ([outputs] if single else outputs)]
+            if self._bbox_output is not None:
+                bboxes = outputs[self._bbox_output]
+                scale = np.stack([r.scale for r in batch]).astype(bboxes.dtype)
+                shape = (len(batch),) + (1,) * (bboxes.ndim - 2) + (4,)
+                bboxes[:len(batch)] *= scale.reshape(shape)
+        except Exception as e:  # pylint: disable=broad-except
+            for r in batch:
+                r.future.set_exception(e)
+            return
+        end = time.time()
+        self.metrics.update(batch, start, end)
+        for i, r in enumerate(batch):
+            r.future.set_result(outputs[0][i] if single else tuple(out[i] for out in outputs))
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """POST an encoded image to run it, GET /stats for latency statistics."""
+    def _reply(self, code, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/stats':
+            self._reply(404, {'error': 'not found'})
+            return
+        self._reply(200, self.server.batch_server.stats())
+
+    def do_POST(self):
+        tic = time.time()
+        content = self.rfile.read(int(self.headers['Content-Length']))
+        try:
+            img = mx.image.imdecode(content)
+        except mx.base.MXNetError as e:
+            self._reply(400, {'error': str(e)})
+            return
+        try:
+            future = self.server.batch_server.submit(img)
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except RuntimeError as e:
+            # the batch server is stopped
+            self._reply(503, {'error': str(e)})
+            return
+        try:
+            outputs = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            self._reply(500, {'error': str(e)})
+            return
+        outputs = [outputs] if isinstance(outputs, np.ndarray) else outputs
+        self._reply(200, {'outputs': [out.tolist() for out in outputs],
+                          'latency_ms': (time.time() - tic) * 1000})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_http(batch_server, host='127.0.0.1', port=0):
+    """Serve a :py:class:`BatchServer` over HTTP in a background thread.
+
+    This is a local stand-in of a serving frontend for testing. ``POST /`` with an
+    encoded image as body returns its outputs as JSON lists, ``GET /stats``
+    returns :py:meth:`BatchServer.stats`. Invalid images are answered with status 400,
+    errors of the network with status 500 and requests after the batch server is
+    stopped with status 503. Requests are handled in concurrent threads, so that
+    they can be batched.
+
+    Parameters
+    ----------
+    batch_server : BatchServer
+        Started server.
+    host : str, default is '127.0.0.1'
+        Host to listen on.
+    port : int, default is 0
+        Port to listen on, 0 picks a free port, see ``server_address``.
+
+    Returns
+    -------
+    http.server.HTTPServer
+        The running HTTP server, stop it with ``shutdown()``.
+
+    """
+    server = _ThreadingHTTPServer((host, port), _Handler)
+    server.batch_server = batch_server
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
@@ -0,0 +1,320 @@
+"""Streaming video detection with overlapping decode, preprocess, inference and
+render stages."""
+from __future__ import absolute_import, division
+
+import time
+import threading
+from collections import OrderedDict
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+import numpy as np
+import mxnet as mx
+from .viz.bbox import cv_plot_bbox
+
+__all__ = ['VideoReader', 'FrameStream', 'VideoDetector']
+
+_END = object()
+
+
+def _get(in_queue, stop):
+    """Get an item, or `_END` once the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            return in_queue.get(timeout=0.05)
+        except queue.Empty:
+            pass
+    return _END
+
+
+def _put(out_queue, item, stop):
+    """Put an item, unless the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.05)
+            return
+        except queue.Full:
+            pass
+
+
+class VideoReader(object):
+    """Read RGB frames of a video file or camera with OpenCV.
+
+    Parameters
+    ----------
+    source : str or int
+        Path of a video file, or index of a camera.
+
+    """
+    def __init__(self, source):
+        import cv2
+        self._cv2 = cv2
+        self._source = source
+        self.live = isinstance(source, int)
+
+    def __iter__(self):
+        cap = self._cv2.VideoCapture(self._source)
+        if not cap.isOpened():
+            raise IOError("Cannot open video source {}".format(self._source))
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                yield self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
+        finally:
+            cap.release()
+
+
+class FrameStream(object):
+    """Local stand-in of a camera, which yields frames at a fixed frame rate.
+
+    Parameters
+    ----------
+    frames : iterable of numpy.ndarray
+        RGB frames with shape `H, W, 3`.
+    fps : float, default is None
+        Frame rate, frames are yielded as fast as possible if None.
+
+    """
+    def __init__(self, frames, fps=None):
+        self._frames = frames
+        self._fps = fps
+        self.live = fps is not None
+
+    def __iter__(self):
+        tic = time.time()
+        for i, frame in enumerate(self._frames):
+            if self._fps:
+                delay = tic + i / self._fps - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            yield frame
+
+
+class _StageStats(object):
+    """Frame counter and busy time of a stage."""
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.
+        self.start = None
+        self.end = None
+
+    def update(self, frames, tic):
+        now = time.time()
+        self.busy += now - tic
+        self.frames += frames
+        self.start = self.start or tic
+        self.end = now
+
+    def get(self):
+        wall = (self.end - self.start) if self.start else 0
+        return OrderedDict([
+            ('frames', self.frames),
+            # throughput the stage could sustain alone, the lowest is the bottleneck
+            ('fps', self.frames / self.busy if self.busy else 0.),
+            ('wall_fps', self.frames / wall if wall else 0.)])
+
+
+class VideoDetector(object):
+    """Run a detector on a video stream, with decode, preprocess, batched inference and
+    render in overlapping threads connected by bounded queues.
+
+    Parameters
+    ----------
+    net : mxnet.gluon.HybridBlock
+        Detection network returning `(ids, scores, bboxes)`, e.g. SSD.
+    transform : callable
+        Preset val transform taking `(src, label)` and returning the network input
+        first, e.g. ``SSDDefaultValTransform(512, 512)``. It must resize all frames of
+        a stream to the same shape.
+    batch_size : int, default is 4
+        Maximum number of frames in a forward pass. Inference takes the frames which
+        are ready and does not wait to fill a batch.
+    queue_size : int, default is 8
+        Capacity of queues between stages.
+    target_fps : float, default is None
+        If set, frames arriving faster than this rate are skipped.
+    skip_frames : bool, default is None
+        Skip frames when the pipeline is behind the source, which keeps the latency of
+        live sources bounded. Defaults to True for live sources, e.g. cameras.
+    class_names : list of str, default is None
+        Class names used for rendering.
+    thresh : float, default is 0.5
+        Display threshold of scores.
+    ctx : mx.Context, default is mx.cpu()
+        Context of the network.
+
+    Examples
+    --------
+    >>> net = gluoncv.model_zoo.get_model('ssd_512_mobilenet1.0_voc', pretrained=True)
+    >>> detector = VideoDetector(net, SSDDefaultValTransform(512, 512),
+    ...                          class_names=net.classes, target_fps=25)
+    >>> for frame, (ids, scores, bboxes) in detector.run(VideoReader(0)):
+    ...     cv2.imshow('detection', frame[:, :, ::-1])
+    >>> print(detector.stats())
+
+    """
+    def __init__(self, net, transform, batch_size=4, queue_size=8, target_fps=None,
+                 skip_frames=None, class_names=None, thresh=0.5, ctx=mx.cpu()):
+        self._net = net
+        self._transform = transform
+        self._batch_size = batch_size
+        self._queue_size = queue_size
+        self._target_fps = target_fps
+        self._skip_frames = skip_frames
+        self._class_names = class_names
+        self._thresh = thresh
+        self._ctx = ctx
+        self._stats = OrderedDict()
+        self._dropped = 0
+        net.collect_params().reset_ctx(ctx)
+        net.hybridize()
+
+    def stats(self):
+        """Frames and frames per second of each stage, and number of skipped frames.
+
+        `fps` of a stage is frames over time spent in the stage, i.e. the throughput
+        it could sustain alone, so the stage with the lowest `fps` is the bottleneck.
+        `wall_fps` is the throughput achieved in the pipeline.
+        """
+        stats = OrderedDict((k, v.get()) for k, v in self._stats.items())
+        stats['skipped'] = self._dropped
+        return stats
+
+    def _decode(self, source, out_queue, stop):
+        """Read frames and skip those above the target rate or when behind."""
+        skip = self._skip_frames
+        if skip is None:
+            skip = getattr(source, 'live', False)
+        interval = 1. / self._target_fps if self._target_fps else 0
+        next_time = 0
+        stats = self._stats['decode']
+        tic = time.time()
+        for frame in source:
+            if stop.is_set():
+                break
+            now = time.time()
+            if now < next_time:
+                self._dropped += 1
+                tic = time.time()
+                continue
+            next_time = max(next_time + interval, now)
+            stats.update(1, tic)
+            if skip:
+                try:
+                    out_queue.put_nowait(np.asarray(frame))
+                except queue.Full:
+                    self._dropped += 1
+            else:
+                _put(out_queue, np.asarray(frame), stop)
+            tic = time.time()
+        _put(out_queue, _END, stop)
+
+    def _preprocess(self, in_queue, out_queue, stop):
+        stats = self._stats['preprocess']
+        label = np.zeros((0, 6), dtype='float32')
+        while True:
+            frame = _get(in_queue, stop)
+            if frame is _END:
+                break
+            tic = time.time()
+            data = self._transform(mx.nd.array(frame, dtype='uint8'), label)
+            data = data[0] if isinstance(data, (list, tuple)) else data
+            data.wait_to_read()
+            stats.update(1, tic)
+            _put(out_queue, (frame, data), stop)
+        _put(out_queue, _END, stop)
+
+    def _infer(self, in_queue, out_queue, stop):
+        stats = self._stats['inference']
+        end = False
+        while not end:
+            items = [_get(in_queue, stop)]
+            while len(items) < self._batch_size:
+                try:
+                    items.append(in_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if items[-1] is _END:
+                items.pop()
+                end = True
+            if not items:
+                break
+            tic = time.time()
+            data = mx.nd.stack(*[d for _, d in items]).as_in_context(self._ctx)
+            ids, scores, bboxes = [x.asnumpy() for x in self._net(data)]
+            stats.update(len(items), tic)
+            for i, (frame, d) in enumerate(items):
+                # map boxes from network input back to the frame
+                scale = np.array([frame.shape[1] / d.shape[2], frame.shape[0] / d.shape[1]] * 2)
+                _put(out_queue, (frame, (ids[i], scores[i], bboxes[i] * scale)), stop)
+        _put(out_queue, _END, stop)
+
+    def _render(self, in_queue, out_queue, stop):
+        stats = self._stats['render']
+        while True:
+            item = _get(in_queue, stop)
+            if item is _END:
+                break
+            tic = time.time()
+            frame, (ids, scores, bboxes) = item
+            frame = cv_plot_bbox(frame, bboxes, scores, ids, thresh=self._thresh,
+                                 class_names=self._class_names)
+            stats.update(1, tic)
+            _put(out_queue, (frame, (ids, scores, bboxes)), stop)
+        _put(out_queue, _END, stop)
+
+    def run(self, source):
+        """Run detection on a stream.
+
+        Parameters
+        ----------
+        source : iterable of numpy.ndarray
+            RGB frames with shape `H, W, 3`, e.g. :py:class:`VideoReader` or
+            :py:class:`FrameStream`.
+
+        Returns
+        -------
+        generator of (numpy.ndarray, (numpy.ndarray, numpy.ndarray, numpy.ndarray))
+            Rendered frames and `(ids, scores, bboxes)` detections, where boxes are in
+            frame coordinates.
+
+        """
+        self._stats = OrderedDict((k, _StageStats()) for k in [
+            'decode', 'preprocess', 'inference', 'render'])
+        self._dropped = 0
+        queues = [queue.Queue(self._queue_size) for _ in range(4)]
+        stop = threading.Event()
+        errors = []
+
+        def target(func, *args):
+            def wrapper():
+                try:
+                    func(*args)
+                except Exception as e:  # pylint: disable=broad-except
+                    errors.append(e)
+                    stop.set()
+            return wrapper
+
+        threads = [
+            threading.Thread(target=target(self._decode, source, queues[0], stop)),
+            threading.Thread(target=target(self._preprocess, queues[0], queues[1], stop)),
+            threading.Thread(target=target(self._infer, queues[1], queues[2], stop)),
+            threading.Thread(target=target(self._render, queues[2], queues[3], stop))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        try:
+            while True:
+                item = _get(queues[3], stop)
+                if item is _END:
+                    break
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
@@ -2,5 +2,5 @@
 from __future__ import absolute_import
 
 from .image import plot_image
-from .bbox import plot_bbox
+from .bbox import plot_bbox, cv_plot_bbox
 from .segmentation import get_color_pallete, DeNormalize
@@ -0,0 +1,150 @@
+"""Benchmark peak training memory of segmentation models versus batch size, with
+and without gradient checkpointing of backbone stages.
+
+Each setting runs in a fresh interpreter, so that memory pools and peaks of
+previous runs do not hide its own. Memory of the first training iteration is
+reported, as the peak resident set size on cpu and the memory held by the mxnet
+pool on gpu, which keeps the peak allocation.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import warnings
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark training memory with gradient checkpointing.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--model', type=str, default='fcn',
+                        help='Segmentation model, fcn or psp.')
+    parser.add_argument('--backbone', type=str, default='resnet50',
+                        help='Dilated backbone, resnet50, resnet101 or resnet152.')
+    parser.add_argument('--batch-sizes', type=str, default='1,2,4,8',
+                        help='Comma separated batch sizes to sweep.')
+    parser.add_argument('--crop-size', type=int, default=480,
+                        help='Training crop size.')
+    parser.add_argument('--checkpoint-stages', type=str, default='3,4',
+                        help='Comma separated checkpointed stages, compared with none.')
+    parser.add_argument('--gpu', type=int, default=-1,
+                        help='GPU id to run on, -1 for cpu.')
+    parser.add_argument('--num-iters', type=int, default=3,
+                        help='Number of training iterations per setting.')
+    parser.add_argument('--output', type=str, default='',
+                        help='Json file to write results to.')
+    parser.add_argument('--worker', action='store_true',
+                        help='Measure a single setting, used internally.')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Batch size of a single setting, used internally.')
+    args = parser.parse_args()
+    return args
+
+def _stages(text):
+    return [int(x) for x in text.split(',') if x.strip()]
+
+def _memory_mb(gpu):
+    import resource
+    import mxnet as mx
+    if gpu >= 0:
+        free, total = mx.context.gpu_memory_info(gpu)
+        return (total - free) / 2 ** 20
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+def measure(args):
+    """Train a model for a few iterations and return its memory and speed."""
+    import mxnet as mx
+    from mxnet import autograd
+    from gluoncv.model_zoo.segbase import get_segmentation_model
+    from gluoncv.model_zoo.segbase import SoftmaxCrossEntropyLossWithAux
+    ctx = mx.gpu(args.gpu) if args.gpu >= 0 else mx.cpu()
+    net = get_segmentation_model(
+        args.model, backbone=args.backbone, aux=True, pretrained_base=False,
+        checkpoint_stages=_stages(args.checkpoint_stages), ctx=ctx,
+        height=args.crop_size, width=args.crop_size)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        net.initialize(ctx=ctx)
+    net.collect_params().reset_ctx(ctx)
+    net.hybridize()
+    criterion = SoftmaxCrossEntropyLossWithAux(aux=True)
+    shape = (args.batch_size, 3, args.crop_size, args.crop_size)
+    data = mx.nd.random.uniform(shape=shape, ctx=ctx)
+    label = mx.nd.random.randint(0, net.nclass, shape=(shape[0],) + shape[2:],
+                                 ctx=ctx).astype('float32')
+
+    def train_step():
+        with autograd.record():
+            loss = criterion(*(list(net(data)) + [label]))
+        loss.backward()
+        mx.nd.waitall()
+
+    # build cached graphs and operator caches outside of the measurement
+    net(data)
+    mx.nd.waitall()
+    base = _memory_mb(args.gpu)
+    # memory is measured on the first iteration, because on cpu the resident set of
+    # later ones also grows with allocator fragmentation
+    train_step()
+    peak = _memory_mb(args.gpu)
+    tic = time.time()
+    for _ in range(args.num_iters):
+        train_step()
+    return {'peak_mb': peak, 'train_mb': peak - base,
+            'sec_per_iter': (time.time() - tic) / max(args.num_iters, 1)}
+
+def run(args):
+    """Sweep batch sizes with and without checkpointing, each in a new interpreter."""
+    results = []
+    for batch_size in _stages(args.batch_sizes):
+        for stages in ['', args.checkpoint_stages]:
+            cmd = [sys.executable, os.path.abspath(__file__), '--worker',
+                   '--model', args.model, '--backbone', args.backbone,
+                   '--batch-size', str(batch_size), '--crop-size', str(args.crop_size),
+                   '--checkpoint-stages', stages, '--gpu', str(args.gpu),
+                   '--num-iters', str(args.num_iters)]
+            result = {'batch_size': batch_size, 'checkpoint_stages': _stages(stages)}
+            try:
+                out = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+                result.update(json.loads(out.decode().strip().splitlines()[-1]))
+                print('batch_size={batch_size} checkpoint_stages={checkpoint_stages}: '
+                      'peak {peak_mb:.0f} MB, training {train_mb:.0f} MB, '
+                      '{sec_per_iter:.3f} sec/iter'.format(**result))
+            except subprocess.CalledProcessError as e:
+                # most likely out of memory
+                result['error'] = e.output.decode().strip().splitlines()[-1:]
+                print('batch_size={batch_size} checkpoint_stages={checkpoint_stages}: '
+                      'failed, {error}'.format(**result))
+            results.append(result)
+    return results
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.worker:
+        print(json.dumps(measure(args)))
+        sys.exit(0)
+    import mxnet as mx
+    import gluoncv as gcv
+    results = run(args)
+    report = {
+        'gluoncv': gcv.__version__,
+        'mxnet': mx.__version__,
+        'python': platform.python_version(),
+        'device': 'gpu({})'.format(args.gpu) if args.gpu >= 0 else 'cpu',
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model': args.model,
+        'backbone': args.backbone,
+        'crop_size': args.crop_size,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,279 @@
+"""Benchmark throughput of training and validation data pipelines.
+
+Datasets are generated with random images in the on-disk layout of
+Pascal VOC, ImageNet and ADE20K, so the benchmark runs offline while still
+exercising the real decoding, augmentation, target generation and batchify code.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import shutil
+import numpy as np
+from PIL import Image
+import mxnet as mx
+from mxnet import gluon
+from mxnet import autograd
+from mxnet.gluon.data.vision import transforms
+import gluoncv as gcv
+from gluoncv import data as gdata
+from gluoncv.data.batchify import Tuple, Stack, Pad
+from gluoncv.data.transforms.presets.ssd import SSDDefaultTrainTransform
+from gluoncv.data.transforms.presets.ssd import SSDDefaultValTransform
+from gluoncv.data.transforms.presets.rcnn import FasterRCNNDefaultTrainTransform
+from gluoncv.data.transforms.presets.rcnn import FasterRCNNDefaultValTransform
+from gluoncv.model_zoo import get_model
+
+PIPELINES = ['ssd', 'faster_rcnn', 'imagenet', 'segmentation']
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark data pipelines on synthetic datasets.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--pipelines', type=str, default=','.join(PIPELINES),
+                        help='Comma separated pipelines, from {}.'.format(', '.join(PIPELINES)))
+    parser.add_argument('--splits', type=str, default='train,val',
+                        help='Comma separated splits to benchmark.')
+    parser.add_argument('--num-workers', type=str, default='0,4',
+                        help='Comma separated numbers of data workers to sweep.')
+    parser.add_argument('--batch-sizes', type=str, default='8,32',
+                        help='Comma separated batch sizes to sweep.')
+    parser.add_argument('--num-images', type=int, default=64,
+                        help='Number of synthetic images of each dataset.')
+    parser.add_argument('--num-batches', type=int, default=20,
+                        help='Number of timed batches per setting.')
+    parser.add_argument('--warmup', type=int, default=2,
+                        help='Number of untimed batches per setting.')
+    parser.add_argument('--data-dir', type=str, default='',
+                        help='Where to generate the synthetic datasets, a temporary '
+                             'directory is used and removed if empty.')
+    parser.add_argument('--output', type=str, default='',
+                        help='Json file to write results to, print to stdout if empty.')
+    parser.add_argument('--seed', type=int, default=233,
+                        help='Random seed of the synthetic datasets.')
+    args = parser.parse_args()
+    return args
+
+def _random_image(rng, width, height):
+    return Image.fromarray(rng.randint(0, 256, size=(height, width, 3)).astype('uint8'))
+
+def make_voc(root, num_images, seed=0, year=2007, splits=('trainval', 'test')):
+    """Generate a synthetic Pascal VOC detection dataset under `root`.
+    All `splits` share the same images."""
+    rng = np.random.RandomState(seed)
+    base = os.path.join(root, 'VOC' + str(year))
+    for sub in ('Annotations', 'JPEGImages', os.path.join('ImageSets', 'Main')):
+        gcv.utils.makedirs(os.path.join(base, sub))
+    names = []
+    for i in range(num_images):
+        name = '{:06d}'.format(i)
+        width, height = rng.randint(300, 500, size=2)
+        _random_image(rng, width, height).save(os.path.join(base, 'JPEGImages', name + '.jpg'))
+        objects = []
+        for _ in range(rng.randint(1, 6)):
+            xmin, ymin = rng.randint(1, width // 2), rng.randint(1, height // 2)
+            xmax, ymax = rng.randint(xmin + 8, width), rng.randint(ymin + 8, height)
+            objects.append(
+                '<object><name>{}</name><difficult>0</difficult><bndbox><xmin>{}</xmin>'
+                '<ymin>{}</ymin><xmax>{}</xmax><ymax>{}</ymax></bndbox></object>'.format(
+                    gdata.VOCDetection.CLASSES[rng.randint(0, 20)], xmin, ymin, xmax, ymax))
+        with open(os.path.join(base, 'Annotations', name + '.xml'), 'w') as f:
+            f.write('<annotation><size><width>{}</width><height>{}</height><depth>3</depth>'
+                    '</size>{}</annotation>'.format(width, height, ''.join(objects)))
+        names.append(name)
+    for split in splits:
+        with open(os.path.join(base, 'ImageSets', 'Main', split + '.txt'), 'w') as f:
+            f.write('\n'.join(names) + '\n')
+    return root
+
+def make_imagenet(root, num_images, seed=0, num_class=10):
+    """Generate a synthetic ImageNet dataset with `train` and `val` folders under `root`."""
+    rng = np.random.RandomState(seed)
+    for split in ('train', 'val'):
+        for i in range(num_images):
+            folder = os.path.join(root, split, 'n{:08d}'.format(i % num_class))
+            gcv.utils.makedirs(folder)
+            width, height = rng.randint(300, 500, size=2)
+            _random_image(rng, width, height).save(os.path.join(folder, '{:06d}.JPEG'.format(i)))
+    return root
+
+def make_ade20k(root, num_images, seed=0):
+    """Generate a synthetic ADE20K dataset under `root`."""
+    rng = np.random.RandomState(seed)
+    base = os.path.join(root, gdata.ADE20KSegmentation.BASE_DIR)
+    for split in ('training', 'validation'):
+        img_dir = os.path.join(base, 'images', split)
+        mask_dir = os.path.join(base, 'annotations', split)
+        gcv.utils.makedirs(img_dir)
+        gcv.utils.makedirs(mask_dir)
+        for i in range(num_images):
+            width, height = rng.randint(400, 600, size=2)
+            _random_image(rng, width, height).save(os.path.join(img_dir, '{:06d}.jpg'.format(i)))
+            mask = rng.randint(0, 151, size=(height, width)).astype('uint8')
+            Image.fromarray(mask).save(os.path.join(mask_dir, '{:06d}.png'.format(i)))
+    return root
+
+def make_datasets(root, num_images, seed=0):
+    """Generate all synthetic datasets under `root` and return their roots."""
+    roots = {
+        'voc': os.path.join(root, 'voc'),
+        'imagenet': os.path.join(root, 'imagenet'),
+        'ade': os.path.join(root, 'ade'),
+    }
+    make_voc(roots['voc'], num_images, seed)
+    make_imagenet(roots['imagenet'], num_images, seed)
+    make_ade20k(roots['ade'], num_images, seed)
+    return roots
+
+_NETS = {}
+
+def _get_net(name):
+    """Network used to generate training targets, built once."""
+    if name not in _NETS:
+        net = get_model(name, pretrained_base=False)
+        net.initialize()
+        _NETS[name] = net
+    return _NETS[name]
+
+def get_pipeline(name, split, roots):
+    """Return the dataset and batchify function of a training or validation pipeline."""
+    train = split == 'train'
+    if name == 'ssd':
+        dataset = gdata.VOCDetection(
+            root=roots['voc'], splits=[(2007, 'trainval' if train else 'test')])
+        if not train:
+            return dataset.transform(SSDDefaultValTransform(300, 300)), \
+                Tuple(Stack(), Pad(pad_val=-1))
+        net = _get_net('ssd_300_vgg16_atrous_voc')
+        with autograd.train_mode():
+            _, _, anchors = net(mx.nd.zeros((1, 3, 300, 300)))
+        return dataset.transform(SSDDefaultTrainTransform(300, 300, anchors)), \
+            Tuple(Stack(), Stack(), Stack())
+    elif name == 'faster_rcnn':
+        dataset = gdata.VOCDetection(
+            root=roots['voc'], splits=[(2007, 'trainval' if train else 'test')])
+        if not train:
+            return dataset.transform(FasterRCNNDefaultValTransform(600, 1000)), \
+                Tuple(Pad(axis=(1, 2)), Pad(pad_val=-1), Stack())
+        net = _get_net('faster_rcnn_resnet50_v2a_voc')
+        return dataset.transform(FasterRCNNDefaultTrainTransform(600, 1000, net)), \
+            Tuple(Pad(axis=(1, 2)), Pad(pad_val=-1), Pad(axis=(0, 1), pad_val=-1),
+                  Pad(axis=(0, 1)), Pad(axis=(0, 1)))
+    elif name == 'imagenet':
+        normalize = transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+        if train:
+            transform = transforms.Compose([
+                transforms.RandomResizedCrop(224),
+                transforms.RandomFlipLeftRight(),
+                transforms.RandomColorJitter(brightness=0.4, contrast=0.4, saturation=0.4),
+                transforms.RandomLighting(0.1),
+                transforms.ToTensor(),
+                normalize])
+        else:
+            transform = transforms.Compose([
+                transforms.Resize(256),
+                transforms.CenterCrop(224),
+                transforms.ToTensor(),
+                normalize])
+        dataset = gdata.ImageNet(roots['imagenet'], train=train)
+        return dataset.transform_first(transform), None
+    elif name == 'segmentation':
+        transform = transforms.Compose([
+            transforms.ToTensor(),
+            transforms.Normalize([.485, .456, .406], [.229, .224, .225])])
+        dataset = gdata.ADE20KSegmentation(
+            root=roots['ade'], split='train' if train else 'val', transform=transform)
+        return dataset, None
+    raise NotImplementedError('Pipeline: {} not implemented.'.format(name))
+
+def benchmark_loader(loader, num_batches, warmup=2):
+    """Measure samples per second of iterating over `loader`.
+
+    Iterations are restarted if the loader is exhausted before
+    `warmup` + `num_batches` batches are drawn. Raises ValueError if an epoch
+    yields no batch, e.g. with `last_batch='rollover'` and fewer samples than
+    the batch size.
+    """
+    def _batches():
+        while True:
+            empty = True
+            for batch in loader:
+                empty = False
+                yield batch
+            if empty:
+                raise ValueError('The loader yields no batch')
+
+    def _size(batch):
+        data = batch[0] if isinstance(batch, (list, tuple)) else batch
+        return len(data) if isinstance(data, list) else data.shape[0]
+
+    batches = _batches()
+    for _ in range(warmup):
+        next(batches)
+    mx.nd.waitall()
+    num_samples = 0
+    tic = time.time()
+    for _ in range(num_batches):
+        num_samples += _size(next(batches))
+    mx.nd.waitall()
+    elapsed = time.time() - tic
+    return {'samples': num_samples, 'seconds': elapsed,
+            'samples_per_sec': num_samples / elapsed}
+
+def run(pipelines, splits, num_workers, batch_sizes, roots, num_batches, warmup=2):
+    """Sweep pipelines, splits, numbers of workers and batch sizes."""
+    results = []
+    for name in pipelines:
+        for split in splits:
+            dataset, batchify_fn = get_pipeline(name, split, roots)
+            # a rolled over last batch is never yielded
+            too_large = [b for b in batch_sizes if b > len(dataset)]
+            if too_large:
+                raise ValueError('Batch sizes {} exceed the {} samples of {}/{}'.format(
+                    too_large, len(dataset), name, split))
+            for workers in num_workers:
+                for batch_size in batch_sizes:
+                    loader = gluon.data.DataLoader(
+                        dataset, batch_size, shuffle=split == 'train', last_batch='rollover',
+                        batchify_fn=batchify_fn, num_workers=workers)
+                    result = benchmark_loader(loader, num_batches, warmup)
+                    result.update({'pipeline': name, 'split': split,
+                                   'num_workers': workers, 'batch_size': batch_size})
+                    print('{pipeline}/{split} workers={num_workers} batch_size={batch_size}: '
+                          '{samples_per_sec:.1f} samples/sec'.format(**result))
+                    results.append(result)
+                    del loader
+    return results
+
+if __name__ == '__main__':
+    args = parse_args()
+    data_dir = args.data_dir if args.data_dir else tempfile.mkdtemp()
+    try:
+        roots = make_datasets(os.path.expanduser(data_dir), args.num_images, args.seed)
+        results = run([x.strip() for x in args.pipelines.split(',') if x.strip()],
+                      [x.strip() for x in args.splits.split(',') if x.strip()],
+                      [int(x) for x in args.num_workers.split(',')],
+                      [int(x) for x in args.batch_sizes.split(',')],
+                      roots, args.num_batches, args.warmup)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir)
+    report = {
+        'gluoncv': gcv.__version__,
+        'mxnet': mx.__version__,
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count() if hasattr(os, 'cpu_count') else None,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'num_images': args.num_images,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
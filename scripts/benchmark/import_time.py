@@ -0,0 +1,37 @@
+"""Benchmark the time of importing gluoncv and its sub-packages.
+
+Each statement runs in a fresh interpreter, so that module caches of
+previous runs do not hide import costs.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import argparse
+import subprocess
+
+STATEMENTS = [
+    'import gluoncv',
+    'from gluoncv.utils import bbox_iou',
+    'from gluoncv import data',
+    'from gluoncv.model_zoo import get_model',
+    'from gluoncv.model_zoo import get_model; get_model("cifar_resnet20_v1")',
+    'import gluoncv.model_zoo; dir(gluoncv.model_zoo.ssd)',
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark gluoncv import time.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs of each statement, the best one is reported.')
+    return parser.parse_args()
+
+def time_statement(stmt, repeat):
+    """Return the best wall time in seconds of running `stmt` in new interpreters."""
+    code = 'import time; tic = time.time(); {}; print(time.time() - tic)'.format(stmt)
+    return min(float(subprocess.check_output([sys.executable, '-c', code]).decode().split()[-1])
+               for _ in range(repeat))
+
+if __name__ == '__main__':
+    args = parse_args()
+    for stmt in STATEMENTS:
+        print('{:8.1f} ms  {}'.format(time_statement(stmt, args.repeat) * 1000, stmt))
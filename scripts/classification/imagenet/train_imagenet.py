@@ -10,7 +10,7 @@ from mxnet import autograd as ag
 from mxnet.gluon import nn
 from mxnet.gluon.data.vision import transforms
 
-from gluoncv.data import imagenet
+from gluoncv.data import imagenet, DevicePrefetchLoader
 from gluoncv.model_zoo import get_model
 from gluoncv.utils import makedirs, TrainingHistory, freeze_bn
 
@@ -166,6 +166,8 @@ def train(epochs, ctx):
     train_data = gluon.data.DataLoader(
         imagenet.classification.ImageNet(opt.data_dir, train=True).transform_first(transform_train),
         batch_size=batch_size, shuffle=True, last_batch='discard', num_workers=num_workers)
+    # split and copy upcoming batches to devices in background
+    train_data = DevicePrefetchLoader(train_data, ctx)
     val_data = gluon.data.DataLoader(
         imagenet.classification.ImageNet(opt.data_dir, train=False).transform_first(transform_test),
         batch_size=batch_size, shuffle=False, num_workers=num_workers)
@@ -197,9 +199,7 @@ def train(epochs, ctx):
         if opt.freeze_bn and epoch == epochs - 10:
             freeze_bn(net, True)
 
-        for i, batch in enumerate(train_data):
-            data = gluon.utils.split_and_load(batch[0], ctx_list=ctx, batch_axis=0)
-            label = gluon.utils.split_and_load(batch[1], ctx_list=ctx, batch_axis=0)
+        for i, (data, label) in enumerate(train_data):
             if opt.label_smoothing:
                 label_smooth = smooth(label, classes)
             else:
@@ -1,4 +1,8 @@
+import os
+import shutil
+import tempfile
 import argparse
+import time
 
 import mxnet as mx
 from mxnet import gluon, nd
@@ -6,6 +10,7 @@ from mxnet.gluon.data.vision import transforms
 
 from gluoncv.data import imagenet
 from gluoncv.model_zoo import get_model
+from gluoncv.utils import quantize_net
 
 # CLI
 parser = argparse.ArgumentParser(description='Train a model for image classification.')
@@ -23,13 +28,22 @@ parser.add_argument('--params-file', type=str,
                     help='local parameter file to load, instead of pre-trained weight.')
 parser.add_argument('--use_se', action='store_true',
                     help='use SE layers or not in resnext. default is false.')
+parser.add_argument('--quantized', action='store_true',
+                    help='quantize the model to INT8 with calibration and evaluate it on CPU.')
+parser.add_argument('--calib-mode', type=str, default='naive',
+                    help='calibration mode of quantization, naive or entropy.')
+parser.add_argument('--num-calib-samples', type=int, default=500,
+                    help='number of training images used for calibration.')
+parser.add_argument('--quantized-prefix', type=str, default='',
+                    help='path prefix to save the quantized model to, by default it is '
+                    'saved to a temporary directory and removed after loading.')
 opt = parser.parse_args()
 
 batch_size = opt.batch_size
 classes = 1000
 
 num_gpus = opt.num_gpus
-batch_size *= num_gpus
+batch_size *= max(num_gpus, 1)
 ctx = [mx.gpu(i) for i in range(num_gpus)] if num_gpus > 0 else [mx.cpu()]
 num_workers = opt.num_workers
 
@@ -61,10 +75,13 @@ def test(ctx, val_data):
     acc_top1.reset()
     acc_top5.reset()
     num_batch = len(val_data)
+    num_images = 0
+    tic = time.time()
     for i, batch in enumerate(val_data):
         data = gluon.utils.split_and_load(batch[0], ctx_list=ctx, batch_axis=0)
         label = gluon.utils.split_and_load(batch[1], ctx_list=ctx, batch_axis=0)
         outputs = [net(X) for X in data]
+        num_images += batch[0].shape[0]
         acc_top1.update(label, outputs)
         acc_top5.update(label, outputs)
 
@@ -74,12 +91,28 @@ def test(ctx, val_data):
 
     _, top1 = acc_top1.get()
     _, top5 = acc_top5.get()
+    print('Throughput: %.2f images/sec' % (num_images / (time.time() - tic)))
     return (1-top1, 1-top5)
 
 val_data = gluon.data.DataLoader(
     imagenet.classification.ImageNet(opt.data_dir, train=False).transform_first(transform_test),
     batch_size=batch_size, shuffle=False, num_workers=num_workers)
 
+if opt.quantized:
+    # calibrate on a random subset of training images, quantized ops run on CPU
+    calib_data = gluon.data.DataLoader(
+        imagenet.classification.ImageNet(opt.data_dir, train=True).transform_first(transform_test),
+        batch_size=batch_size, shuffle=True, last_batch='discard', num_workers=num_workers)
+    tmp_dir = None if opt.quantized_prefix else tempfile.mkdtemp()
+    prefix = opt.quantized_prefix or os.path.join(tmp_dir, model_name + '-quantized')
+    sym_file, params_file = quantize_net(
+        net, calib_data, (batch_size, 3, 224, 224), prefix,
+        num_calib_examples=opt.num_calib_samples, calib_mode=opt.calib_mode)
+    ctx = [mx.cpu()]
+    net = gluon.SymbolBlock.imports(sym_file, ['data'], params_file, ctx=mx.cpu())
+    if tmp_dir:
+        shutil.rmtree(tmp_dir)
+
 err_top1_val, err_top5_val = test(ctx, val_data)
 print(err_top1_val, err_top5_val)
 
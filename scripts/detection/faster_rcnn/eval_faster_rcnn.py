@@ -24,6 +24,9 @@ def parse_args():
                         help="Base feature extraction network name")
     parser.add_argument('--dataset', type=str, default='voc',
                         help='Training dataset.')
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help='Evaluation mini-batch size, images are split over devices. '
+                        'Default is 1 image per device.')
     parser.add_argument('--num-workers', '-j', dest='num_workers', type=int,
                         default=4, help='Number of data workers')
     parser.add_argument('--gpus', type=str, default='0',
@@ -32,6 +35,11 @@ def parse_args():
                         help='Load weights from previously saved parameters.')
     parser.add_argument('--save-prefix', type=str, default='',
                         help='Saving parameter prefix')
+    parser.add_argument('--tta-scales', type=str, default='',
+                        help='Test-time augmentation scales, use comma to split multiple, '
+                        'e.g. 0.8,1.0,1.2.')
+    parser.add_argument('--tta-flip', action='store_true',
+                        help='Add horizontally flipped test-time augmentation views.')
     args = parser.parse_args()
     return args
 
@@ -50,55 +58,53 @@ def get_dataset(dataset, args):
 def get_dataloader(net, val_dataset, batch_size, num_workers):
     """Get dataloader."""
     short, max_size = 600, 1000
-    val_bfn = batchify.Tuple(*[batchify.Append() for _ in range(3)])
+    # keep image sizes to clip proposals and detections of padded images
+    val_bfn = batchify.Tuple(batchify.Pad(axis=(1, 2), ret_length=True),
+                             batchify.Pad(pad_val=-1), batchify.Stack())
     val_loader = mx.gluon.data.DataLoader(
         val_dataset.transform(FasterRCNNDefaultValTransform(short, max_size)),
         batch_size, False, batchify_fn=val_bfn, last_batch='keep', num_workers=num_workers)
     return val_loader
 
 def split_and_load(batch, ctx_list):
-    """Split data to 1 batch each device."""
-    num_ctx = len(ctx_list)
-    new_batch = []
-    for i, data in enumerate(batch):
-        new_data = [x.as_in_context(ctx) for x, ctx in zip(data, ctx_list)]
-        new_batch.append(new_data)
-    return new_batch
+    """Split padded data to devices along batch axis."""
+    # the last batch could be smaller than number of devices
+    ctx_list = ctx_list[:batch[0].shape[0]]
+    return [gluon.utils.split_and_load(data, ctx_list, even_split=False) for data in batch]
 
 def validate(net, val_data, ctx, eval_metric, size):
     """Test on validation dataset."""
     eval_metric.reset()
     net.collect_params().reset_ctx(ctx)
-    net.set_nms(nms_thresh=0.3, nms_topk=400)
     # net.hybridize()
     with tqdm(total=size) as pbar:
-        for ib, batch in enumerate(val_data):
-            batch = split_and_load(batch, ctx_list=ctx)
+        for ib, ((data, im_size), label, im_scale) in enumerate(val_data):
+            batch = split_and_load([data, im_size, label, im_scale], ctx_list=ctx)
             det_bboxes = []
             det_ids = []
             det_scores = []
             gt_bboxes = []
             gt_ids = []
             gt_difficults = []
-            for x, y, im_scale in zip(*batch):
-                # get prediction results
-                ids, scores, bboxes = net(x)
-                det_ids.append(ids.expand_dims(0))
-                det_scores.append(scores.expand_dims(0))
-                # clip to image size
-                det_bboxes.append(mx.nd.Custom(bboxes, x, op_type='bbox_clip_to_image').expand_dims(0))
+            for x, x_size, y, x_scale in zip(*batch):
+                # get prediction results, clipped to each image by the network
+                if isinstance(net, gcv.model_zoo.DetectionTTA):
+                    ids, scores, bboxes = net(x, x_size)
+                else:
+                    ids, scores, bboxes = net(x, None, x_size)
+                det_ids.append(ids)
+                det_scores.append(scores)
                 # rescale to original resolution
-                im_scale = im_scale.reshape((-1)).asscalar()
-                det_bboxes[-1] *= im_scale
+                x_scale = x_scale.reshape((-1, 1, 1))
+                det_bboxes.append(bboxes * x_scale)
                 # split ground truths
                 gt_ids.append(y.slice_axis(axis=-1, begin=4, end=5))
-                gt_bboxes.append(y.slice_axis(axis=-1, begin=0, end=4))
-                gt_bboxes[-1] *= im_scale
+                gt_bboxes.append(y.slice_axis(axis=-1, begin=0, end=4) * x_scale)
                 gt_difficults.append(y.slice_axis(axis=-1, begin=5, end=6) if y.shape[-1] > 5 else None)
             # update metric
             for det_bbox, det_id, det_score, gt_bbox, gt_id, gt_diff in zip(det_bboxes, det_ids, det_scores, gt_bboxes, gt_ids, gt_difficults):
                 eval_metric.update(det_bbox, det_id, det_score, gt_bbox, gt_id, gt_diff)
-            pbar.update(len(ctx))
+            pbar.update(data.shape[0])
     return eval_metric.get()
 
 if __name__ == '__main__':
@@ -107,7 +113,7 @@ if __name__ == '__main__':
     # training contexts
     ctx = [mx.gpu(int(i)) for i in args.gpus.split(',') if i.strip()]
     ctx = ctx if ctx else [mx.cpu()]
-    args.batch_size = len(ctx)  # 1 batch per device
+    args.batch_size = args.batch_size if args.batch_size > 0 else len(ctx)
 
     # network
     net_name = '_'.join(('faster_rcnn', args.network, args.dataset))
@@ -117,6 +123,11 @@ if __name__ == '__main__':
     else:
         net = gcv.model_zoo.get_model(net_name, pretrained=False)
         net.load_params(args.pretrained.strip())
+    net.set_nms(nms_thresh=0.3, nms_topk=400)
+    if args.tta_flip or args.tta_scales.strip():
+        scales = [float(s) for s in args.tta_scales.split(',') if s.strip()] or [1.0]
+        net = gcv.model_zoo.DetectionTTA(net, scales=scales, flip=args.tta_flip,
+                                         nms_thresh=0.3, post_nms=400)
 
     # training data
     val_dataset, eval_metric = get_dataset(args.dataset, args)
@@ -28,6 +28,9 @@ def parse_args():
                         help="Base network name which serves as feature extraction base.")
     parser.add_argument('--dataset', type=str, default='voc',
                         help='Training dataset. Now support voc.')
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help='Training mini-batch size, images are split over devices. '
+                        'Default is 1 image per device.')
     parser.add_argument('--num-workers', '-j', dest='num_workers', type=int,
                         default=4, help='Number of data workers, you can use larger '
                         'number to accelerate data loading, if you CPU and GPUs are powerful.')
@@ -62,6 +65,9 @@ def parse_args():
                              'training time if validation is slow.')
     parser.add_argument('--seed', type=int, default=233,
                         help='Random seed to be fixed.')
+    parser.add_argument('--dtype', type=str, default='float32',
+                        help='Training data type, float16 for mixed precision training with '
+                             'dynamic loss scaling. Default is float32.')
     parser.add_argument('--verbose', dest='verbose', action='store_true',
                         help='Print helpful debugging info once set.')
     args = parser.parse_args()
@@ -167,11 +173,17 @@ def get_dataloader(net, train_dataset, val_dataset, batch_size, num_workers):
     """Get dataloader."""
     short, max_size = 600, 1000
 
-    train_bfn = batchify.Tuple(*[batchify.Append() for _ in range(5)])
+    # pad images with their sizes, labels and rpn targets on the feature map
+    train_bfn = batchify.Tuple(batchify.Pad(axis=(1, 2), ret_length=True),
+                               batchify.Pad(pad_val=-1),
+                               batchify.Pad(axis=(0, 1), pad_val=-1),
+                               batchify.Pad(axis=(0, 1)), batchify.Pad(axis=(0, 1)))
     train_loader = mx.gluon.data.DataLoader(
         train_dataset.transform(FasterRCNNDefaultTrainTransform(short, max_size, net)),
         batch_size, True, batchify_fn=train_bfn, last_batch='rollover', num_workers=num_workers)
-    val_bfn = batchify.Tuple(*[batchify.Append() for _ in range(3)])
+    # keep image sizes to clip proposals and detections of padded images
+    val_bfn = batchify.Tuple(batchify.Pad(axis=(1, 2), ret_length=True),
+                             batchify.Pad(pad_val=-1), batchify.Stack())
     val_loader = mx.gluon.data.DataLoader(
         val_dataset.transform(FasterRCNNDefaultValTransform(short, max_size)),
         batch_size, False, batchify_fn=val_bfn, last_batch='keep', num_workers=num_workers)
@@ -188,42 +200,39 @@ def save_params(net, best_map, current_map, epoch, save_interval, prefix):
         net.save_params('{:s}_{:04d}_{:.4f}.params'.format(prefix, epoch, current_map))
 
 def split_and_load(batch, ctx_list):
-    """Split data to 1 batch each device."""
-    num_ctx = len(ctx_list)
-    new_batch = []
-    for i, data in enumerate(batch):
-        new_data = [x.as_in_context(ctx) for x, ctx in zip(data, ctx_list)]
-        new_batch.append(new_data)
-    return new_batch
-
-def validate(net, val_data, ctx, eval_metric):
+    """Split padded data to devices along batch axis, padded images with their sizes
+    are flattened into images and sizes."""
+    batch = [d for data in batch for d in (data if isinstance(data, (tuple, list)) else [data])]
+    # the last batch could be smaller than number of devices
+    ctx_list = ctx_list[:batch[0].shape[0]]
+    return [gluon.utils.split_and_load(data, ctx_list, even_split=False) for data in batch]
+
+def validate(net, val_data, ctx, eval_metric, dtype='float32'):
     """Test on validation dataset."""
     eval_metric.reset()
     # set nms threshold and topk constraint
     net.set_nms(nms_thresh=0.3, nms_topk=400)
     net.hybridize()
-    for batch in val_data:
-        batch = split_and_load(batch, ctx_list=ctx)
+    for (data, im_size), label, im_scale in val_data:
+        batch = split_and_load([data, im_size, label, im_scale], ctx_list=ctx)
         det_bboxes = []
         det_ids = []
         det_scores = []
         gt_bboxes = []
         gt_ids = []
         gt_difficults = []
-        for x, y, im_scale in zip(*batch):
+        for x, x_size, y, x_scale in zip(*batch):
             # get prediction results
-            ids, scores, bboxes = net(x)
-            det_ids.append(ids.expand_dims(0))
-            det_scores.append(scores.expand_dims(0))
-            # clip to image size
-            det_bboxes.append(mx.nd.Custom(bboxes, x, op_type='bbox_clip_to_image').expand_dims(0))
+            # get prediction results clipped to each image
+            ids, scores, bboxes = net(x.astype(dtype, copy=False), None, x_size)
+            det_ids.append(ids)
+            det_scores.append(scores)
             # rescale to original resolution
-            im_scale = im_scale.reshape((-1)).asscalar()
-            det_bboxes[-1] *= im_scale
+            x_scale = x_scale.reshape((-1, 1, 1))
+            det_bboxes.append(bboxes * x_scale)
             # split ground truths
             gt_ids.append(y.slice_axis(axis=-1, begin=4, end=5))
-            gt_bboxes.append(y.slice_axis(axis=-1, begin=0, end=4))
-            gt_bboxes[-1] *= im_scale
+            gt_bboxes.append(y.slice_axis(axis=-1, begin=0, end=4) * x_scale)
             gt_difficults.append(y.slice_axis(axis=-1, begin=5, end=6) if y.shape[-1] > 5 else None)
 
         # update metric
@@ -240,7 +249,10 @@ def train(net, train_data, val_data, eval_metric, args):
         {'learning_rate': args.lr,
          'wd': args.wd,
          'momentum': args.momentum,
-         'clip_gradient': 5})
+         'clip_gradient': 5,
+         'multi_precision': True})
+    # float16 gradients underflow without loss scaling
+    scaler = gutils.DynamicLossScaler() if args.dtype == 'float16' else None
 
     # lr decay policy
     lr_decay = float(args.lr_decay)
@@ -277,6 +289,8 @@ def train(net, train_data, val_data, eval_metric, args):
         logger.info('Trainable parameters:')
         logger.info(net.collect_train_params().keys())
     logger.info('Start training from [Epoch {}]'.format(args.start_epoch))
+    # copy upcoming batches to devices in background
+    train_data = gcv.data.DevicePrefetchLoader(train_data, ctx, split_fn=split_and_load)
     best_map = [0]
     for epoch in range(args.start_epoch, args.epochs):
         while lr_steps and epoch >= lr_steps[0]:
@@ -290,18 +304,21 @@ def train(net, train_data, val_data, eval_metric, args):
         btic = time.time()
         net.hybridize()
         for i, batch in enumerate(train_data):
-            batch = split_and_load(batch, ctx_list=ctx)
-            batch_size = len(batch[0])
+            batch_size = sum([x.shape[0] for x in batch[0]])
             losses = []
             metric_losses = [[] for _ in metrics]
             add_losses = [[] for _ in metrics2]
             with autograd.record():
-                for data, label, rpn_cls_targets, rpn_box_targets, rpn_box_masks in zip(*batch):
+                for data, im_size, label, rpn_cls_targets, rpn_box_targets, rpn_box_masks in zip(*batch):
                     gt_label = label[:, :, 4:5]
                     gt_box = label[:, :, :4]
-                    cls_pred, box_pred, roi, samples, matches, rpn_score, rpn_box, anchors = net(data, gt_box)
+                    cls_pred, box_pred, roi, samples, matches, rpn_score, rpn_box, anchors = net(
+                        data.astype(args.dtype, copy=False), gt_box, im_size)
                     # losses of rpn
                     rpn_score = rpn_score.squeeze(axis=-1)
+                    rpn_cls_targets = rpn_cls_targets.reshape((0, -1))
+                    rpn_box_targets = rpn_box_targets.reshape((0, -1, 4))
+                    rpn_box_masks = rpn_box_masks.reshape((0, -1, 4))
                     num_rpn_pos = (rpn_cls_targets >= 0).sum()
                     rpn_loss1 = rpn_cls_loss(rpn_score, rpn_cls_targets, rpn_cls_targets >= 0) * rpn_cls_targets.size / num_rpn_pos
                     rpn_loss2 = rpn_box_loss(rpn_box, rpn_box_targets, rpn_box_masks) * rpn_box.size / num_rpn_pos
@@ -309,8 +326,8 @@ def train(net, train_data, val_data, eval_metric, args):
                     rpn_loss = rpn_loss1 + rpn_loss2
                     # generate targets for rcnn
                     cls_targets, box_targets, box_masks = net.target_generator(roi, samples, matches, gt_label, gt_box)
-                    # losses of rcnn
-                    num_rcnn_pos = (cls_targets >= 0).sum()
+                    # losses of rcnn, normalized by samples per image
+                    num_rcnn_pos = (cls_targets >= 0).sum() / data.shape[0]
                     rcnn_loss1 = rcnn_cls_loss(cls_pred, cls_targets, cls_targets >= 0) * cls_targets.size / cls_targets.shape[0] / num_rcnn_pos
                     rcnn_loss2 = rcnn_box_loss(box_pred, box_targets, box_masks) * box_pred.size / box_pred.shape[0] / num_rcnn_pos
                     rcnn_loss = rcnn_loss1 + rcnn_loss2
@@ -324,13 +341,16 @@ def train(net, train_data, val_data, eval_metric, args):
                     add_losses[1].append([[rpn_box_targets, rpn_box_masks], [rpn_box]])
                     add_losses[2].append([[cls_targets], [cls_pred]])
                     add_losses[3].append([[box_targets, box_masks], [box_pred]])
-                autograd.backward(losses)
+                autograd.backward(scaler.scale(losses) if scaler else losses)
                 for metric, record in zip(metrics, metric_losses):
                     metric.update(0, record)
                 for metric, records in zip(metrics2, add_losses):
                     for pred in records:
                         metric.update(pred[0], pred[1])
-            trainer.step(batch_size)
+            if scaler:
+                scaler.step(trainer, batch_size)
+            else:
+                trainer.step(batch_size)
             # update metrics
             if args.log_interval and not (i + 1) % args.log_interval:
                 # msg = ','.join(['{}={:.3f}'.format(*metric.get()) for metric in metrics])
@@ -344,7 +364,7 @@ def train(net, train_data, val_data, eval_metric, args):
             epoch, (time.time()-tic), msg))
         if not (epoch + 1) % args.val_interval:
             # consider reduce the frequency of validation to save time
-            map_name, mean_ap = validate(net, val_data, ctx, eval_metric)
+            map_name, mean_ap = validate(net, val_data, ctx, eval_metric, args.dtype)
             val_msg = '\n'.join(['{}={}'.format(k, v) for k, v in zip(map_name, mean_ap)])
             logger.info('[Epoch {}] Validation: \n{}'.format(epoch, val_msg))
             current_map = float(mean_ap[-1])
@@ -360,7 +380,7 @@ if __name__ == '__main__':
     # training contexts
     ctx = [mx.gpu(int(i)) for i in args.gpus.split(',') if i.strip()]
     ctx = ctx if ctx else [mx.cpu()]
-    args.batch_size = len(ctx)  # 1 batch per device
+    args.batch_size = args.batch_size if args.batch_size > 0 else len(ctx)
 
     # network
     net_name = '_'.join(('faster_rcnn', args.network, args.dataset))
@@ -373,6 +393,8 @@ if __name__ == '__main__':
             if param._data is not None:
                 continue
             param.initialize()
+    if args.dtype != 'float32':
+        net.cast(args.dtype)
 
     # training data
     train_dataset, val_dataset, eval_metric = get_dataset(args.dataset, args)
@@ -0,0 +1,105 @@
+"""Profile detection data pipelines stage by stage, without running any model."""
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import tempfile
+import time
+import shutil
+import mxnet as mx
+from mxnet import gluon
+from mxnet import autograd
+from gluoncv import data as gdata
+from gluoncv.data import profiler
+from gluoncv.data.batchify import Tuple, Stack, Pad
+from gluoncv.data.transforms.presets.ssd import SSDDefaultTrainTransform
+from gluoncv.data.transforms.presets.ssd import SSDDefaultValTransform
+from gluoncv.data.transforms.presets.rcnn import FasterRCNNDefaultTrainTransform
+from gluoncv.data.transforms.presets.rcnn import FasterRCNNDefaultValTransform
+from gluoncv.model_zoo import get_model
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Profile decode, augmentation, target generation and batchify stages '
+                    'of detection data pipelines.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dataset', type=str, default='voc',
+                        help='Dataset, voc or coco.')
+    parser.add_argument('--split', type=str, default='train',
+                        help='Which pipeline to profile, train or val.')
+    parser.add_argument('--pipeline', type=str, default='ssd',
+                        help='Preset transforms to use, ssd or faster_rcnn.')
+    parser.add_argument('--network', type=str, default='',
+                        help='Network used to generate training targets, e.g. '
+                             'ssd_300_vgg16_atrous_voc. Targets are skipped if empty.')
+    parser.add_argument('--data-shape', type=int, default=300,
+                        help='SSD input data shape.')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Mini-batch size.')
+    parser.add_argument('--num-workers', '-j', dest='num_workers', type=int, default=4,
+                        help='Number of data workers.')
+    parser.add_argument('--num-batches', type=int, default=50,
+                        help='Number of batches to load, 0 for an entire epoch.')
+    args = parser.parse_args()
+    return args
+
+def get_dataset(dataset, split):
+    if dataset.lower() == 'voc':
+        splits = [(2007, 'trainval'), (2012, 'trainval')] if split == 'train' else [(2007, 'test')]
+        return gdata.VOCDetection(splits=splits)
+    elif dataset.lower() == 'coco':
+        if split == 'train':
+            return gdata.COCODetection(splits='instances_train2017')
+        return gdata.COCODetection(splits='instances_val2017', skip_empty=False)
+    raise NotImplementedError('Dataset: {} not implemented.'.format(dataset))
+
+def get_transform(args):
+    """Return the preset transform and batchify function of the pipeline."""
+    net = None
+    if args.network:
+        net = get_model(args.network, pretrained_base=False)
+        net.initialize()
+    if args.pipeline == 'ssd':
+        width, height = args.data_shape, args.data_shape
+        if args.split != 'train':
+            return SSDDefaultValTransform(width, height), Tuple(Stack(), Pad(pad_val=-1))
+        if net is None:
+            return SSDDefaultTrainTransform(width, height), Tuple(Stack(), Pad(pad_val=-1))
+        with autograd.train_mode():
+            _, _, anchors = net(mx.nd.zeros((1, 3, height, width)))
+        return SSDDefaultTrainTransform(width, height, anchors), Tuple(Stack(), Stack(), Stack())
+    elif args.pipeline == 'faster_rcnn':
+        if args.split != 'train':
+            return FasterRCNNDefaultValTransform(), \
+                Tuple(Pad(axis=(1, 2)), Pad(pad_val=-1), Stack())
+        if net is None:
+            return FasterRCNNDefaultTrainTransform(), Tuple(Pad(axis=(1, 2)), Pad(pad_val=-1))
+        return FasterRCNNDefaultTrainTransform(net=net), \
+            Tuple(Pad(axis=(1, 2)), Pad(pad_val=-1), Pad(axis=(0, 1), pad_val=-1),
+                  Pad(axis=(0, 1)), Pad(axis=(0, 1)))
+    raise NotImplementedError('Pipeline: {} not implemented.'.format(args.pipeline))
+
+if __name__ == '__main__':
+    args = parse_args()
+    transform, batchify_fn = get_transform(args)
+    dataset = get_dataset(args.dataset, args.split)
+    out_dir = tempfile.mkdtemp()
+    # must be enabled before workers are created
+    profiler.enable(out_dir)
+    try:
+        loader = gluon.data.DataLoader(
+            dataset.transform(transform), args.batch_size, args.split == 'train',
+            batchify_fn=batchify_fn, last_batch='keep', num_workers=args.num_workers)
+        num_samples = 0
+        tic = time.time()
+        for i, batch in enumerate(loader):
+            num_samples += len(batch[0])
+            if args.num_batches and i + 1 >= args.num_batches:
+                break
+        elapsed = time.time() - tic
+        print('Loaded {} samples in {:.3f} sec, {:.1f} samples/sec with {} workers.'.format(
+            num_samples, elapsed, num_samples / elapsed, args.num_workers))
+        print(profiler.report(profiler.collect(), elapsed))
+    finally:
+        profiler.disable()
+        shutil.rmtree(out_dir)
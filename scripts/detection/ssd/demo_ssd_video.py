@@ -0,0 +1,67 @@
+"""SSD video demo script."""
+import argparse
+import logging
+logging.basicConfig(level=logging.INFO)
+import mxnet as mx
+import gluoncv as gcv
+from gluoncv.data.transforms import presets
+from gluoncv.utils.video import VideoDetector, VideoReader
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run SSD networks on a video stream.')
+    parser.add_argument('--network', type=str, default='ssd_512_mobilenet1.0_voc',
+                        help="Base network name")
+    parser.add_argument('--data-shape', type=int, default=512,
+                        help="Input data shape")
+    parser.add_argument('--video', type=str, default='0',
+                        help='Video file, or index of camera.')
+    parser.add_argument('--output', type=str, default='',
+                        help='Save rendered video to this file.')
+    parser.add_argument('--batch-size', type=int, default=4,
+                        help='Maximum number of frames in a forward pass.')
+    parser.add_argument('--target-fps', type=float, default=0,
+                        help='Skip frames above this frame rate, 0 to disable.')
+    parser.add_argument('--gpus', type=str, default='0',
+                        help='Run with GPU, you can specify 1 for example.')
+    parser.add_argument('--pretrained', type=str, default='True',
+                        help='Load weights from previously saved parameters.')
+    args = parser.parse_args()
+    return args
+
+if __name__ == '__main__':
+    import cv2
+    args = parse_args()
+    ctx = [mx.gpu(int(i)) for i in args.gpus.split(',') if i.strip()]
+    ctx = ctx[0] if ctx else mx.cpu()
+
+    if args.pretrained.lower() in ['true', '1', 'yes', 't']:
+        net = gcv.model_zoo.get_model(args.network, pretrained=True)
+    else:
+        net = gcv.model_zoo.get_model(args.network, pretrained=False)
+        net.load_params(args.pretrained)
+    net.set_nms(0.45, 200)
+
+    source = VideoReader(int(args.video) if args.video.isdigit() else args.video)
+    detector = VideoDetector(
+        net, presets.ssd.SSDDefaultValTransform(args.data_shape, args.data_shape),
+        batch_size=args.batch_size, target_fps=args.target_fps or None,
+        class_names=net.classes, ctx=ctx)
+    writer = None
+    try:
+        for i, (frame, _) in enumerate(detector.run(source)):
+            frame = frame[:, :, ::-1]
+            if args.output:
+                if writer is None:
+                    writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*'mp4v'),
+                                             args.target_fps or 25, frame.shape[1::-1])
+                writer.write(frame)
+            else:
+                cv2.imshow('SSD', frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+            if i % 100 == 0 and i > 0:
+                logging.info('Stage stats: %s', detector.stats())
+    finally:
+        if writer is not None:
+            writer.release()
+    logging.info('Stage stats: %s', detector.stats())
@@ -1,5 +1,8 @@
 from __future__ import division
 
+import os
+import shutil
+import tempfile
 import argparse
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +18,7 @@ from gluoncv.data.batchify import Tuple, Stack, Pad
 from gluoncv.data.transforms.presets.ssd import SSDDefaultValTransform
 from gluoncv.utils.metrics.voc_detection import VOC07MApMetric
 from gluoncv.utils.metrics.coco_detection import COCODetectionMetric
+from gluoncv.utils import quantize_net
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Eval SSD networks.')
@@ -34,6 +38,20 @@ def parse_args():
                         help='Load weights from previously saved parameters.')
     parser.add_argument('--save-prefix', type=str, default='',
                         help='Saving parameter prefix')
+    parser.add_argument('--quantized', action='store_true',
+                        help='Quantize the model to INT8 with calibration and evaluate it on CPU.')
+    parser.add_argument('--calib-mode', type=str, default='naive',
+                        help='Calibration mode of quantization, naive or entropy.')
+    parser.add_argument('--num-calib-samples', type=int, default=500,
+                        help='Number of training images used for calibration.')
+    parser.add_argument('--quantized-prefix', type=str, default='',
+                        help='Path prefix to save the quantized model to, by default it is '
+                        'saved to a temporary directory and removed after loading.')
+    parser.add_argument('--tta-scales', type=str, default='',
+                        help='Test-time augmentation scales, use comma to split multiple, '
+                        'e.g. 0.8,1.0,1.2.')
+    parser.add_argument('--tta-flip', action='store_true',
+                        help='Add horizontally flipped test-time augmentation views.')
     args = parser.parse_args()
     return args
 
@@ -50,21 +68,29 @@ def get_dataset(dataset, data_shape):
         raise NotImplementedError('Dataset: {} not implemented.'.format(dataset))
     return val_dataset, val_metric
 
+def get_calib_dataset(dataset):
+    """Get training dataset used for quantization calibration."""
+    if dataset.lower() == 'voc':
+        return gdata.VOCDetection(splits=[(2007, 'trainval')])
+    elif dataset.lower() == 'coco':
+        return gdata.COCODetection(splits='instances_train2017')
+    raise NotImplementedError('Dataset: {} not implemented.'.format(dataset))
+
 def get_dataloader(val_dataset, data_shape, batch_size, num_workers):
     """Get dataloader."""
     width, height = data_shape, data_shape
     batchify_fn = Tuple(Stack(), Pad(pad_val=-1))
     val_loader = gluon.data.DataLoader(
-        val_dataset.transform(SSDDefaultValTransform(width, height)), batchify_fn=batchify_fn,
-        batch_size, False, last_batch='keep', num_workers=num_workers)
+        val_dataset.transform(SSDDefaultValTransform(width, height)), batch_size, False,
+        batchify_fn=batchify_fn, last_batch='keep', num_workers=num_workers)
     return val_loader
 
 def validate(net, val_data, ctx, classes, size, metric):
     """Test on validation dataset."""
     net.collect_params().reset_ctx(ctx)
     metric.reset()
-    net.set_nms(nms_thresh=0.45, nms_topk=400)
     net.hybridize()
+    tic = time.time()
     with tqdm(total=size) as pbar:
         for ib, batch in enumerate(val_data):
             data = gluon.utils.split_and_load(batch[0], ctx_list=ctx, batch_axis=0)
@@ -88,6 +114,7 @@ def validate(net, val_data, ctx, classes, size, metric):
 
             metric.update(det_bboxes, det_ids, det_scores, gt_bboxes, gt_ids, gt_difficults)
             pbar.update(batch[0].shape[0])
+    logging.info('Throughput: %.2f images/sec', size / (time.time() - tic))
     return metric.get()
 
 if __name__ == '__main__':
@@ -105,6 +132,7 @@ if __name__ == '__main__':
     else:
         net = gcv.model_zoo.get_model(net_name, pretrained=False)
         net.load_params(args.pretrained.strip())
+    net.set_nms(nms_thresh=0.45, nms_topk=400)
 
     # training data
     val_dataset, val_metric = get_dataset(args.dataset, args.data_shape)
@@ -112,6 +140,28 @@ if __name__ == '__main__':
         val_dataset, args.data_shape, args.batch_size, args.num_workers)
     classes = val_dataset.classes  # class names
 
+    if args.quantized:
+        # calibrate on a random subset of training images, quantized ops run on CPU
+        ctx = [mx.cpu()]
+        calib_data = gluon.data.DataLoader(
+            get_calib_dataset(args.dataset).transform(
+                SSDDefaultValTransform(args.data_shape, args.data_shape)),
+            args.batch_size, True, batchify_fn=Tuple(Stack(), Pad(pad_val=-1)),
+            last_batch='discard', num_workers=args.num_workers)
+        tmp_dir = None if args.quantized_prefix else tempfile.mkdtemp()
+        prefix = args.quantized_prefix or os.path.join(tmp_dir, net_name + '_quantized')
+        sym_file, params_file = quantize_net(
+            net, calib_data, (args.batch_size, 3, args.data_shape, args.data_shape),
+            prefix, num_calib_examples=args.num_calib_samples, calib_mode=args.calib_mode)
+        net = gluon.SymbolBlock.imports(sym_file, ['data'], params_file, ctx=mx.cpu())
+        if tmp_dir:
+            shutil.rmtree(tmp_dir)
+
+    if args.tta_flip or args.tta_scales.strip():
+        scales = [float(s) for s in args.tta_scales.split(',') if s.strip()] or [1.0]
+        net = gcv.model_zoo.DetectionTTA(net, scales=scales, flip=args.tta_flip,
+                                         nms_thresh=0.45, post_nms=400)
+
     # training
     names, values = validate(net, val_data, ctx, classes, len(val_dataset), val_metric)
     for k, v in zip(names, values):
@@ -63,6 +63,9 @@ def parse_args():
                              'training time if validation is slow.')
     parser.add_argument('--seed', type=int, default=233,
                         help='Random seed to be fixed.')
+    parser.add_argument('--dtype', type=str, default='float32',
+                        help='Training data type, float16 for mixed precision training with '
+                             'dynamic loss scaling. Default is float32.')
     args = parser.parse_args()
     return args
 
@@ -95,11 +98,11 @@ def get_dataloader(net, train_dataset, val_dataset, data_shape, batch_size, num_
     batchify_fn = Tuple(Stack(), Stack(), Stack())  # stack image, cls_targets, box_targets
     train_loader = gluon.data.DataLoader(
         train_dataset.transform(SSDDefaultTrainTransform(width, height, anchors)),
-        batchify_fn=batchify_fn, batch_size, True, last_batch='rollover', num_workers=num_workers)
+        batch_size, True, batchify_fn=batchify_fn, last_batch='rollover', num_workers=num_workers)
     val_batchify_fn = Tuple(Stack(), Pad(pad_val=-1))
     val_loader = gluon.data.DataLoader(
         val_dataset.transform(SSDDefaultValTransform(width, height)),
-        batchify_fn=val_batchify_fn, batch_size, False, last_batch='keep', num_workers=num_workers)
+        batch_size, False, batchify_fn=val_batchify_fn, last_batch='keep', num_workers=num_workers)
     return train_loader, val_loader
 
 def save_params(net, best_map, current_map, epoch, save_interval, prefix):
@@ -112,7 +115,7 @@ def save_params(net, best_map, current_map, epoch, save_interval, prefix):
     if save_interval and epoch % save_interval == 0:
         net.save_params('{:s}_{:04d}_{:.4f}.params'.format(prefix, epoch, current_map))
 
-def validate(net, val_data, ctx, eval_metric):
+def validate(net, val_data, ctx, eval_metric, dtype='float32'):
     """Test on validation dataset."""
     eval_metric.reset()
     # set nms threshold and topk constraint
@@ -129,7 +132,7 @@ def validate(net, val_data, ctx, eval_metric):
         gt_difficults = []
         for x, y in zip(data, label):
             # get prediction results
-            ids, scores, bboxes = net(x)
+            ids, scores, bboxes = net(x.astype(dtype, copy=False))
             det_ids.append(ids)
             det_scores.append(scores)
             # clip to image size
@@ -148,7 +151,10 @@ def train(net, train_data, val_data, eval_metric, args):
     net.collect_params().reset_ctx(ctx)
     trainer = gluon.Trainer(
         net.collect_params(), 'sgd',
-        {'learning_rate': args.lr, 'wd': args.wd, 'momentum': args.momentum})
+        {'learning_rate': args.lr, 'wd': args.wd, 'momentum': args.momentum,
+         'multi_precision': True})
+    # float16 gradients underflow without loss scaling
+    scaler = gutils.DynamicLossScaler() if args.dtype == 'float16' else None
 
     # lr decay policy
     lr_decay = float(args.lr_decay)
@@ -170,6 +176,8 @@ def train(net, train_data, val_data, eval_metric, args):
     logger.addHandler(fh)
     logger.info(args)
     logger.info('Start training from [Epoch {}]'.format(args.start_epoch))
+    # split and copy upcoming batches to devices in background
+    train_data = gcv.data.DevicePrefetchLoader(train_data, ctx)
     best_map = [0]
     for epoch in range(args.start_epoch, args.epochs):
         while lr_steps and epoch >= lr_steps[0]:
@@ -182,24 +190,24 @@ def train(net, train_data, val_data, eval_metric, args):
         tic = time.time()
         btic = time.time()
         net.hybridize()
-        for i, batch in enumerate(train_data):
-            batch_size = batch[0].shape[0]
-            data = gluon.utils.split_and_load(batch[0], ctx_list=ctx, batch_axis=0)
-            cls_targets = gluon.utils.split_and_load(batch[1], ctx_list=ctx, batch_axis=0)
-            box_targets = gluon.utils.split_and_load(batch[2], ctx_list=ctx, batch_axis=0)
+        for i, (data, cls_targets, box_targets) in enumerate(train_data):
+            batch_size = sum([x.shape[0] for x in data])
             with autograd.record():
                 cls_preds = []
                 box_preds = []
                 for x in data:
-                    cls_pred, box_pred, _ = net(x)
+                    cls_pred, box_pred, _ = net(x.astype(args.dtype, copy=False))
                     cls_preds.append(cls_pred)
                     box_preds.append(box_pred)
                 sum_loss, cls_loss, box_loss = mbox_loss(
                     cls_preds, box_preds, cls_targets, box_targets)
-                autograd.backward(sum_loss)
+                autograd.backward(scaler.scale(sum_loss) if scaler else sum_loss)
             # since we have already normalized the loss, we don't want to normalize
             # by batch-size anymore
-            trainer.step(1)
+            if scaler:
+                scaler.step(trainer, 1)
+            else:
+                trainer.step(1)
             ce_metric.update(0, [l * batch_size for l in cls_loss])
             smoothl1_metric.update(0, [l * batch_size for l in box_loss])
             if args.log_interval and not (i + 1) % args.log_interval:
@@ -215,7 +223,7 @@ def train(net, train_data, val_data, eval_metric, args):
             epoch, (time.time()-tic), name1, loss1, name2, loss2))
         if not (epoch + 1) % args.val_interval:
             # consider reduce the frequency of validation to save time
-            map_name, mean_ap = validate(net, val_data, ctx, eval_metric)
+            map_name, mean_ap = validate(net, val_data, ctx, eval_metric, args.dtype)
             val_msg = '\n'.join(['{}={}'.format(k, v) for k, v in zip(map_name, mean_ap)])
             logger.info('[Epoch {}] Validation: \n{}'.format(epoch, val_msg))
             current_map = float(mean_ap[-1])
@@ -243,6 +251,8 @@ if __name__ == '__main__':
             if param._data is not None:
                 continue
             param.initialize()
+    if args.dtype != 'float32':
+        net.cast(args.dtype)
 
     # training data
     train_dataset, val_dataset, eval_metric = get_dataset(args.dataset, args)
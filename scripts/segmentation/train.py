@@ -1,6 +1,8 @@
 import os
+import random
 import shutil
 import argparse
+from functools import partial
 import numpy as np
 from tqdm import tqdm
 
@@ -8,10 +10,11 @@ import mxnet as mx
 from mxnet import gluon, autograd
 from mxnet.gluon.data.vision import transforms
 
-from gluoncv.utils import PolyLRScheduler
+from gluoncv.utils import PolyLRScheduler, DynamicLossScaler
 from gluoncv.model_zoo.segbase import *
 from gluoncv.utils.parallel import *
 from gluoncv.data import get_segmentation_dataset
+from gluoncv.model_zoo.syncbn import LocalCommunicator, KVStoreCommunicator
 
 
 def parse_args():
@@ -46,6 +49,9 @@ def parse_args():
                         metavar='M', help='momentum (default: 0.9)')
     parser.add_argument('--weight-decay', type=float, default=1e-4,
                         metavar='M', help='w-decay (default: 1e-4)')
+    parser.add_argument('--dtype', type=str, default='float32',
+                        help='data type for training, float16 for mixed precision \
+                        with dynamic loss scaling (default: float32)')
     # cuda and logging
     parser.add_argument('--no-cuda', action='store_true', default=
                         False, help='disables CUDA training')
@@ -64,9 +70,14 @@ def parse_args():
     # evaluation only
     parser.add_argument('--eval', action='store_true', default= False,
                         help='evaluation only')
+    # gradient checkpointing
+    parser.add_argument('--checkpoint-stages', type=str, default='',
+                        help='comma separated backbone stages which recompute \
+                        activations in backward to save memory, e.g. 3,4')
     # synchronized Batch Normalization
     parser.add_argument('--syncbn', action='store_true', default= False,
-                        help='using Synchronized Cross-GPU BatchNorm')
+                        help='using Synchronized Cross-GPU BatchNorm, across workers \
+                        with a dist kvstore')
     # the parser
     args = parser.parse_args()
     # handle contexts
@@ -83,12 +94,34 @@ def parse_args():
         args.norm_layer = BatchNorm
     else:
         args.norm_layer = mx.gluon.nn.BatchNorm
+    args.checkpoint_stages = [int(i) for i in args.checkpoint_stages.split(',') if i.strip()]
+    if args.syncbn and args.checkpoint_stages:
+        parser.error('--syncbn cannot be used with --checkpoint-stages, statistics are '
+                     'not reduced while recomputing activations in backward')
     return args
 
 
+class SplitSampler(gluon.data.sampler.Sampler):
+    """Shuffled samples of one of `num_parts` equal parts of a dataset, so that
+    distributed workers train on different data."""
+    def __init__(self, length, num_parts=1, part_index=0):
+        self.part_len = length // num_parts
+        self.start = self.part_len * part_index
+
+    def __iter__(self):
+        indices = list(range(self.start, self.start + self.part_len))
+        random.shuffle(indices)
+        return iter(indices)
+
+    def __len__(self):
+        return self.part_len
+
+
 class Trainer(object):
     def __init__(self, args):
         self.args = args
+        # the kvstore also reduces SyncBN statistics of distributed workers
+        self.kv = mx.kv.create(args.kvstore)
         # image transform
         input_transform = transforms.Compose([
             transforms.ToTensor(),
@@ -99,15 +132,29 @@ class Trainer(object):
             args.dataset, split='train', transform=input_transform)
         valset = get_segmentation_dataset(
             args.dataset, split='val', transform=input_transform)
+        if 'dist' in args.kvstore:
+            sampler = SplitSampler(len(trainset), self.kv.num_workers, self.kv.rank)
+        else:
+            sampler = gluon.data.RandomSampler(len(trainset))
         self.train_data = gluon.data.DataLoader(
-            trainset, args.batch_size, shuffle=True, last_batch='rollover',
+            trainset, args.batch_size, sampler=sampler, last_batch='rollover',
             num_workers=args.workers)
         self.eval_data = gluon.data.DataLoader(valset, args.test_batch_size,
             last_batch='keep', num_workers=args.workers)
         # create network
+        norm_layer = args.norm_layer
+        communicator = None
+        if args.syncbn:
+            num_devices = len(args.ctx) if isinstance(args.ctx, list) else 1
+            if 'dist' in args.kvstore:
+                assert num_devices == 1, 'distributed SyncBN needs one GPU per worker'
+                communicator = KVStoreCommunicator(self.kv)
+            else:
+                communicator = LocalCommunicator(num_devices)
+            norm_layer = partial(norm_layer, communicator=communicator)
         model = get_segmentation_model(model=args.model, dataset=args.dataset,
-                                       backbone=args.backbone, norm_layer=args.norm_layer,
-                                       aux=args.aux)
+                                       backbone=args.backbone, norm_layer=norm_layer,
+                                       aux=args.aux, checkpoint_stages=args.checkpoint_stages)
         print(model)
         self.net = DataParallelModel(model, args.ctx, args.syncbn)
         self.evaluator = DataParallelModel(SegEvalModel(model), args.ctx)
@@ -118,19 +165,26 @@ class Trainer(object):
             else:
                 raise RuntimeError("=> no checkpoint found at '{}'" \
                     .format(args.resume))
+        if args.dtype != 'float32':
+            model.cast(args.dtype)
         # create criterion
         criterion = SoftmaxCrossEntropyLossWithAux(args.aux)
         self.criterion = DataParallelCriterion(criterion, args.ctx, args.syncbn)
         # optimizer and lr scheduling
         self.lr_scheduler = PolyLRScheduler(args.lr, niters=len(self.train_data), 
                                             nepochs=args.epochs)
-        kv = mx.kv.create(args.kvstore)
         self.optimizer = gluon.Trainer(self.net.module.collect_params(), 'sgd',
                                        {'lr_scheduler': self.lr_scheduler,
                                         'wd':args.weight_decay,
                                         'momentum': args.momentum,
                                         'multi_precision': True},
-                                        kvstore = kv)
+                                        kvstore = self.kv,
+                                        # the kvstore only sums, also SyncBN statistics
+                                        update_on_kvstore = False if args.syncbn else None)
+        if isinstance(communicator, KVStoreCommunicator):
+            communicator.set_trainer(self.optimizer)
+        # float16 gradients underflow without loss scaling
+        self.scaler = DynamicLossScaler() if args.dtype == 'float16' else None
 
     def training(self, epoch):
         tbar = tqdm(self.train_data)
@@ -138,11 +192,16 @@ class Trainer(object):
         for i, (data, target) in enumerate(tbar):
             self.lr_scheduler.update(i, epoch)
             with autograd.record(True):
-                outputs = self.net(data)
+                outputs = self.net(data.astype(self.args.dtype, copy=False))
                 losses = self.criterion(outputs, target)
                 mx.nd.waitall()
-                autograd.backward(losses)
-            self.optimizer.step(self.args.batch_size)
+                autograd.backward(self.scaler.scale(losses) if self.scaler else losses)
+            # gradients are summed over distributed workers
+            batch_size = self.args.batch_size * self.kv.num_workers
+            if self.scaler:
+                self.scaler.step(self.optimizer, batch_size)
+            else:
+                self.optimizer.step(batch_size)
             for loss in losses:
                 train_loss += loss.asnumpy()[0] / len(losses)
             tbar.set_description('Epoch %d, training loss %.3f'%\
@@ -150,13 +209,14 @@ class Trainer(object):
             mx.nd.waitall()
 
         # save every epoch
-        save_checkpoint(self.net.module, self.args, False)
+        if self.kv.rank == 0:
+            save_checkpoint(self.net.module, self.args, False)
 
     def validation(self, epoch):
         total_inter, total_union, total_correct, total_label = 0, 0, 0, 0
         tbar = tqdm(self.eval_data)
         for i, (data, target) in enumerate(tbar):
-            outputs = self.evaluator(data, target)
+            outputs = self.evaluator(data.astype(self.args.dtype, copy=False), target)
             for (correct, labeled, inter, union) in outputs:
                 total_correct += correct
                 total_label += labeled
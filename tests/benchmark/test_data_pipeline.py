@@ -0,0 +1,43 @@
+"""Data pipeline throughput regression benchmarks.
+
+Run with pytest-benchmark, e.g.::
+
+    pytest tests/benchmark --benchmark-json=data_pipeline.json
+
+"""
+from __future__ import print_function
+from __future__ import division
+
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+import mxnet as mx
+from mxnet import gluon
+
+pytest.importorskip('pytest_benchmark')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'benchmark'))
+import data_pipeline  # pylint: disable=wrong-import-position
+
+NUM_BATCHES = 4
+
+@pytest.fixture(scope='module')
+def roots():
+    data_dir = tempfile.mkdtemp()
+    yield data_pipeline.make_datasets(data_dir, num_images=16)
+    shutil.rmtree(data_dir)
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+@pytest.mark.parametrize('split', ['train', 'val'])
+@pytest.mark.parametrize('name', data_pipeline.PIPELINES)
+def test_data_pipeline(benchmark, roots, name, split, num_workers):
+    dataset, batchify_fn = data_pipeline.get_pipeline(name, split, roots)
+    loader = gluon.data.DataLoader(
+        dataset, 4, shuffle=split == 'train', last_batch='rollover',
+        batchify_fn=batchify_fn, num_workers=num_workers)
+    result = benchmark.pedantic(data_pipeline.benchmark_loader, args=(loader, NUM_BATCHES, 1),
+                                rounds=3, iterations=1)
+    benchmark.extra_info.update(result)
+    assert result['samples'] == 4 * NUM_BATCHES
+    mx.nd.waitall()
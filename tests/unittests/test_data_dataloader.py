@@ -1,12 +1,16 @@
 from __future__ import print_function
 from __future__ import division
 
+import time
+import shutil
+import tempfile
 import mxnet as mx
 import numpy as np
 
 import gluoncv as gcv
 from gluoncv.data.batchify import *
-from gluoncv.data import DetectionDataLoader
+from gluoncv.data import DetectionDataLoader, DevicePrefetchLoader
+from gluoncv.data import profiler
 
 
 class DummyDetectionDataset(object):
@@ -49,6 +53,81 @@ def test_detection_dataloader():
                     mx.nd.waitall()
                     pass
 
+def test_pad_multi_axis():
+    data = [mx.nd.ones((3, 4, 5)), mx.nd.ones((3, 6, 2))]
+    batch, length = Pad(axis=(1, 2), pad_val=-1, ret_length=True)(data)
+    assert batch.shape == (2, 3, 6, 5)
+    np.testing.assert_equal(length.asnumpy(), [[4, 5], [6, 2]])
+    np.testing.assert_equal(batch[0, :, 4:, :].asnumpy(), -1)
+    np.testing.assert_equal(batch[1, :, :, 2:].asnumpy(), -1)
+    assert batch[0, :, :4, :].sum().asscalar() == 60
+
+def test_device_prefetch_loader():
+    dataset = DummyDetectionDataset(8)
+    ctx = [mx.cpu(0), mx.cpu(1)]
+    for prefetch in [1, 2, 4]:
+        dataloader = mx.gluon.data.DataLoader(
+            dataset, batch_size=4, batchify_fn=Tuple(Stack(), Pad(pad_val=-1)))
+        loader = DevicePrefetchLoader(dataloader, ctx, prefetch=prefetch)
+        assert len(loader) == 2
+        num_batch = 0
+        for data, label in loader:
+            assert [x.context for x in data] == ctx
+            assert [y.context for y in label] == ctx
+            assert sum([x.shape[0] for x in data]) == 4
+            num_batch += 1
+        assert num_batch == 2
+        # stop early
+        for _ in loader:
+            break
+
+    dataloader = mx.gluon.data.DataLoader(
+        dataset, batch_size=2, batchify_fn=Tuple(Append(), Append()))
+    for data, label in DevicePrefetchLoader(dataloader, ctx):
+        assert [x.context for x in data] == ctx
+        assert [y.context for y in label] == ctx
+
+def test_data_profiler():
+    dataset = DummyDetectionDataset(8)
+    out_dir = tempfile.mkdtemp()
+    try:
+        for num_workers in [0, 2]:
+            profiler.enable(out_dir)
+            profiler.reset()
+            batchify_fn = Tuple(Stack(), Pad(pad_val=-1))
+            dataloader = mx.gluon.data.DataLoader(
+                dataset, batch_size=2, batchify_fn=batchify_fn, num_workers=num_workers)
+            for batch in dataloader:
+                pass
+            del dataloader
+            records = profiler.collect()
+            assert len(records['batchify.Tuple']) == 4
+            assert len(records['batchify.Stack']) == 4
+            stats = profiler.summary(records, elapsed=1.)
+            assert set(['p50', 'p99', 'throughput']) <= set(stats[0].keys())
+            assert 'batchify.Pad' in profiler.report(records)
+            profiler.disable()
+        # nested stages record exclusive time, and wait for their own outputs
+        profiler.enable()
+        profiler.reset()
+        with profiler.stage('outer'):
+            time.sleep(0.05)
+            with profiler.stage('inner') as stage:
+                time.sleep(0.1)
+                out = stage.output(mx.nd.ones((2, 2)) * 2)
+        records = profiler.collect()
+        assert 0.05 <= records['outer'][0] < 0.09
+        assert 0.1 <= records['inner'][0] < 0.14
+        assert (out.asnumpy() == 2).all()
+        profiler.disable()
+        # disabled profiler does not record
+        profiler.reset()
+        Stack()([mx.nd.zeros((2, 2))])
+        assert not profiler.collect()
+    finally:
+        profiler.disable()
+        shutil.rmtree(out_dir)
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
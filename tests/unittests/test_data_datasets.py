@@ -6,7 +6,11 @@ import numpy as np
 
 import gluoncv as gcv
 from gluoncv import data
+import os
 import os.path as osp
+import pickle
+import shutil
+import tempfile
 
 
 def test_pascal_voc_detection():
@@ -81,6 +85,53 @@ def test_ade_segmentation():
         index = np.random.randint(0, len(val))
         _ = val[index]
 
+def test_segmentation_file_list_manifest():
+    tmp = tempfile.mkdtemp()
+    try:
+        base = osp.join(tmp, 'ADEChallengeData2016')
+        img_dir = osp.join(base, 'images', 'validation')
+        mask_dir = osp.join(base, 'annotations', 'validation')
+        os.makedirs(img_dir)
+        os.makedirs(mask_dir)
+        def touch(name):
+            for folder, ext in ((img_dir, '.jpg'), (mask_dir, '.png')):
+                open(osp.join(folder, name + ext), 'w').close()
+        touch('a')
+        touch('b')
+        val = data.ADE20KSegmentation(root=tmp, split='val')
+        assert len(val) == 2
+        assert osp.isfile(osp.join(base, '.val_pairs.json'))
+        # manifest is reused while directories are unchanged
+        val = data.ADE20KSegmentation(root=tmp, split='val')
+        assert sorted(osp.basename(x) for x in val.images) == ['a.jpg', 'b.jpg']
+        # and regenerated once their mtime changes
+        touch('c')
+        for folder in (img_dir, mask_dir):
+            os.utime(folder, (osp.getmtime(folder) + 10, ) * 2)
+        val = data.ADE20KSegmentation(root=tmp, split='val')
+        assert len(val) == 3
+    finally:
+        shutil.rmtree(tmp)
+
+def test_packed_labels():
+    labels = [np.random.uniform(size=(n, 5)) for n in (3, 1, 0, 7)]
+    packed = gcv.data.base.PackedLabels(labels)
+    packed = pickle.loads(pickle.dumps(packed))
+    assert len(packed) == len(labels)
+    for label, out in zip(labels, packed):
+        np.testing.assert_allclose(out.reshape(-1, 5), label)
+    out = packed[0]
+    out[:] = -1
+    np.testing.assert_allclose(packed[0], labels[0])
+    np.testing.assert_allclose(packed[-1], labels[-1])
+    np.testing.assert_allclose(packed[-4], labels[0])
+    for idx in (4, -5):
+        try:
+            packed[idx]
+            assert False, "Index {} should be out of range".format(idx)
+        except IndexError:
+            pass
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
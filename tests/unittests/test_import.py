@@ -0,0 +1,37 @@
+from __future__ import print_function
+
+import sys
+import subprocess
+
+def _imported_modules(stmt):
+    code = '{}; import sys; print(" ".join(sys.modules))'.format(stmt)
+    return set(subprocess.check_output([sys.executable, '-c', code]).decode().split())
+
+def test_lazy_import():
+    # importing gluoncv alone must not pull in heavy dependencies
+    modules = _imported_modules('import gluoncv')
+    for name in ['mxnet', 'matplotlib', 'requests', 'gluoncv.data', 'gluoncv.model_zoo']:
+        assert name not in modules, name
+    modules = _imported_modules('from gluoncv.utils import bbox_iou')
+    for name in ['mxnet', 'matplotlib', 'requests', 'gluoncv.utils.viz']:
+        assert name not in modules, name
+
+def test_get_model_imports_requested_module():
+    modules = _imported_modules(
+        'import gluoncv; gluoncv.model_zoo.get_model("cifar_resnet20_v1")')
+    assert 'gluoncv.model_zoo.cifarresnet' in modules
+    for name in ['gluoncv.model_zoo.ssd', 'gluoncv.model_zoo.faster_rcnn',
+                 'gluoncv.model_zoo.fcn']:
+        assert name not in modules, name
+
+def test_lazy_attributes():
+    import gluoncv as gcv
+    from gluoncv.model_zoo import SSD
+    assert gcv.model_zoo.SSD is SSD
+    assert gcv.model_zoo.ssd.SSD is SSD
+    assert callable(gcv.utils.download)
+    assert 'get_model' in dir(gcv.model_zoo)
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -0,0 +1,65 @@
+from __future__ import print_function
+from __future__ import division
+
+import mxnet as mx
+import numpy as np
+import gluoncv as gcv
+from gluoncv.model_zoo.tiling import tile_windows
+
+
+class _BrightDetector(mx.gluon.Block):
+    """Detect the box of bright pixels in each tile, scored by its area."""
+    def forward(self, x):
+        x = x.asnumpy()
+        ids = -np.ones((x.shape[0], 1, 1))
+        scores = np.zeros((x.shape[0], 1, 1))
+        bboxes = np.zeros((x.shape[0], 1, 4))
+        for i, tile in enumerate(x):
+            ys, xs = np.where(tile[0] > 1)
+            if ys.size:
+                ids[i], scores[i] = 1, ys.size / 1600.
+                bboxes[i, 0] = [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+        return mx.nd.array(ids), mx.nd.array(scores), mx.nd.array(bboxes)
+
+def test_tile_windows():
+    windows = tile_windows(300, 500, 128, 32)
+    assert windows[0] == (0, 0) and windows[-1] == (300 - 128, 500 - 128)
+    ys = sorted(set(y for y, _ in windows))
+    assert all(b - a <= 128 - 32 for a, b in zip(ys, ys[1:]))
+    assert tile_windows(100, 50, 128, 32) == [(0, 0)]
+
+def test_detect_tiled():
+    img = np.zeros((300, 500, 3), dtype=np.uint8)
+    # objects on tile seams, inside a single tile and at the image border
+    objects = [[80, 90, 120, 130], [300, 20, 340, 60], [460, 260, 500, 300]]
+    for x1, y1, x2, y2 in objects:
+        img[y1:y2, x1:x2] = 255
+    for merge in ['nms', 'wbf']:
+        ids, scores, bboxes = gcv.model_zoo.detect_tiled(
+            _BrightDetector(), img, tile_size=128, overlap=48, batch_size=3, merge=merge)
+        assert ids.shape == (3, 1) and (ids == 1).all()
+        assert (scores == 1).all()
+        order = np.argsort(bboxes[:, 0])
+        if merge == 'nms':
+            np.testing.assert_allclose(bboxes[order], sorted(objects), atol=1e-3)
+        else:
+            # fused boxes are pulled by parts of objects cut by tile borders
+            iou = gcv.utils.bbox_iou(bboxes[order], np.array(sorted(objects), dtype='float'))
+            assert (np.diag(iou) > 0.8).all()
+
+def test_detect_tiled_max_pending():
+    img = np.zeros((300, 500, 3), dtype=np.uint8)
+    objects = [[80, 90, 120, 130], [300, 20, 340, 60], [200, 70, 250, 110]]
+    for x1, y1, x2, y2 in objects:
+        img[y1:y2, x1:x2] = 255
+    for merge in ['nms', 'wbf']:
+        # merging after every batch gives the same detections as a single merge
+        results = [gcv.model_zoo.detect_tiled(
+            _BrightDetector(), img, tile_size=128, overlap=48, batch_size=2, merge=merge,
+            max_pending=max_pending) for max_pending in [0, 20000]]
+        for a, b in zip(*results):
+            np.testing.assert_allclose(a, b, rtol=1e-6)
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -0,0 +1,79 @@
+from __future__ import print_function
+from __future__ import division
+
+import mxnet as mx
+import numpy as np
+import gluoncv as gcv
+
+
+class _BrightDetector(mx.gluon.Block):
+    """Detect the box of bright pixels in each image, and count forward passes."""
+    def __init__(self, **kwargs):
+        super(_BrightDetector, self).__init__(**kwargs)
+        self.batches = []
+
+    def forward(self, x):
+        self.batches.append(x.shape)
+        x = x.asnumpy()
+        ids = -np.ones((x.shape[0], 2, 1))
+        scores = -np.ones((x.shape[0], 2, 1))
+        bboxes = -np.ones((x.shape[0], 2, 4))
+        for i, img in enumerate(x):
+            ys, xs = np.where(img[0] > 0.5)
+            if ys.size:
+                ids[i, 0], scores[i, 0] = 2, 0.5 + 0.1 * i
+                bboxes[i, 0] = [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+        return mx.nd.array(ids), mx.nd.array(scores), mx.nd.array(bboxes)
+
+class _SizedDetector(_BrightDetector):
+    """Like `_BrightDetector`, but takes the valid size of each image, like Faster-RCNN."""
+    def __init__(self, **kwargs):
+        super(_SizedDetector, self).__init__(**kwargs)
+        self.im_sizes = []
+
+    def forward(self, x, gt_box=None, im_size=None):
+        self.im_sizes.append(im_size.asnumpy())
+        return super(_SizedDetector, self).forward(x)
+
+def test_detection_tta():
+    x = mx.nd.zeros((2, 3, 64, 96))
+    x[0, :, 10:30, 20:50] = 1
+    x[1, :, 30:50, 60:80] = 1
+    # second image is padded to the batch
+    sizes = mx.nd.array([[64, 96], [56, 90]])
+    expected = np.array([[20, 10, 50, 30], [60, 30, 80, 50]])
+    for vote_thresh in [None, 0.5]:
+        net = _BrightDetector()
+        tta = gcv.model_zoo.DetectionTTA(
+            net, scales=(0.5, 1.0, 1.5), flip=True, vote_thresh=vote_thresh)
+        assert tta.num_views == 6
+        ids, scores, bboxes = tta(x, sizes)
+        # a single forward pass of all views
+        assert net.batches == [(12, 3, 96, 144)]
+        assert ids.shape == (2, 12, 1) and bboxes.shape == (2, 12, 4)
+        assert (ids[:, 0] == 2).asnumpy().all() and (ids[:, 1:] == -1).asnumpy().all()
+        np.testing.assert_allclose(bboxes[:, 0].asnumpy(), expected, atol=1.5)
+
+def test_detection_tta_im_size():
+    x = mx.nd.zeros((2, 3, 64, 96))
+    x[0, :, 10:30, 20:50] = 1
+    sizes = mx.nd.array([[64, 96], [56, 90]])
+    net = _SizedDetector()
+    tta = gcv.model_zoo.DetectionTTA(net, scales=(0.5, 1.0), flip=True)
+    ids, scores, bboxes = tta(x, sizes)
+    # valid size of each view, not of the padded batch
+    expected = [[32, 48]] * 2 + [[64, 96]] * 2 + [[28, 45]] * 2 + [[56, 90]] * 2
+    assert len(net.im_sizes) == 1
+    np.testing.assert_array_equal(net.im_sizes[0], expected)
+    np.testing.assert_allclose(bboxes[0, 0].asnumpy(), [20, 10, 50, 30], atol=1.5)
+
+def test_detection_tta_ssd():
+    net = gcv.model_zoo.get_model('ssd_300_vgg16_atrous_voc', pretrained_base=False)
+    net.initialize()
+    tta = gcv.model_zoo.DetectionTTA(net, flip=True, post_nms=50)
+    ids, scores, bboxes = tta(mx.nd.random.uniform(shape=(1, 3, 300, 300)))
+    assert ids.shape == (1, 50, 1) and scores.shape == (1, 50, 1) and bboxes.shape == (1, 50, 4)
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -20,6 +20,7 @@
 from __future__ import print_function
 
 import warnings
+import threading
 import mxnet as mx
 import numpy as np
 
@@ -87,6 +88,346 @@ def test_segmentation_models():
     models = ['fcn_resnet50_voc', 'fcn_resnet101_voc', 'fcn_resnet50_ade']
     _test_model_list(models, ctx, x)
 
+def test_ssd_anchor_generator():
+    sizes, ratios, step, offsets = (30, 60), (1, 2, 0.5, 3, 1. / 3), 8, (0.5, 0.5)
+    from gluoncv.model_zoo.ssd.anchor import SSDAnchorGenerator
+    gen = SSDAnchorGenerator(0, (300, 300), sizes, ratios, step, (8, 6))
+    gen.initialize()
+    out = gen(mx.nd.zeros((1, 3, 4, 5))).asnumpy()
+    sizes = (sizes[0], np.sqrt(sizes[0] * sizes[1]))
+    expected = []
+    for i in range(4):
+        for j in range(5):
+            cy, cx = (i + offsets[0]) * step, (j + offsets[1]) * step
+            expected.append([cx, cy, sizes[0], sizes[0]])
+            expected.append([cx, cy, sizes[1], sizes[1]])
+            for r in ratios[1:]:
+                expected.append([cx, cy, sizes[0] * np.sqrt(r), sizes[0] / np.sqrt(r)])
+    np.testing.assert_allclose(out, np.array(expected, dtype='float32').reshape((1, -1, 4)))
+
+def test_ssd_anchor_memoize():
+    from gluoncv.model_zoo.ssd import anchor
+    gen = anchor.SSDAnchorGenerator(0, (300, 300), (30, 60), (1, 2, 0.5), 8, (16, 16))
+
+    def generate(memoize=True):
+        return gen._generate_anchors(gen._sizes, (1, 2, 0.5), 8, (16, 16), (0.5, 0.5),
+                                     memoize)
+
+    shared = generate()
+    assert generate() is shared
+    own = generate(memoize=False)
+    assert own is not shared
+    np.testing.assert_allclose(own, shared)
+    # settings are bounded, the least recently used is evicted first
+    for step in range(1, anchor._ANCHOR_CACHE_SIZE + 1):
+        anchor.SSDAnchorGenerator(0, (300, 300), (30, 60), (1, 2), step, (4, 4))
+    assert len(anchor._ANCHOR_CACHE) == anchor._ANCHOR_CACHE_SIZE
+    assert generate() is not shared
+
+def test_ssd_anchor_cache():
+    net = gcv.model_zoo.get_model('ssd_300_vgg16_atrous_voc', pretrained_base=False,
+                                  anchor_cache_size=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        net.initialize()
+    keys = []
+    for size in [(300, 300), (300, 320), (300, 300), (320, 300)]:
+        x = mx.random.uniform(shape=(1, 3) + size)
+        net(x)
+        keys.append((x.shape[2:], x.context, x.dtype))
+        # cached anchors are the same as freshly sliced ones
+        corner, center = net._anchor_cache.get(keys[-1], None)
+        expected = net._anchors(mx.nd, net.features(x))
+        np.testing.assert_allclose(center.asnumpy(), expected.asnumpy())
+        np.testing.assert_allclose(
+            corner.asnumpy(), gcv.nn.bbox.BBoxCenterToCorner()(expected).asnumpy())
+    # least recently used (300, 320) is evicted
+    assert len(net._anchor_cache) == 2
+    assert keys[1] not in net._anchor_cache
+    assert keys[0] in net._anchor_cache and keys[3] in net._anchor_cache
+
+def test_anchor_cache_threads():
+    cache = gcv.nn.bbox.AnchorCache(max_size=4)
+    anchors = mx.nd.array([[[0, 0, 10, 20], [5, 5, 15, 10]]])
+
+    results = []
+
+    def worker(i):
+        for j in range(200):
+            results.append(cache.get((i + j) % 6, lambda: anchors))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) == 4 and len(results) == 800
+    for corner, center in results:
+        assert corner is anchors
+        np.testing.assert_allclose(center.asnumpy(), [[[5, 10, 10, 20], [10, 7.5, 10, 5]]])
+
+def test_ssd_sparse_detections():
+    net = gcv.model_zoo.get_model('ssd_300_vgg16_atrous_voc', pretrained_base=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        net.initialize()
+    x = mx.random.uniform(shape=(2, 3, 300, 300))
+    with mx.autograd.train_mode():
+        cls_preds, box_preds, anchors = net(x)
+    bboxes = net.bbox_decoder(box_preds, anchors)
+    outs = []
+    for result in [net._dense_detections(mx.nd, cls_preds, bboxes),
+                   net._sparse_detections(mx.nd, cls_preds, bboxes)]:
+        result = mx.nd.contrib.box_nms(
+            result, overlap_thresh=net.nms_thresh, topk=net.nms_topk,
+            id_index=0, score_index=1, coord_start=2, force_suppress=False)
+        outs.append(result.slice_axis(axis=1, begin=0, end=net.post_nms).asnumpy())
+    np.testing.assert_allclose(outs[0], outs[1])
+    # nms_topk may exceed the number of (anchor, class) pairs
+    num_pairs = cls_preds.shape[1] * (net.num_classes - 1)
+    net.set_nms(0.45, num_pairs + 100, score_thresh=0.5)
+    dense = net._dense_detections(mx.nd, cls_preds, bboxes).asnumpy()
+    sparse = net._sparse_detections(mx.nd, cls_preds, bboxes).asnumpy()
+    assert sparse.shape == (2, num_pairs + 100, 6)
+    for d, s in zip(dense, sparse):
+        d, s = [r[r[:, 0] >= 0] for r in (d, s)]
+        assert len(s) > 0 and (s[:, 1] > 0.5).all()
+        d, s = [r[np.lexsort(r.T[::-1])] for r in (d, s)]
+        np.testing.assert_allclose(d, s)
+    # without NMS all thresholded pairs are returned, regardless of nms_topk
+    net.set_nms(score_thresh=0.5)
+    net.hybridize()
+    ids, scores, bboxes = net(x)
+    assert ids.shape == scores.shape == (2, num_pairs, 1)
+    valid = ids.asnumpy()[:, :, 0] >= 0
+    np.testing.assert_array_equal(valid.sum(axis=1), (dense[:, :, 0] >= 0).sum(axis=1))
+    assert valid.sum() > 400
+    assert (scores.asnumpy()[valid] > 0.5).all()
+
+def test_faster_rcnn_sparse_detections():
+    net = gcv.model_zoo.get_model('faster_rcnn_resnet50_v2a_voc', pretrained_base=False)
+    num_roi = 300
+    cls_pred = mx.nd.random.normal(0, 3, shape=(2, num_roi, net.num_class + 1))
+    box_pred = mx.nd.random.normal(0, 0.5, shape=(2, num_roi, net.num_class * 4))
+    xy = mx.nd.random.uniform(0, 500, shape=(2, num_roi, 2))
+    wh = mx.nd.random.uniform(16, 300, shape=(2, num_roi, 2))
+    rpn_box = mx.nd.concat(xy, xy + wh, dim=-1)
+    outs = []
+    for result in [net._dense_detections(mx.nd, cls_pred, box_pred, rpn_box),
+                   net._sparse_detections(mx.nd, cls_pred, box_pred, rpn_box)]:
+        result = mx.nd.contrib.box_nms(
+            result, overlap_thresh=net.nms_thresh, topk=net.nms_topk,
+            id_index=0, score_index=1, coord_start=2)
+        outs.append(result.slice_axis(axis=1, begin=0, end=net.post_nms).asnumpy())
+    np.testing.assert_allclose(outs[0], outs[1], rtol=1e-5, atol=1e-3)
+    # nms_topk may exceed the number of (roi, class) pairs
+    num_pairs = num_roi * net.num_class
+    net.set_nms(0.3, num_pairs + 100, score_thresh=0.5)
+    dense = net._dense_detections(mx.nd, cls_pred, box_pred, rpn_box).asnumpy()
+    sparse = net._sparse_detections(mx.nd, cls_pred, box_pred, rpn_box).asnumpy()
+    assert sparse.shape == (2, num_pairs + 100, 6)
+    for d, s in zip(dense, sparse):
+        d, s = [r[r[:, 0] >= 0] for r in (d, s)]
+        assert len(s) > 0 and (s[:, 1] > 0.5).all()
+        d, s = [r[np.lexsort(r.T[::-1])] for r in (d, s)]
+        np.testing.assert_allclose(d, s, rtol=1e-5, atol=1e-3)
+    # without NMS all thresholded pairs are returned, regardless of nms_topk
+    net.initialize()
+    net.set_nms(nms_thresh=0, nms_topk=400, score_thresh=0)
+    net.hybridize()
+    ids, scores, _ = net(mx.nd.random.uniform(shape=(1, 3, 256, 320)))
+    num_pairs = ids.shape[1]
+    assert num_pairs % net.num_class == 0 and num_pairs > 400
+    valid = ids.asnumpy()[0, :, 0] >= 0
+    assert valid.sum() > 400
+    assert (scores.asnumpy()[0, valid] > 0).all()
+
+def test_rpn_proposal_topk():
+    from gluoncv.model_zoo.rpn.proposal import RPNProposal
+    num_anchor = 900
+    xy = mx.nd.random.uniform(0, 300, shape=(1, num_anchor, 2))
+    wh = mx.nd.random.uniform(32, 200, shape=(1, num_anchor, 2))
+    anchor = mx.nd.concat(xy, xy + wh, dim=-1)
+    score = mx.nd.random.uniform(shape=(1, num_anchor, 1))
+    bbox_pred = mx.nd.random.normal(0, 0.05, shape=(1, num_anchor, 4))
+    img = mx.nd.zeros((1, 3, 600, 600))
+    # boxes are all valid, so proposals are the nms of all decoded anchors
+    roi = gcv.nn.coder.NormalizedBoxCenterDecoder(stds=(1., 1., 1., 1.))(
+        bbox_pred, gcv.nn.bbox.BBoxCornerToCenter()(anchor)).clip(0, 599)
+    for pre_nms in [100, 2000]:
+        expected = mx.nd.contrib.box_nms(
+            mx.nd.concat(score, roi, dim=-1), overlap_thresh=0.7, topk=pre_nms,
+            coord_start=1, score_index=0, id_index=-1, force_suppress=True)
+        expected = expected.slice_axis(axis=1, begin=0, end=50).asnumpy()
+        proposal = RPNProposal(test_pre_nms=pre_nms, test_post_nms=50)
+        for hybridize in [False, True]:
+            if hybridize:
+                proposal.hybridize()
+            rpn_score, rpn_box = proposal(anchor, score, bbox_pred, img)
+            np.testing.assert_allclose(
+                mx.nd.concat(rpn_score, rpn_box, dim=-1).asnumpy(), expected, rtol=1e-5)
+
+def test_faster_rcnn_batch():
+    net = gcv.model_zoo.get_model('faster_rcnn_resnet50_v2a_voc', pretrained_base=False)
+    net.initialize()
+    x = mx.nd.random.uniform(shape=(2, 3, 256, 320))
+    ids, scores, bboxes = net(x)
+    assert ids.shape[0] == scores.shape[0] == bboxes.shape[0] == 2
+    # batched images are detected independently
+    for i in range(2):
+        _, score, bbox = net(x[i:i+1])
+        np.testing.assert_allclose(score.asnumpy(), scores[i:i+1].asnumpy(), rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(bbox.asnumpy(), bboxes[i:i+1].asnumpy(), rtol=1e-4, atol=1e-3)
+    # padded ground-truths are ignored in training
+    gt_box = mx.nd.array([[[10, 10, 60, 80], [-1, -1, -1, -1]],
+                          [[20, 30, 100, 120], [50, 40, 150, 90]]])
+    with mx.autograd.train_mode():
+        cls_pred, box_pred, roi, samples, matches, _, _, _ = net(x, gt_box)
+    num_sample = net.sampler._num_sample
+    assert roi.shape == (2, num_sample, 4)
+    assert cls_pred.shape == (2 * num_sample, net.num_class + 1)
+    assert box_pred.shape == (2 * num_sample, net.num_class, 4)
+    assert samples.shape == matches.shape == (2, num_sample)
+    assert matches.max().asscalar() <= 1
+
+def test_faster_rcnn_clip_to_image():
+    net = gcv.model_zoo.get_model('faster_rcnn_resnet50_v2a_voc', pretrained_base=False)
+    net.initialize()
+    x = mx.nd.random.uniform(shape=(2, 3, 256, 320))
+    # the second image is padded in the batch
+    im_size = mx.nd.array([[256, 320], [128, 160]], dtype='int32')
+    x[1:, :, 128:, :] = 0
+    x[1:, :, :, 160:] = 0
+    gt_box = mx.nd.array([[[10, 10, 60, 80]], [[20, 30, 100, 120]]])
+
+    def check(bboxes, valid):
+        for bbox, is_valid, (height, width) in zip(bboxes, valid, im_size.asnumpy()):
+            bbox = bbox[is_valid]
+            assert bbox.size > 0
+            assert bbox.min() >= 0
+            assert bbox[:, 0::2].max() <= width - 1
+            assert bbox[:, 1::2].max() <= height - 1
+
+    for hybridize in [False, True]:
+        if hybridize:
+            net.hybridize()
+        ids, _, bboxes = net(x, None, im_size)
+        valid = ids.asnumpy()[:, :, 0] >= 0
+        check(bboxes.asnumpy(), valid)
+        # padded detections are kept
+        assert (bboxes.asnumpy()[~valid] == -1).all()
+        if hybridize:
+            # training takes other inputs
+            net.hybridize()
+        with mx.autograd.train_mode():
+            _, _, roi, _, _, _, _, _ = net(x, gt_box, im_size)
+        roi = roi.asnumpy()
+        check(roi, (roi != -1).any(axis=-1))
+
+def _float16_output_types(net, train, **inputs):
+    """Infer output types of a float16 detector without running it, as float16
+    convolutions are not implemented on cpu."""
+    with mx.autograd.train_mode() if train else mx.autograd.predict_mode():
+        sym = net(mx.sym.var('data'), *[mx.sym.var(k) for k in inputs])
+    sym = mx.sym.Group(list(sym))
+    types = {k: v.dtype for k, v in net.collect_params().items() if k in sym.list_inputs()}
+    types.update(data='float16', **inputs)
+    return sym.infer_type(**types)[1]
+
+def test_ssd_float16():
+    net = gcv.model_zoo.get_model('ssd_512_resnet18_v1_voc', pretrained_base=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        net.initialize()
+    net.cast('float16')
+    for name, param in net.collect_params().items():
+        # anchors and batchnorm stay in float32
+        keep = 'anchor' in name or name.split('_')[-1] in ('gamma', 'beta', 'mean', 'var')
+        assert param.dtype == ('float32' if keep else 'float16'), name
+    for train in [False, True]:
+        assert all(t == np.float32 for t in _float16_output_types(net, train))
+
+def test_faster_rcnn_float16():
+    net = gcv.model_zoo.get_model('faster_rcnn_resnet50_v2a_voc', pretrained_base=False)
+    net.initialize()
+    net.cast('float16')
+    assert net.rpn.anchor_generator.anchors.dtype == 'float32'
+    assert net.rpn.conv1[0].weight.dtype == net.class_predictor.weight.dtype == 'float16'
+    assert all(t == np.float32 for t in _float16_output_types(net, False))
+    assert all(t == np.float32 for t in _float16_output_types(net, True, gt_box='float32'))
+
+def _checkpoint_grads(net, x, stages):
+    """Gradients of input and parameters, and updated running statistics."""
+    net._checkpoint_stages = stages
+    params = list(net.collect_params().values())
+    states = [p.data().copy() for p in params]
+    x.attach_grad()
+    with mx.autograd.record():
+        out = net(x)
+        # backpropagate through all outputs, since hybridized batchnorm may update its
+        # running statistics in backward
+        out = mx.nd.add_n(*[o.mean() for o in out]) if isinstance(out, (list, tuple)) else out
+    out.backward()
+    grads = [x.grad.asnumpy()] + [p.grad().asnumpy() for p in params if p.grad_req != 'null']
+    stats = [p.data().asnumpy() for p in params if p.grad_req == 'null']
+    for param, state in zip(params, states):
+        param.set_data(state)
+    return grads + stats
+
+def test_resnet_v1b_checkpoint():
+    net = gcv.model_zoo.resnetv1b.resnet18_v1b(dilated=True, checkpoint_stages=(3, 4))
+    net.initialize()
+    net.hybridize()
+    # checkpointing runs imperatively on hybridized stages while recording only
+    assert net._active and net.layer3._active
+    x = mx.random.uniform(shape=(2, 3, 56, 56))
+    expected = _checkpoint_grads(net, x, ())
+    for stages in [(3, 4), (1, 2, 3, 4)]:
+        for out, ref in zip(_checkpoint_grads(net, x, stages), expected):
+            np.testing.assert_allclose(out, ref, rtol=1e-5, atol=1e-6)
+    # inference runs the cached graph of the whole network
+    net._clear_cached_op()
+    assert net(x).shape == (2, 1000)
+    assert net._cached_op is not None
+
+def test_fcn_checkpoint():
+    net = gcv.model_zoo.FCN(4, backbone='resnet50', aux=True, height=48, width=48,
+                            pretrained_base=False, checkpoint_stages=(3, 4))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        net.initialize()
+    # dropout of heads is random
+    net.head.block[3]._rate = net.auxlayer.block[3]._rate = 0
+    net.hybridize()
+    x = mx.random.uniform(shape=(2, 3, 48, 48))
+    expected = _checkpoint_grads(net, x, ())
+    for out, ref in zip(_checkpoint_grads(net, x, (3, 4)), expected):
+        np.testing.assert_allclose(out, ref, rtol=1e-4, atol=1e-5)
+
+def test_export_detector():
+    import os
+    import shutil
+    import tempfile
+    x = mx.random.uniform(shape=(1, 3, 300, 320))
+    for name in ['ssd_300_vgg16_atrous_voc', 'faster_rcnn_resnet50_v2a_voc']:
+        net = gcv.model_zoo.get_model(name, pretrained_base=False)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            net.initialize()
+        expected = net(x)
+        root = tempfile.mkdtemp()
+        try:
+            sym_file, params_file = gcv.model_zoo.export_detector(
+                net, x.shape, os.path.join(root, name))
+            # reload without the gluoncv model definition
+            deployed = mx.gluon.SymbolBlock.imports(sym_file, ['data'], params_file)
+        finally:
+            shutil.rmtree(root)
+        for out, ref in zip(deployed(x), expected):
+            np.testing.assert_allclose(out.asnumpy(), ref.asnumpy(), rtol=1e-4, atol=1e-4)
+        # the network is not left hybridized
+        assert not net._active and not net.features._active
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
@@ -1,6 +1,7 @@
 from __future__ import print_function
 
 import numpy as np
+import mxnet as mx
 import gluoncv as gcv
 
 def test_bbox_xywh_to_xyxy():
@@ -12,6 +13,37 @@ def test_bbox_xywh_to_xyxy():
     bb = np.array([expected, expected])
     np.testing.assert_allclose(gcv.utils.bbox.bbox_xywh_to_xyxy(aa), bb)
 
+def test_bbox_clip_to_image():
+    x = mx.nd.random.uniform(-100, 900, shape=(2, 50, 4))
+    img = mx.nd.zeros((2, 3, 481, 777))
+    expected = x.asnumpy()
+    expected[:, :, (0, 2)] = np.clip(expected[:, :, (0, 2)], 0, 776)
+    expected[:, :, (1, 3)] = np.clip(expected[:, :, (1, 3)], 0, 480)
+    clipper = gcv.nn.bbox.BBoxClipToImage()
+    np.testing.assert_array_equal(clipper(x, img).asnumpy(), expected)
+    clipper.hybridize()
+    np.testing.assert_array_equal(clipper(x, img).asnumpy(), expected)
+    np.testing.assert_array_equal(clipper(x.reshape((-1, 4)), img).asnumpy(),
+                                  expected.reshape((-1, 4)))
+
+def test_bbox_nms():
+    bboxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [2, 2, 6, 6]])
+    scores = np.array([0.6, 0.9, 0.8, 0.7])
+    labels = np.array([0, 0, 1, 0])
+    np.testing.assert_array_equal(gcv.utils.bbox.bbox_nms(bboxes, scores), [1, 3])
+    np.testing.assert_array_equal(gcv.utils.bbox.bbox_nms(bboxes, scores, labels), [1, 2, 3])
+    np.testing.assert_array_equal(
+        gcv.utils.bbox.bbox_nms(bboxes, scores, labels, metric='ios'), [1, 2])
+    np.testing.assert_array_equal(gcv.utils.bbox.bbox_nms(bboxes, scores, topk=1), [1])
+
+def test_bbox_weighted_fusion():
+    bboxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]])
+    scores = np.array([0.5, 0.5, 0.9])
+    fused, fused_scores, fused_labels = gcv.utils.bbox.bbox_weighted_fusion(bboxes, scores)
+    np.testing.assert_allclose(fused, [[50, 50, 60, 60], [0.5, 0.5, 10.5, 10.5]])
+    np.testing.assert_allclose(fused_scores, [0.9, 0.5])
+    assert fused_labels is None
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
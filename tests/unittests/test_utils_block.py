@@ -1,8 +1,13 @@
 from __future__ import print_function
 
+import gc
+import warnings
+import mxnet as mx
 import numpy as np
 import gluoncv as gcv
 from mxnet.gluon.nn import BatchNorm
+from nose.plugins.attrib import attr
+from gluoncv.utils.block import _conv_bn_pairs, _graph
 
 def check_bn_frozen_callback(net, value):
     if isinstance(net, BatchNorm):
@@ -16,6 +21,96 @@ def test_block_freeze_bn():
     gcv.utils.freeze_bn(net, False)
     gcv.utils.recursive_visit(net, check_bn_frozen_callback, value=False)
 
+def _randomize_bn_stats(net):
+    # non-trivial running statistics
+    for param in net.collect_params('.*running_mean').values():
+        param.set_data(mx.nd.random.normal(0, 0.1, shape=param.shape))
+    for param in net.collect_params('.*running_var').values():
+        param.set_data(mx.nd.random.uniform(0.5, 2, shape=param.shape))
+
+def test_block_fuse_bn():
+    models = ['resnet18_v1', 'cifar_resnet20_v1', 'cifar_resnet20_v2', 'resnet18_v1b',
+              'se_resnet18_v1', 'mobilenet0.25']
+    for name in models:
+        size = 32 if name.startswith('cifar') else 224
+        x = mx.nd.random.uniform(shape=(1, 3, size, size))
+        net = gcv.model_zoo.get_model(name)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            net.initialize(mx.init.Xavier())
+        net(x)
+        _randomize_bn_stats(net)
+        net.hybridize()
+        expected = net(x).asnumpy()
+        num_bn = net(mx.sym.var('data')).tojson().count('"BatchNorm"')
+        gcv.utils.fuse_bn(net)
+        assert net(mx.sym.var('data')).tojson().count('"BatchNorm"') < num_bn, name
+        np.testing.assert_allclose(net(x).asnumpy(), expected, rtol=1e-3, atol=1e-4)
+
+def _num_bn(net):
+    sym = net(mx.sym.var('data'))
+    if isinstance(sym, (list, tuple)):
+        sym = mx.sym.Group(list(sym))
+    return sym.tojson().count('"BatchNorm"')
+
+def _check_fuse_bn(name):
+    """Fuse a randomly initialized model of the model zoo. Detectors are compared on
+    their features, as NMS is sensitive to rounding."""
+    if name.startswith('cifar'):
+        size = 32
+    elif name.startswith('ssd_512'):
+        size = 512
+    elif name.startswith('ssd_300'):
+        size = 300
+    else:
+        size = 224
+    x = mx.nd.random.uniform(shape=(1, 3, size, size))
+    is_detector = name.startswith(('ssd', 'faster_rcnn'))
+    kwargs = {'pretrained_base': False} if is_detector or name.startswith('fcn') else {}
+    net = gcv.model_zoo.get_model(name, **kwargs)
+    block = net.features if is_detector else net
+    # without gradients, large models fit in memory
+    net.collect_params().setattr('grad_req', 'null')
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # SSD layers built from symbols are initialized like in model zoo tests
+        net.initialize(mx.init.Uniform() if name.startswith('ssd') else mx.init.Xavier())
+    net(x)
+    _randomize_bn_stats(net)
+    net.hybridize()
+    expected = block(x)
+    num_bn = _num_bn(net)
+    gcv.utils.fuse_bn(net)
+    # every BatchNorm following a convolution is folded
+    assert not _conv_bn_pairs(_graph(net)), name
+    assert _num_bn(net) < num_bn or num_bn == 0, name
+    out = block(x)
+    if isinstance(expected, mx.nd.NDArray):
+        expected, out = [expected], [out]
+    for e, o in zip(expected, out):
+        e, o = e.asnumpy(), o.asnumpy()
+        # activations of randomly initialized models grow large
+        np.testing.assert_allclose(o, e, rtol=1e-3, atol=1e-3 * max(np.abs(e).max(), 1),
+                                   err_msg=name)
+
+def test_block_fuse_bn_model_zoo():
+    # plain, pre-activation, grouped, squeeze-excitation, stacked BatchNorm, detector
+    # and segmentation models, and SSD backbones built from symbols
+    for name in ['cifar_resnet20_v1', 'cifar_resnet20_v2', 'cifar_resnext29_32x4d',
+                 'cifar_wideresnet16_10', 'resnet18_v1b', 'se_resnet18_v2', 'senet_52',
+                 'fcn_resnet50_voc', 'faster_rcnn_resnet50_v2a_voc',
+                 'ssd_300_vgg16_atrous_voc', 'ssd_512_mobilenet1_0_voc',
+                 'ssd_512_resnet18_v1_voc']:
+        _check_fuse_bn(name)
+        gc.collect()
+
+@attr('slow')
+def test_block_fuse_bn_model_zoo_all():
+    for name in sorted(gcv.model_zoo.model_zoo._models):
+        _check_fuse_bn(name)
+        # release large models before building the next one
+        gc.collect()
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
@@ -0,0 +1,169 @@
+from __future__ import print_function
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+import zipfile
+import tempfile
+import threading
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+import gluoncv as gcv
+from gluoncv.model_zoo import model_store
+from gluoncv.utils.filesystem import FileLock
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve `server.files` from memory with support of range requests."""
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Range')))
+        data = self.server.files.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        begin = 0
+        if self.headers.get('Range'):
+            begin = int(self.headers['Range'].split('=')[1].split('-')[0])
+            if begin >= len(data):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data) - begin))
+        self.end_headers()
+        self.wfile.write(data[begin:])
+
+    def log_message(self, *args):
+        pass
+
+def _serve(files):
+    server = HTTPServer(('127.0.0.1', 0), _RangeHandler)
+    server.files = files
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%d/' % server.server_address[1]
+
+def test_download_resume():
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    server, url = _serve({'/file.bin': data})
+    root = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(root, 'file.bin')
+        # an interrupted download leaves a partial file
+        with open(fname + '.part', 'wb') as f:
+            f.write(data[:1000000])
+        gcv.utils.download(url + 'file.bin', path=fname,
+                           sha1_hash=hashlib.sha1(data).hexdigest())
+        assert server.requests[-1][1] == 'bytes=1000000-'
+        with open(fname, 'rb') as f:
+            assert f.read() == data
+        assert not os.path.exists(fname + '.part')
+    finally:
+        server.shutdown()
+        shutil.rmtree(root)
+
+def test_get_model_file():
+    params = os.urandom(4096)
+    sha1 = hashlib.sha1(params).hexdigest()
+    name = 'dummy_model'
+    file_name = '%s-%s' % (name, sha1[:8])
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr(file_name + '.params', params)
+    server, url = _serve({'/gluon/models/%s.zip' % file_name: buf.getvalue()})
+    root, mirror = tempfile.mkdtemp(), tempfile.mkdtemp()
+    model_store._model_sha1[name] = sha1
+    os.environ['MXNET_GLUON_REPO'] = url
+    try:
+        file_path = model_store.get_model_file(name, root=root)
+        assert file_path == os.path.join(root, file_name + '.params')
+        assert len(server.requests) == 1
+        # verified hash is recorded and not computed again
+        with open(file_path + '.sha1') as f:
+            assert json.load(f)['sha1'] == sha1
+        model_store._verified.clear()
+        check_sha1 = model_store.check_sha1
+        model_store.check_sha1 = None
+        try:
+            assert model_store.get_model_file(name, root=root) == file_path
+        finally:
+            model_store.check_sha1 = check_sha1
+        assert len(server.requests) == 1
+        # shared mirror is searched first
+        shutil.copy(file_path, mirror)
+        assert model_store.get_model_file(name, root=root, mirror=mirror) == \
+            os.path.join(mirror, file_name + '.params')
+        assert len(server.requests) == 1
+    finally:
+        del model_store._model_sha1[name]
+        del os.environ['MXNET_GLUON_REPO']
+        server.shutdown()
+        shutil.rmtree(root)
+        shutil.rmtree(mirror)
+
+def test_file_lock():
+    root = tempfile.mkdtemp()
+    path = os.path.join(root, 'model.lock')
+    try:
+        # a held lock blocks others until it is released
+        acquired = []
+        lock = FileLock(path, interval=0.01)
+        lock.acquire()
+        other = FileLock(path, interval=0.01)
+        waiter = threading.Thread(target=lambda: acquired.append(other.acquire()))
+        waiter.start()
+        time.sleep(0.5)
+        assert not acquired
+        lock.release()
+        waiter.join()
+        assert acquired
+        other.release()
+        # the lock of a killed process is left behind, concurrent waiters take it in turn
+        holder = subprocess.Popen([sys.executable, '-c', (
+            'import sys, time\n'
+            'from gluoncv.utils.filesystem import FileLock\n'
+            'FileLock(sys.argv[1]).acquire()\n'
+            'print("locked")\n'
+            'sys.stdout.flush()\n'
+            'time.sleep(600)\n'), path], stdout=subprocess.PIPE)
+        assert holder.stdout.readline().strip() == b'locked'
+        events = []
+
+        def work(i):
+            with FileLock(path, interval=0.01):
+                events.append(('enter', i))
+                time.sleep(0.2)
+                events.append(('exit', i))
+        waiters = [threading.Thread(target=work, args=(i,)) for i in range(2)]
+        for t in waiters:
+            t.start()
+        time.sleep(0.3)
+        assert not events
+        holder.kill()
+        holder.wait()
+        holder.stdout.close()
+        assert os.path.exists(path)
+        for t in waiters:
+            t.join(30)
+        assert len(events) == 4
+        assert [e for e, _ in events] == ['enter', 'exit'] * 2
+        assert events[0][1] == events[1][1] != events[2][1] == events[3][1]
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
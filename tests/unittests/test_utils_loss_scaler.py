@@ -0,0 +1,67 @@
+from __future__ import print_function
+from __future__ import division
+
+import mxnet as mx
+import numpy as np
+from mxnet import autograd, gluon
+
+import gluoncv as gcv
+from gluoncv.utils import DynamicLossScaler
+
+def _net_and_trainer():
+    net = gluon.nn.Dense(2, in_units=3)
+    net.initialize(mx.init.One())
+    trainer = gluon.Trainer(net.collect_params(), 'sgd',
+                            {'learning_rate': 0.1, 'multi_precision': True})
+    return net, trainer
+
+def test_loss_scaler_step():
+    net, trainer = _net_and_trainer()
+    scaler = DynamicLossScaler(init_scale=8., scale_window=2)
+    x = mx.nd.ones((4, 3))
+    with autograd.record():
+        loss = net(x).sum()
+        autograd.backward(scaler.scale(loss))
+    assert net.weight.grad().asnumpy()[0, 0] == 32
+    # gradients are unscaled by the trainer
+    assert scaler.step(trainer, 4)
+    np.testing.assert_allclose(net.weight.data().asnumpy(), 0.9)
+    assert scaler.loss_scale == 8
+    # scale grows after `scale_window` steps without overflow
+    with autograd.record():
+        autograd.backward(scaler.scale(net(x).sum()))
+    assert scaler.step(trainer, 4)
+    assert scaler.loss_scale == 16
+
+def test_loss_scaler_overflow():
+    net, trainer = _net_and_trainer()
+    scaler = DynamicLossScaler(init_scale=4., min_scale=2.)
+    with autograd.record():
+        autograd.backward(scaler.scale(net(mx.nd.ones((1, 3))).sum()))
+    assert not DynamicLossScaler.has_overflow(net.collect_params())
+    for value in [np.inf, np.nan]:
+        net.weight.grad()[:] = value
+        assert DynamicLossScaler.has_overflow(net.collect_params())
+        # overflowed steps are skipped and the scale is reduced
+        assert not scaler.step(trainer, 1)
+        np.testing.assert_allclose(net.weight.data().asnumpy(), 1)
+    assert scaler.loss_scale == 2
+    assert scaler.scale([mx.nd.ones((1,))])[0].asscalar() == 2
+
+def test_losses_float16():
+    cls_pred = mx.nd.random.normal(shape=(2, 10, 3)).astype('float16')
+    box_pred = mx.nd.random.normal(shape=(2, 10, 4)).astype('float16')
+    cls_target = mx.nd.array([[1, 2] + [0] * 8] * 2)
+    box_target = mx.nd.zeros((2, 10, 4))
+    cls_pred.attach_grad()
+    with autograd.record():
+        sum_loss, _, _ = gcv.loss.SSDMultiBoxLoss()(cls_pred, box_pred, cls_target, box_target)
+    sum_loss[0].backward()
+    assert sum_loss[0].dtype == np.float32
+    assert cls_pred.grad.dtype == np.float16
+    loss = gcv.loss.FocalLoss(num_class=3)(cls_pred, cls_target)
+    assert loss.dtype == np.float32
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -45,6 +45,109 @@ def test_data_parallel():
     test_net_sync(net, criterion, False, 1)
     test_net_sync(net, criterion, False, 2)
 
+def _bn_outputs(layer, ctx_list, x, dy):
+    layer.initialize(ctx=ctx_list)
+    x = x.copy()
+    x.attach_grad()
+    dys = gluon.utils.split_and_load(dy, ctx_list, even_split=False)
+    net = DataParallelModel(layer, ctx_list, sync=True)
+    with autograd.record():
+        ys = [y[0] for y in net(x)]
+    autograd.backward(ys, head_grads=dys)
+    y = nd.concat(*[y.as_in_context(mx.cpu()) for y in ys], dim=0)
+    x_grad = x.grad
+    # gradients of parameters are summed over devices by the trainer
+    gamma_grad = sum(g.as_in_context(mx.cpu()) for g in layer.gamma.list_grad())
+    running_mean = [m.asnumpy() for m in layer.running_mean.list_data()]
+    return y.asnumpy(), x_grad.asnumpy(), gamma_grad.asnumpy(), running_mean
+
+def test_sync_batchnorm():
+    from gluoncv.model_zoo.syncbn import BatchNorm, LocalCommunicator, KVStoreCommunicator
+    x = mx.random.normal(2, 3, shape=(5, 4, 3, 3))
+    dy = mx.random.normal(shape=x.shape)
+    y, x_grad, gamma_grad, running_mean = _bn_outputs(
+        nn.BatchNorm(in_channels=4), [mx.cpu(0)], x, dy)
+    # statistics over the whole batch, unevenly split on two devices
+    for ctx_list, communicator in [([mx.cpu(0), mx.cpu(1)], LocalCommunicator(2)),
+                                   ([mx.cpu(0)], KVStoreCommunicator('local'))]:
+        outputs = _bn_outputs(BatchNorm(in_channels=4, communicator=communicator),
+                              ctx_list, x, dy)
+        mx.test_utils.assert_almost_equal(outputs[0], y, rtol=1e-4, atol=1e-5)
+        mx.test_utils.assert_almost_equal(outputs[1], x_grad, rtol=1e-4, atol=1e-5)
+        mx.test_utils.assert_almost_equal(outputs[2], gamma_grad, rtol=1e-4, atol=1e-5)
+        for mean in outputs[3]:
+            mx.test_utils.assert_almost_equal(mean, running_mean[0], rtol=1e-4, atol=1e-5)
+
+def test_sync_batchnorm_shared_kvstore():
+    from gluoncv.model_zoo.syncbn import BatchNorm, KVStoreCommunicator
+    def _net(norm_layer):
+        net = nn.HybridSequential()
+        net.add(nn.Conv2D(4, 1, in_channels=3), norm_layer(in_channels=4))
+        mx.random.seed(0)
+        net.initialize()
+        return net
+    x = mx.random.normal(shape=(4, 3, 5, 5))
+    w = mx.random.normal(shape=(4, 4, 5, 5))
+    ref = _net(nn.BatchNorm)
+    ref_trainer = gluon.Trainer(ref.collect_params(), 'sgd', {'learning_rate': 0.1},
+                                kvstore=None)
+    kv = mx.kv.create('local')
+    net = _net(lambda **kwargs: BatchNorm(communicator=KVStoreCommunicator(kv), **kwargs))
+    trainer = gluon.Trainer(net.collect_params(), 'sgd', {'learning_rate': 0.1},
+                            kvstore=kv, update_on_kvstore=False)
+    for _ in range(2):
+        for model, opt in [(ref, ref_trainer), (net, trainer)]:
+            with autograd.record():
+                loss = (model(x) * w).sum()
+            loss.backward()
+            opt.step(x.shape[0])
+    # running variance of SyncBN is unbiased, unlike that of nn.BatchNorm
+    for p, q in zip(ref.collect_params().values(), net.collect_params().values()):
+        if p.name.endswith('running_var'):
+            continue
+        mx.test_utils.assert_almost_equal(p.data().asnumpy(), q.data().asnumpy(),
+                                          rtol=1e-4, atol=1e-5)
+    # an optimizer on the kvstore would also update the statistics
+    kv = mx.kv.create('local')
+    net = _net(lambda **kwargs: BatchNorm(communicator=KVStoreCommunicator(kv), **kwargs))
+    trainer = gluon.Trainer(net.collect_params(), 'sgd', kvstore=kv, update_on_kvstore=True)
+    with autograd.record():
+        loss = net(x).sum()
+    loss.backward()
+    trainer.step(1)
+    try:
+        with autograd.record():
+            net(x)
+        assert False, 'kvstore with optimizer is not detected'
+    except ValueError:
+        pass
+    # distributed workers cannot see an optimizer of the servers, so the trainer sharing
+    # the kvstore is checked instead
+    kv = mx.kv.create('local')
+    communicator = KVStoreCommunicator(kv)
+    net = _net(lambda **kwargs: BatchNorm(communicator=communicator, **kwargs))
+    for update_on_kvstore in [None, True]:
+        communicator.set_trainer(gluon.Trainer(net.collect_params(), 'sgd', kvstore=kv,
+                                               update_on_kvstore=update_on_kvstore))
+        try:
+            with autograd.record():
+                net(x)
+            assert False, 'trainer updating on the kvstore is not detected'
+        except ValueError:
+            pass
+    communicator.set_trainer(gluon.Trainer(net.collect_params(), 'sgd', kvstore=kv,
+                                           update_on_kvstore=False))
+    with autograd.record():
+        net(x)
+    # a shared distributed kvstore is refused without its trainer
+    class _DistKVStore(object):
+        type = 'dist_sync'
+    try:
+        KVStoreCommunicator(_DistKVStore()).allreduce('bn', x)
+        assert False, 'shared distributed kvstore without trainer is not refused'
+    except ValueError:
+        pass
+
 
 if __name__ == "__main__":
     import nose
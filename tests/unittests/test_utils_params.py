@@ -0,0 +1,71 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import mxnet as mx
+import numpy as np
+import gluoncv as gcv
+from gluoncv.utils.params import _load_mmap_arrays, _MappedArray
+
+
+def test_load_mmap_arrays():
+    root = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(root, 'arrays.params')
+        arrays = {'a': mx.nd.random.uniform(shape=(3, 4)),
+                  'b': mx.nd.arange(5, dtype='int32'),
+                  'c': mx.nd.ones((2, 1, 3), dtype='float16')}
+        mx.nd.save(fname, arrays)
+        loaded = _load_mmap_arrays(fname)
+        assert set(loaded) == set(arrays)
+        for k, v in arrays.items():
+            assert loaded[k].dtype == v.dtype
+            np.testing.assert_array_equal(loaded[k], v.asnumpy())
+    finally:
+        shutil.rmtree(root)
+
+def test_load_params_mmap():
+    root = tempfile.mkdtemp()
+    try:
+        x = mx.nd.random.uniform(shape=(2, 3, 32, 32))
+        for save in ['save_params', 'save_parameters']:
+            net = gcv.model_zoo.get_model('cifar_resnet20_v1')
+            net.initialize(mx.init.Xavier())
+            expected = net(x).asnumpy()
+            fname = os.path.join(root, save + '.params')
+            getattr(net, save)(fname)
+            with open(fname, 'rb') as f:
+                content = f.read()
+
+            net = gcv.model_zoo.get_model('cifar_resnet20_v1')
+            gcv.utils.load_params_mmap(net, fname)
+            # parameters are materialized on first forward
+            assert all(p._data is None for p in net.collect_params().values())
+            np.testing.assert_allclose(net(x).asnumpy(), expected, rtol=1e-5, atol=1e-6)
+            net.hybridize()
+            np.testing.assert_allclose(net(x).asnumpy(), expected, rtol=1e-5, atol=1e-6)
+            # updates never reach the file
+            for p in net.collect_params().values():
+                p.data()[:] = 0
+            with open(fname, 'rb') as f:
+                assert f.read() == content
+    finally:
+        shutil.rmtree(root)
+
+def test_parameter_layout():
+    # lazy loading sets private members of Parameter, as deferred initialization does
+    param = mx.gluon.Parameter('weight', shape=(2, 3))
+    array = np.arange(6, dtype='float32').reshape((2, 3))
+    param.shape = array.shape
+    param._data = None
+    param._grad = None
+    param._deferred_init = (mx.init.Zero(), [mx.cpu()], None, _MappedArray(array))
+    # called by blocks on first forward
+    param._finish_deferred_init()
+    np.testing.assert_array_equal(param.data().asnumpy(), array)
+    assert param.grad().shape == array.shape
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -0,0 +1,52 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import warnings
+import mxnet as mx
+import numpy as np
+import gluoncv as gcv
+from nose.plugins.skip import SkipTest
+from gluoncv.utils.quantization import _mkldnn_enabled
+
+def _quantize(name, size, **kwargs):
+    net = gcv.model_zoo.get_model(name, **kwargs)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        net.initialize(mx.init.Xavier())
+    x = mx.nd.random.uniform(shape=(2, 3, size, size))
+    net.hybridize()
+    expected = net(x)
+    calib_data = [mx.nd.random.uniform(shape=(2, 3, size, size)) for _ in range(2)]
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        sym_file, params_file = gcv.utils.quantize_net(
+            net, calib_data, (2, 3, size, size), os.path.join(tmp_dir, name),
+            num_calib_examples=4)
+        qnet = mx.gluon.SymbolBlock.imports(sym_file, ['data'], params_file)
+        assert '_quantized' in open(sym_file).read()
+    finally:
+        shutil.rmtree(tmp_dir)
+    return expected, qnet(x)
+
+def test_quantize_classification():
+    if not _mkldnn_enabled():
+        raise SkipTest('quantized operators need MKL-DNN')
+    expected, out = _quantize('resnet18_v1', 224)
+    expected, out = expected.asnumpy(), out.asnumpy()
+    assert out.shape == expected.shape
+    cosine = (out * expected).sum() / np.linalg.norm(out) / np.linalg.norm(expected)
+    assert cosine > 0.9, cosine
+
+def test_quantize_ssd():
+    if not _mkldnn_enabled():
+        raise SkipTest('quantized operators need MKL-DNN')
+    expected, out = _quantize('ssd_300_vgg16_atrous_voc', 300, pretrained_base=False)
+    assert len(out) == len(expected) == 3
+    for o, e in zip(out, expected):
+        assert o.shape == e.shape
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -0,0 +1,137 @@
+from __future__ import print_function
+
+import io
+import json
+import threading
+import mxnet as mx
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image
+import gluoncv as gcv
+from gluoncv.utils.serving import BatchServer, serve_http
+from gluoncv.data.transforms.presets.ssd import SSDDefaultValTransform
+try:
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import urlopen, HTTPError
+
+
+def _classifier():
+    net = gcv.model_zoo.get_model('cifar_resnet20_v1')
+    net.initialize(mx.init.Xavier())
+    return net
+
+def test_batch_server():
+    net = _classifier()
+    inputs = [mx.nd.random.uniform(shape=(3, 32, 32)) for _ in range(16)]
+    expected = net(mx.nd.stack(*inputs)).asnumpy()
+    with BatchServer(net, max_batch_size=4, max_wait=1.0) as server:
+        results = [None] * len(inputs)
+        def request(i):
+            results[i] = server.predict(inputs[i])
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(inputs))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    np.testing.assert_allclose(np.stack(results), expected, rtol=1e-4, atol=1e-5)
+    stats = server.stats()
+    assert stats['requests'] == len(inputs)
+    assert stats['avg_batch_size'] > 1
+    assert stats['latency_ms']['p99'] >= stats['latency_ms']['p50']
+
+def test_batch_server_buckets():
+    net = _classifier()
+    x = mx.nd.random.uniform(shape=(3, 24, 28))
+    padded = mx.nd.zeros((1, 3, 32, 32))
+    padded[0, :, :24, :28] = x
+    with BatchServer(net, max_batch_size=4, max_wait=0, buckets=[(32, 32)]) as server:
+        out = server.predict(x)
+        try:
+            server.predict(mx.nd.zeros((3, 40, 32)))
+            assert False, "Inputs larger than buckets are rejected"
+        except ValueError:
+            pass
+    np.testing.assert_allclose(out, net(padded).asnumpy()[0], rtol=1e-4, atol=1e-5)
+
+def test_batch_server_async():
+    import asyncio
+    net = _classifier()
+    inputs = [mx.nd.random.uniform(shape=(3, 32, 32)) for _ in range(4)]
+    with BatchServer(net, max_batch_size=4, max_wait=1.0) as server:
+        async def run():
+            return await asyncio.gather(*[server.predict_async(x) for x in inputs])
+        results = asyncio.new_event_loop().run_until_complete(run())
+    np.testing.assert_allclose(np.stack(results), net(mx.nd.stack(*inputs)).asnumpy(),
+                               rtol=1e-4, atol=1e-5)
+    assert server.stats()['batches'] == 1
+
+def test_batch_server_bbox_output():
+    net = gcv.model_zoo.get_model('ssd_300_vgg16_atrous_voc', pretrained_base=False)
+    net.initialize()
+    transform = SSDDefaultValTransform(300, 300)
+    img = mx.nd.random.uniform(0, 255, shape=(200, 240, 3)).astype('uint8')
+    x = transform(img, np.zeros((0, 6), dtype='float32'))[0]
+    ids, scores, bboxes = [out[0].asnumpy() for out in net(x.expand_dims(0))]
+    with BatchServer(net, transform, max_wait=0, bbox_output=2) as server:
+        out_ids, out_scores, out_bboxes = server.predict(img)
+    np.testing.assert_allclose(out_ids, ids)
+    np.testing.assert_allclose(out_scores, scores, rtol=1e-4, atol=1e-5)
+    valid = ids[:, 0] >= 0
+    assert valid.any()
+    scale = np.array([240 / 300., 200 / 300.] * 2)
+    np.testing.assert_allclose(out_bboxes[valid], bboxes[valid] * scale, rtol=1e-4, atol=1e-3)
+
+class _Failing(mx.gluon.HybridBlock):
+    def hybrid_forward(self, F, x):
+        raise RuntimeError('model failure')
+
+def test_serve_http():
+    net = gcv.model_zoo.get_model('ssd_300_vgg16_atrous_voc', pretrained_base=False)
+    net.initialize()
+    img = io.BytesIO()
+    matplotlib.image.imsave(img, np.random.uniform(size=(200, 240, 3)), format='png')
+    server = BatchServer(net, SSDDefaultValTransform(300, 300), max_wait=0,
+                         bbox_output=2).start()
+    http = serve_http(server)
+    try:
+        url = 'http://127.0.0.1:%d/' % http.server_address[1]
+        content = urlopen(url, data=img.getvalue()).read()
+        ids, scores, bboxes = json.loads(content.decode('utf-8'))['outputs']
+        assert np.array(bboxes).shape == (len(ids), 4)
+        stats = json.loads(urlopen(url + 'stats').read().decode('utf-8'))
+        assert stats['requests'] == 1
+    finally:
+        http.shutdown()
+        server.stop()
+
+def test_serve_http_errors():
+    img = io.BytesIO()
+    matplotlib.image.imsave(img, np.random.uniform(size=(32, 32, 3)), format='png')
+    server = BatchServer(_Failing(), max_wait=0).start()
+    http = serve_http(server)
+    try:
+        url = 'http://127.0.0.1:%d/' % http.server_address[1]
+        for data, code in [(b'not an image', 400), (img.getvalue(), 500)]:
+            try:
+                urlopen(url, data=data)
+                assert False, "Request should fail with %d" % code
+            except HTTPError as e:
+                assert e.code == code, e.code
+                assert json.loads(e.read().decode('utf-8'))['error']
+        # requests after the batch server is stopped are refused
+        server.stop()
+        try:
+            urlopen(url, data=img.getvalue())
+            assert False, "Request should fail with 503"
+        except HTTPError as e:
+            assert e.code == 503, e.code
+    finally:
+        http.shutdown()
+        server.stop()
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
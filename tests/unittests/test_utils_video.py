@@ -0,0 +1,47 @@
+from __future__ import print_function
+from __future__ import division
+
+import mxnet as mx
+import numpy as np
+from gluoncv.utils.video import VideoDetector, FrameStream
+from gluoncv.data.transforms.presets.ssd import SSDDefaultValTransform
+
+
+class _FullImageDetector(mx.gluon.HybridBlock):
+    """Detect one box covering the whole 300x300 input."""
+    def hybrid_forward(self, F, x):
+        s = F.mean(F.slice_axis(x, axis=1, begin=0, end=1), axis=(2, 3)).reshape((0, 1, 1))
+        return F.zeros_like(s), F.ones_like(s), F.concat(
+            F.zeros_like(s), F.zeros_like(s), F.ones_like(s) * 300, F.ones_like(s) * 300, dim=-1)
+
+def _detector(**kwargs):
+    return VideoDetector(_FullImageDetector(), SSDDefaultValTransform(300, 300), **kwargs)
+
+def test_video_detector():
+    frames = [np.zeros((120, 160, 3), dtype='uint8') for _ in range(10)]
+    detector = _detector(batch_size=4, queue_size=2, thresh=0)
+    outputs = list(detector.run(FrameStream(frames)))
+    assert len(outputs) == len(frames)
+    for (frame, (ids, scores, bboxes)), orig in zip(outputs, frames):
+        assert frame.shape == orig.shape
+        assert bboxes.shape == (len(ids), 4)
+        # boxes are mapped back to frame coordinates
+        np.testing.assert_allclose(bboxes, [[0, 0, 160, 120]], rtol=1e-5)
+        assert frame[0, 80].any() and not frame[60, 80].any()
+    stats = detector.stats()
+    assert stats['skipped'] == 0
+    for stage in ['decode', 'preprocess', 'inference', 'render']:
+        assert stats[stage]['frames'] == len(frames)
+        assert stats[stage]['fps'] > 0
+
+def test_video_detector_skip_frames():
+    frames = [np.zeros((120, 160, 3), dtype='uint8')] * 20
+    detector = _detector(target_fps=20)
+    outputs = list(detector.run(FrameStream(frames, fps=100)))
+    stats = detector.stats()
+    assert stats['skipped'] > 0
+    assert len(outputs) + stats['skipped'] == len(frames)
+
+if __name__ == '__main__':
+    import nose
+    nose.runmodule()
@@ -16,6 +16,17 @@ def test_viz_bbox():
     ax = gcv.utils.viz.plot_bbox(img, bbox, ax=ax, reverse_rgb=True)
     ax = gcv.utils.viz.plot_bbox(img, bbox / 500, ax=ax, reverse_rgb=True, absolute_coordinates=False)
 
+def test_viz_cv_bbox():
+    img = mx.nd.zeros((300, 300, 3), dtype=np.uint8)
+    bbox = mx.nd.array([[10, 20, 200, 500], [150, 200, 400, 300]])
+    scores = mx.nd.array([0.8, 0.001])
+    labels = mx.nd.array([1, 3])
+    out = gcv.utils.viz.cv_plot_bbox(img, bbox, scores=scores, labels=labels,
+                                     class_names=['a', 'b', 'c'])
+    assert out.shape == (300, 300, 3) and out.dtype == np.uint8
+    assert out[20, 100].any() and not out[250, 300 - 1].any()
+    assert not img.asnumpy().any()
+
 def test_viz_image():
     img = mx.nd.zeros((300, 300, 3), dtype=np.uint8)
     ax = gcv.utils.viz.plot_image(img)